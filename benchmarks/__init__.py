@@ -0,0 +1,15 @@
+import resource
+
+def peak_rss_mb():
+    """
+    This process's peak RSS. Linux keeps ru_maxrss across exec, so a spawned
+    child would report its parent's peak; VmHWM starts afresh with the child.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
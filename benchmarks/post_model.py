@@ -0,0 +1,79 @@
+"""
+Compares holding posts as record dicts (what the scrapers used to build)
+with the slotted Post model they build now: memory per post and how fast
+the shared writers turn each into CSV, JSON and Arrow (Posts take the
+converters in shared/post.py).
+
+    python -m benchmarks.post_model --posts 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from shared.post import Post
+from shared.writers import get_writer, to_arrow_table
+
+def make_records(count):
+    return [
+        {
+            "id": f"{i:x}",
+            "title": f"Goat spotted doing something remarkable near town square, day {i % 365}",
+            "url": f"https://news.example.com/story/{i}",
+            "permalink": f"https://reddit.com/r/weirdnews/comments/{i:x}/goat_spotted/",
+            "score": i % 5000,
+            "subreddit": "weirdnews",
+            "created_utc": 1752600000.0 + i,
+            "num_comments": i % 300,
+        }
+        for i in range(count)
+    ]
+
+def measure_memory(build):
+    """Returns (result, bytes allocated by build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+def run(count):
+    # Both variants share the same string objects, so only the containers are measured
+    strings = make_records(count)
+    records, dict_bytes = measure_memory(lambda: [dict(record) for record in strings])
+    posts, post_bytes = measure_memory(lambda: [Post(**record) for record in strings])
+
+    fields = list(strings[0])
+    results = [("memory (bytes/post)", dict_bytes / count, post_bytes / count)]
+    for fmt in ("csv", "json"):
+        writer = get_writer(fmt)
+        results.append((fmt.upper(), timed(lambda: writer.serialize(records, fields))[1],
+                        timed(lambda: writer.serialize(posts, fields))[1]))
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        results.append(("Arrow", timed(lambda: to_arrow_table(records))[1], timed(lambda: to_arrow_table(posts))[1]))
+
+    print(f"{count} posts          {'dict':>12} {'Post':>12} {'ratio':>7}")
+    for name, dict_value, post_value in results:
+        unit = "" if name.startswith("memory") else " s"
+        label = name if name.startswith("memory") else f"{name} ({count / post_value:,.0f} posts/s)"
+        print(f"{label:<36} {dict_value:>10.3f}{unit:2} {post_value:>10.3f}{unit:2} {dict_value / post_value:>6.2f}x")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.post_model", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200000)
+    args = parser.parse_args()
+    run(args.posts)
+
+if __name__ == "__main__":
+    main()
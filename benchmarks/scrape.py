@@ -0,0 +1,240 @@
+"""
+Benchmarks the full scrape path (fetch, dedup, serialize, upload) for every
+category, offline: Reddit is shared/fake_reddit.py replaying a recorded
+cassette (benchmarks/cassettes/sample_hot.json.gz by default) scaled up to
+the requested size, and S3 is shared/fake_s3.py. Each repeat runs in a fresh
+process, so its peak RSS is the scraper's alone.
+Results are written as JSON and can be compared against a baseline.
+
+    python -m benchmarks.scrape --posts 12000 --repeat 3 --output bench.json
+    python -m benchmarks.scrape --cassette hot.json.gz --compare bench.json
+    python -m benchmarks.scrape --record hot.json.gz   # needs live Reddit credentials
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks import peak_rss_mb
+from reddit_news.categories import CATEGORIES
+from shared.fake_reddit import FakeRedditStore, fill_store, load_cassette, record_cassette
+from shared.fake_reddit import start_server as start_reddit
+from shared.fake_s3 import FakeS3Store
+from shared.fake_s3 import start_server as start_s3
+from shared.metrics import percentile
+
+DEFAULT_POSTS = 12000
+# 20 hot posts per subreddit in the recorded cassette format, replayed unless --synthetic is given
+SAMPLE_CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "sample_hot.json.gz")
+DEFAULT_DUPLICATE_RATE = 0.05
+# Regressions beyond this fraction of the baseline fail --compare
+DEFAULT_TOLERANCE = 0.15
+WORDS = ("goat", "mayor", "festival", "record", "town", "storm", "council", "cheese", "robot", "parade", "river",
+         "league", "album", "console", "trade", "museum", "farmer", "bridge", "election", "comet")
+
+def all_subreddits():
+    return sorted({sub for category in CATEGORIES.values() for sub in category["subreddits"]})
+
+def synthetic_listings(subreddits, per_subreddit=25, seed=0):
+    """Stand-in for a cassette when none is given: varied titles, scores and ages."""
+    rng = random.Random(seed)
+    now = time.time()
+    return {
+        sub: [{
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize(),
+            "url": f"https://news{rng.randint(1, 40)}.example.com/{sub}/{i}?utm_source=reddit",
+            "score": int(rng.paretovariate(1.2) * 50),
+            "num_comments": rng.randint(0, 800),
+            "created_utc": now - rng.uniform(0, 86400),
+            "subreddit_subscribers": 1_000_000,
+        } for i in range(per_subreddit)]
+        for sub in subreddits
+    }
+
+def scrape_once(env, names, per_subreddit, fetch_mode, dataset_formats, results, verbose=False):
+    """One benchmark run, in a child process: scrapes every category and reports its metrics and peak RSS."""
+    os.environ.update(env)
+    if not verbose:
+        # Every post is printed; keep the cost of formatting them but not the terminal flood
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    from reddit_news.engine import run_all
+    from shared import metrics
+    from shared.rate_limiter import configure_scheduler
+
+    for name in names:
+        CATEGORIES[name].update(limit=per_subreddit, max_posts=None)
+    configure_scheduler(rate=1e6, burst=1e6)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        run_all(names, fetch_mode=fetch_mode, dataset_formats=dataset_formats,
+                dedup_path=os.path.join(tmp_dir, "dedup.sqlite3"), store_path=os.path.join(tmp_dir, "posts.sqlite3"))
+        seconds = time.perf_counter() - started
+    report = metrics.get_metrics().report()
+    posts = report["counters"].get("posts_published", 0)
+    results.put({
+        "seconds": round(seconds, 3),
+        "posts": posts,
+        "posts_per_second": round(posts / seconds, 1) if seconds else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": report["stages"],
+        "counters": report["counters"],
+    })
+
+def summarize(runs):
+    seconds = [run["seconds"] for run in runs]
+    stages = {}
+    for run in runs:
+        for stage, stats in run["stages"].items():
+            stages.setdefault(stage, []).append(stats)
+    return {
+        "posts": runs[-1]["posts"],
+        "seconds_p50": round(percentile(seconds, 0.5), 3),
+        "seconds_p95": round(percentile(seconds, 0.95), 3),
+        "posts_per_second": round(statistics.median(run["posts_per_second"] for run in runs), 1),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "stages": {
+            stage: {
+                "total_seconds": round(statistics.median(stats["total_seconds"] for stats in runs_stats), 4),
+                "p50_seconds": round(statistics.median(stats["p50_seconds"] for stats in runs_stats), 4),
+                "p95_seconds": round(max(stats["p95_seconds"] for stats in runs_stats), 4),
+            }
+            for stage, runs_stats in sorted(stages.items())
+        },
+    }
+
+def compare(summary, baseline, tolerance):
+    """Returns the regressions of `summary` against a baseline summary, as printable lines."""
+    checks = [("posts_per_second", summary["posts_per_second"], baseline["posts_per_second"], False),
+              ("seconds_p50", summary["seconds_p50"], baseline["seconds_p50"], True),
+              ("peak_rss_mb", summary["peak_rss_mb"], baseline["peak_rss_mb"], True)]
+    regressions = []
+    for name, value, previous, lower_is_better in checks:
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        worse = change > tolerance if lower_is_better else change < -tolerance
+        print(f"{name:<20} {previous:>10} → {value:>10} ({change:+.1%}){'  ❌' if worse else ''}")
+        if worse:
+            regressions.append(f"{name} {previous} → {value} ({change:+.1%})")
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(posts=DEFAULT_POSTS, repeat=3, cassette=None, fetch_mode="sync", latency=0.0,
+        duplicate_rate=DEFAULT_DUPLICATE_RATE, dataset_formats=(), verbose=False):
+    """Runs the benchmark and returns its JSON-serializable result."""
+    names = list(CATEGORIES)
+    subreddits = all_subreddits()
+    per_subreddit = math.ceil(posts / len(subreddits))
+
+    reddit_store = FakeRedditStore(latency=latency, ratelimit_remaining=1_000_000)
+    if cassette:
+        loaded = load_cassette(reddit_store, cassette, per_subreddit, duplicate_rate)
+    else:
+        loaded = fill_store(reddit_store, synthetic_listings(subreddits), per_subreddit, duplicate_rate)
+    reddit_server, reddit_url = start_reddit(reddit_store)
+    s3_store = FakeS3Store()
+    s3_server, s3_url = start_s3(s3_store)
+    print(f"🧪 {loaded} posts in {len(subreddits)} subreddits from {cassette or 'synthetic listings'}; "
+          f"fake Reddit {reddit_url}, fake S3 {s3_url}")
+
+    env = {
+        "REDDIT_OAUTH_URL": reddit_url, "REDDIT_CLIENT_ID": "bench", "REDDIT_CLIENT_SECRET": "bench",
+        "REDDIT_USER_AGENT": "goatland-benchmark", "AWS_ENDPOINT_URL": s3_url, "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench", "AWS_REGION": "us-east-1",
+    }
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    try:
+        for i in range(repeat):
+            # A fresh bucket per repeat, so indexes and listings start empty every time
+            bucket = f"bench-{i}"
+            s3_store.buckets[bucket] = {}
+            results = context.Queue()
+            child = context.Process(target=scrape_once, args=(
+                dict(env, S3_BUCKET_NAME=bucket), names, per_subreddit, fetch_mode, list(dataset_formats), results, verbose))
+            child.start()
+            runs.append(results.get())
+            child.join()
+            print(f"⏱️ run {i + 1}/{repeat}: {runs[-1]['posts']} posts in {runs[-1]['seconds']:.2f}s "
+                  f"({runs[-1]['posts_per_second']:,.0f} posts/s, peak RSS {runs[-1]['peak_rss_mb']} MB)")
+            s3_store.buckets.pop(bucket)
+    finally:
+        reddit_server.shutdown()
+        s3_server.shutdown()
+
+    return {
+        "benchmark": "scrape",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"posts": posts, "repeat": repeat, "cassette": cassette, "fetch_mode": fetch_mode,
+                   "latency": latency, "duplicate_rate": duplicate_rate, "dataset_formats": list(dataset_formats)},
+        "summary": summarize(runs),
+        "runs": runs,
+    }
+
+def print_summary(summary):
+    print(f"{summary['posts']} posts: {summary['posts_per_second']:,.0f} posts/s, "
+          f"p50 {summary['seconds_p50']:.2f}s, p95 {summary['seconds_p95']:.2f}s, peak RSS {summary['peak_rss_mb']} MB")
+    print(f"{'stage':<18} {'total':>9} {'p50':>9} {'p95':>9}")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage:<18} {stats['total_seconds']:>8.3f}s {stats['p50_seconds']:>8.4f}s {stats['p95_seconds']:>8.4f}s")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scrape", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=DEFAULT_POSTS, help="posts across all subreddits")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cassette", default=SAMPLE_CASSETTE,
+                        help="replay this recorded cassette (default: the committed sample)")
+    parser.add_argument("--synthetic", action="store_true", help="generate listings instead of replaying a cassette")
+    parser.add_argument("--fetch-mode", choices=("sync", "async", "http"), default="sync")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fake Reddit adds to every response")
+    parser.add_argument("--duplicate-rate", type=float, default=DEFAULT_DUPLICATE_RATE,
+                        help="share of posts reusing another post's URL, for dedup to drop")
+    parser.add_argument("--dataset-format", action="append", default=[], help="also write this dataset format")
+    parser.add_argument("--verbose", action="store_true", help="show the scraper's own output")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON; exit 1 if this run regressed beyond --tolerance")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--record", metavar="PATH",
+                        help="record every category's live hot listings into a cassette at PATH and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_cassette(args.record, all_subreddits())
+        return
+
+    result = run(args.posts, args.repeat, None if args.synthetic else args.cassette, args.fetch_mode, args.latency, args.duplicate_rate,
+                 args.dataset_format, args.verbose)
+    print_summary(result["summary"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+        print(f"💾 Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(result["summary"], baseline["summary"], args.tolerance)
+        if regressions:
+            print(f"❌ Regressed against {args.compare}: {'; '.join(regressions)}")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of {args.compare}")
+
+if __name__ == "__main__":
+    main()
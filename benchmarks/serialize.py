@@ -0,0 +1,143 @@
+"""
+Benchmarks serializing and uploading large outputs, streamed (Writer.stream()
+into a multipart upload_stream()) or buffered (serialize() then upload_bytes()),
+against the in-memory shared/fake_s3.py. Every run is a fresh process fed by a
+generator of synthetic posts, so its peak RSS over the post-import baseline
+is what the output cost. Streaming should stay flat from 1k to 1M posts.
+
+    python -m benchmarks.serialize --sizes 1000,10000,100000,1000000 --output serialize.json
+    python -m benchmarks.serialize --formats csv --mode buffered --sizes 1000,100000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import peak_rss_mb
+from shared.fake_s3 import FakeS3Store, start_server
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_FORMATS = ("csv", "ndjson")
+# A streamed run whose RSS grows more than this from the smallest to the largest size fails --check
+DEFAULT_MAX_GROWTH_MB = 32
+FIELDS = ["title", "url", "permalink", "score", "subreddit"]
+BUCKET = "bench-serialize"
+
+def synthetic_posts(count, seed=0):
+    """`count` post records, generated one at a time."""
+    rng = random.Random(seed)
+    for i in range(count):
+        sub = rng.choice(("weirdnews", "nottheonion", "news", "worldnews", "gamingnews"))
+        yield {
+            "title": f"Synthetic {sub} story {i} about goats, mayors and cheese {rng.random():.6f}",
+            "url": f"https://news{rng.randint(1, 40)}.example.com/{sub}/{i}",
+            "permalink": f"https://reddit.com/r/{sub}/comments/{i:x}/synthetic_story/",
+            "score": rng.randint(1, 50_000),
+            "subreddit": sub,
+        }
+
+def serialize_once(env, fmt, size, mode, compression, results):
+    """One run, in a child process: serializes `size` posts and uploads them, reporting time and RSS."""
+    os.environ.update(env)
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    from shared.s3_utils import get_s3_client, upload_bytes, upload_stream
+    from shared.writers import get_writer
+
+    writer = get_writer(fmt)
+    get_s3_client()
+    baseline = peak_rss_mb()
+    key = f"bench/{fmt}-{size}.{writer.extension}"
+    started = time.perf_counter()
+    if mode == "stream":
+        sent = upload_stream(writer.stream(synthetic_posts(size), FIELDS), BUCKET, key,
+                             content_type=writer.content_type, compression=compression)
+    else:
+        sent = upload_bytes(writer.serialize(list(synthetic_posts(size)), FIELDS), BUCKET, key,
+                            content_type=writer.content_type, compression=compression)
+    seconds = time.perf_counter() - started
+    results.put({
+        "format": fmt,
+        "posts": size,
+        "mode": mode,
+        "seconds": round(seconds, 3),
+        "posts_per_second": round(size / seconds, 1) if seconds else 0.0,
+        "bytes_sent": sent,
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+    })
+
+def run(sizes=DEFAULT_SIZES, formats=DEFAULT_FORMATS, mode="stream", compression="gzip"):
+    """Runs every format at every size and returns the JSON-serializable result."""
+    store = FakeS3Store([BUCKET])
+    server, url = start_server(store)
+    env = {"AWS_ENDPOINT_URL": url, "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench",
+           "AWS_REGION": "us-east-1", "S3_BUCKET_NAME": BUCKET}
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    try:
+        for fmt in formats:
+            for size in sizes:
+                results = context.Queue()
+                child = context.Process(target=serialize_once, args=(env, fmt, size, mode, compression, results))
+                child.start()
+                runs.append(results.get())
+                child.join()
+                store.buckets[BUCKET].clear()
+                run = runs[-1]
+                print(f"⏱️ {fmt} {size:>9,} posts ({mode}): {run['seconds']:.2f}s, {run['bytes_sent']:,} bytes, "
+                      f"RSS +{run['rss_growth_mb']} MB (peak {run['peak_rss_mb']} MB)")
+    finally:
+        server.shutdown()
+    return {
+        "benchmark": "serialize",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"sizes": list(sizes), "formats": list(formats), "mode": mode, "compression": compression},
+        "runs": runs,
+    }
+
+def rss_growth(runs):
+    """Per format: how much more the largest size's run grew RSS than the smallest's."""
+    growth = {}
+    for fmt in dict.fromkeys(run["format"] for run in runs):
+        ordered = sorted((run for run in runs if run["format"] == fmt), key=lambda run: run["posts"])
+        growth[fmt] = round(ordered[-1]["rss_growth_mb"] - ordered[0]["rss_growth_mb"], 1)
+    return growth
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialize", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated post counts")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS), help="comma-separated writer formats")
+    parser.add_argument("--mode", choices=("stream", "buffered"), default="stream")
+    parser.add_argument("--compression", choices=("gzip", "zstd", "none"), default="gzip")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if RSS grows more than --max-growth-mb from the smallest to the largest size")
+    parser.add_argument("--max-growth-mb", type=float, default=DEFAULT_MAX_GROWTH_MB)
+    args = parser.parse_args()
+
+    result = run([int(size) for size in args.sizes.split(",")], args.formats.split(","), args.mode,
+                 None if args.compression == "none" else args.compression)
+    result["rss_growth_mb"] = growth = rss_growth(result["runs"])
+    for fmt, mb in growth.items():
+        print(f"{fmt}: RSS growth from {args.sizes.split(',')[0]} to {args.sizes.split(',')[-1]} posts: {mb:+} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+        print(f"💾 Results written to {args.output}")
+    if args.check:
+        over = {fmt: mb for fmt, mb in growth.items() if mb > args.max_growth_mb}
+        if over:
+            print(f"❌ RSS grew more than {args.max_growth_mb} MB: {over}")
+            sys.exit(1)
+        print(f"✅ RSS growth within {args.max_growth_mb} MB")
+
+if __name__ == "__main__":
+    main()
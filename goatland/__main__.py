@@ -0,0 +1,24 @@
+import argparse
+import importlib
+
+# Subcommand -> (module whose main(argv, prog) runs it, help). A module is only
+# imported when its subcommand runs, so `--help` and `verify` never load praw or boto3.
+COMMANDS = {
+    "scrape": ("reddit_news.__main__", "scrape every news category and upload the outputs"),
+    "backfill": ("reddit_news.backfill", "fill in the daily outputs a category is missing in S3"),
+    "compact": ("reddit_news.compaction", "merge small per-run S3 objects into daily or monthly rollups"),
+    "verify": ("goatland.verify", "check configuration and the CLI's startup time, without network access"),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m goatland", description="Goatland news scrapers.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, help) in COMMANDS.items():
+        # Each subcommand parses its own arguments (and --help) once it's imported
+        subparsers.add_parser(name, help=help, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+    module = importlib.import_module(COMMANDS[args.command][0])
+    module.main(rest, prog=f"python -m goatland {args.command}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from goatland.__main__ import COMMANDS
+from reddit_news.categories import CATEGORIES, get_category
+
+# Cumulative import time every subcommand module may take together, in a fresh interpreter
+DEFAULT_BUDGET_MS = 100
+# Packages no subcommand may import before it actually needs a client
+HEAVY_MODULES = ("praw", "prawcore", "asyncpraw", "aiohttp", "boto3", "botocore", "requests", "pyarrow",
+                 "zstandard")
+REQUIRED_ENV = {
+    "reddit": ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT"),
+    "s3": ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_REGION", "S3_BUCKET_NAME"),
+}
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)$")
+
+def import_times(code):
+    """
+    Runs `code` under `python -X importtime` and returns (module, cumulative
+    µs, nested) for every import, in the order they finished.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            times.append((match.group(4), int(match.group(2)), len(match.group(3)) > 0))
+    return times
+
+def check_startup(budget_ms=DEFAULT_BUDGET_MS):
+    """
+    Imports every subcommand's module in a fresh interpreter and returns a
+    list of problems: over the time budget, or a heavy package loaded at
+    import time. Whatever the bare interpreter imports (site, .pth hooks)
+    is measured separately and left out.
+    """
+    startup = {module for module, _, _ in import_times("pass")}
+    modules = ["goatland.__main__"] + [module for module, _ in COMMANDS.values()]
+    times = [entry for entry in import_times(f"import {', '.join(modules)}") if entry[0] not in startup]
+    total_ms = sum(cumulative for _, cumulative, nested in times if not nested) / 1000
+    print(f"⏱️ Importing {len(modules)} CLI modules took {total_ms:.1f} ms (budget {budget_ms} ms)")
+
+    problems = []
+    if total_ms > budget_ms:
+        slowest = sorted(times, key=lambda entry: -entry[1])[:5]
+        problems.append(f"startup took {total_ms:.1f} ms, over the {budget_ms} ms budget; slowest imports: "
+                        + ", ".join(f"{module} {cumulative / 1000:.1f} ms" for module, cumulative, _ in slowest))
+    heavy = sorted({module.split(".")[0] for module, _, _ in times} & set(HEAVY_MODULES))
+    if heavy:
+        problems.append(f"imported at startup: {', '.join(heavy)}")
+    return problems
+
+def check_categories():
+    """Returns a list of problems with the category registry (formats, fields, prefixes)."""
+    from shared.writers import WRITERS
+
+    problems = []
+    prefixes = {}
+    for name in CATEGORIES:
+        category = get_category(name)
+        if category["format"] not in WRITERS:
+            problems.append(f"{name}: unknown output format {category['format']}")
+        if not category["subreddits"] or not category["fields"]:
+            problems.append(f"{name}: needs at least one subreddit and field")
+        if category["s3_prefix"] in prefixes:
+            problems.append(f"{name}: s3_prefix {category['s3_prefix']} is also used by {prefixes[category['s3_prefix']]}")
+        prefixes[category["s3_prefix"]] = name
+    return problems
+
+def check_env():
+    """Returns a list of the environment variables (from the environment or .env) that aren't set."""
+    import shared.env_utils  # noqa: F401 - loads .env
+
+    return [f"missing environment variable {name} ({service})" for service, names in REQUIRED_ENV.items()
+            for name in names if not os.getenv(name)]
+
+def check_live():
+    """Returns a list of problems reaching the bucket and Reddit with the configured credentials."""
+    from shared.reddit_utils import get_reddit_client
+    from shared.s3_utils import get_bucket_name, get_s3_client
+
+    problems = []
+    try:
+        get_s3_client().head_bucket(Bucket=get_bucket_name())
+    except Exception as e:
+        problems.append(f"S3 bucket not reachable: {e}")
+    try:
+        subreddit = get_category(next(iter(CATEGORIES)))["subreddits"][0]
+        next(iter(get_reddit_client().subreddit(subreddit).hot(limit=1)), None)
+    except Exception as e:
+        problems.append(f"Reddit not reachable: {e}")
+    return problems
+
+def check_compaction():
+    """
+    Runs compaction against a local fake S3 (shared/fake_s3.py) and returns a
+    list of problems: a rerun that changes anything, a source re-uploaded
+    under the same key that isn't compacted again, or days lost once a month
+    rollup replaces the deleted daily files (in the manifest or on its rows).
+    """
+    import boto3
+
+    from reddit_news.compaction import compact_prefix, iter_rows, rollup_days
+    from shared.fake_s3 import FakeS3Store, start_server
+    from shared.writers import get_writer
+
+    bucket, prefix, fields = "verify", "verify_news", ["id", "title", "url", "permalink", "score", "subreddit"]
+    server, url = start_server(FakeS3Store([bucket]))
+    s3 = boto3.client("s3", endpoint_url=url, region_name="us-east-1", aws_access_key_id="verify",
+                      aws_secret_access_key="verify")
+
+    def put(day, ids):
+        rows = [{"id": post_id, "title": f"Goat {post_id}", "url": f"https://example.com/{post_id}",
+                 "permalink": f"/r/goats/comments/{post_id}/", "score": 1, "subreddit": "goats"} for post_id in ids]
+        s3.put_object(Bucket=bucket, Key=f"{prefix}/{prefix}_{day}.csv", Body=get_writer("csv").serialize(rows, fields))
+
+    def rollup_ids(manifest, period_id):
+        return sorted(row["id"] for row in iter_rows(s3, bucket, manifest["rollups"][period_id]["key"]))
+
+    problems = []
+    try:
+        put("2025-07-01", ["a", "b"])
+        put("2025-07-02", ["c"])
+        first = compact_prefix(prefix, "day", bucket_name=bucket, s3=s3)
+        rerun = compact_prefix(prefix, "day", bucket_name=bucket, s3=s3)
+        if [rollup["key"] for rollup in rerun["rollups"].values()] != [rollup["key"] for rollup in first["rollups"].values()]:
+            problems.append("compaction: rerunning with unchanged sources wrote new rollups")
+        put("2025-07-01", ["b", "d"])  # a same-day rerun replaces the daily file
+        manifest = compact_prefix(prefix, "day", bucket_name=bucket, s3=s3)
+        if rollup_ids(manifest, "2025-07-01") != ["b", "d"]:
+            problems.append(f"compaction: re-uploaded source not compacted again ({rollup_ids(manifest, '2025-07-01')})")
+        manifest = compact_prefix(prefix, "month", bucket_name=bucket, delete_sources=True, s3=s3)
+        if rollup_ids(manifest, "2025-07") != ["b", "c", "d"]:
+            problems.append(f"compaction: month rollup holds {rollup_ids(manifest, '2025-07')}")
+        if rollup_days(manifest["rollups"]["2025-07"]) != ["2025-07-01", "2025-07-02"]:
+            problems.append(f"compaction: month rollup covers {rollup_days(manifest['rollups']['2025-07'])}")
+        row_days = {row["id"]: row.get("day") for row in iter_rows(s3, bucket, manifest["rollups"]["2025-07"]["key"])}
+        if row_days != {"b": "2025-07-01", "c": "2025-07-02", "d": "2025-07-01"}:
+            problems.append(f"compaction: month rollup rows lost their days ({row_days})")
+    except Exception as e:
+        problems.append(f"compaction failed against the fake S3: {e}")
+    finally:
+        server.shutdown()
+    return problems
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog or "python -m goatland.verify",
+                                     description="Check the scrapers' configuration and CLI startup time.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"most the CLI modules may take to import, in ms (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--no-env", action="store_true", help="don't require credentials in the environment")
+    parser.add_argument("--live", action="store_true",
+                        help="also reach the S3 bucket and Reddit with the configured credentials")
+    parser.add_argument("--storage", action="store_true",
+                        help="also run compaction against a local fake S3")
+    args = parser.parse_args(argv)
+
+    problems = check_startup(args.budget_ms) + check_categories()
+    if not args.no_env:
+        problems += check_env()
+    if args.storage:
+        problems += check_compaction()
+    if args.live and not problems:
+        problems += check_live()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ Configuration and startup OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from reddit_news.categories import CATEGORIES, get_category
+from reddit_news.compaction import iter_rows, load_manifest, rollup_days
+from shared import metrics
+from shared.s3_index import KEY_DATE, IndexResolver
+from shared.s3_utils import decompress, get_bucket_name, get_s3_client, upload_bytes
+from shared.url_utils import normalize_url
+
+INDEX_KEY = "on_this_day/index.json"
+# Posts kept per month-day and year; a day's lookup merges the years before it
+TOP_PER_YEAR = 10
+DEFAULT_LIMIT = 10
+DEFAULT_WORKERS = 8
+CACHE_TTL = 300
+ENTRY_FIELDS = ("title", "url", "permalink", "subreddit", "score")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def empty_index():
+    return {"version": 1, "top_per_year": TOP_PER_YEAR, "sources": {}, "days": {}}
+
+def load_index(s3=None, bucket_name=None):
+    """Returns the month-day index from S3, or an empty one if it hasn't been built yet."""
+    s3 = s3 or get_s3_client()
+    try:
+        response = s3.get_object(Bucket=bucket_name or get_bucket_name(), Key=INDEX_KEY)
+    except s3.exceptions.NoSuchKey:
+        return empty_index()
+    return json.loads(decompress(response["Body"].read(), response.get("ContentEncoding")))
+
+def save_index(index, bucket_name):
+    index["updated_at"] = datetime.now(timezone.utc).isoformat()
+    body = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return upload_bytes(body, bucket_name, INDEX_KEY, content_type="application/json", compression="gzip")
+
+def normalized_entries(rows, category):
+    """
+    Turns one day's rows into index entries, each scored relative to its
+    subreddit that day (score / median score), so a busy subreddit's ordinary
+    post doesn't outrank a small one's standout.
+    """
+    by_sub = {}
+    for row in rows:
+        by_sub.setdefault(row.get("subreddit") or category, []).append(row)
+    entries = []
+    for sub, sub_rows in by_sub.items():
+        scores = [int(row.get("score") or 0) for row in sub_rows]
+        median = max(1.0, float(statistics.median(scores)))
+        for row, score in zip(sub_rows, scores):
+            entry = {field: row.get(field) for field in ENTRY_FIELDS if row.get(field) not in (None, "")}
+            entry.update(score=score, category=category, norm=round(max(score, 0) / median, 3))
+            entries.append(entry)
+    return entries
+
+def entry_key(entry):
+    return normalize_url(entry.get("url")) or entry.get("permalink") or entry.get("title")
+
+def merge_entries(index, day, entries, limit=TOP_PER_YEAR):
+    """Folds one day's entries into its month-day bucket, keeping each story once and the best `limit` per year."""
+    bucket = index["days"].setdefault(day[5:], {}).setdefault(day[:4], [])
+    best = {entry_key(entry): entry for entry in bucket}
+    for entry in entries:
+        key = entry_key(entry)
+        if key not in best or entry["norm"] > best[key]["norm"]:
+            best[key] = entry
+    bucket[:] = sorted(best.values(), key=lambda entry: (-entry["norm"], -entry["score"]))[:limit]
+
+def pending_sources(resolver, index, category, until):
+    """
+    (day, key) for the category's dated outputs up to `until` that the index
+    hasn't folded in yet: everything after its watermark day, plus that day's
+    files that landed after the last update.
+    """
+    source = index["sources"].get(category["name"], {})
+    done = set(source.get("keys", []))
+    entries = resolver.between(category["s3_prefix"], source.get("date", "0000-00-00"), until)
+    return [(KEY_DATE.search(entry["key"]).group(1), entry["key"]) for entry in entries if entry["key"] not in done]
+
+def mark_done(index, category, day, keys):
+    source = index["sources"].setdefault(category["name"], {})
+    if source.get("date") != day:
+        source.update(date=day, keys=[])
+    source["keys"] = sorted(set(source["keys"]) | set(keys))
+
+def rollup_sources(s3, bucket_name, category):
+    """
+    (last day, rollup key, default day) for the compaction rollups, for
+    rebuilding history whose per-run files compaction deleted. A month
+    rollup stands in for its month's daily rollups; its rows carry the day
+    they came from. Rows of rollups compacted before that have none, so they
+    go to the default day, which a month rollup only has when it covers one.
+    """
+    months = load_manifest(s3, bucket_name, category["s3_prefix"], "month")["rollups"]
+    sources = []
+    for rollup in months.values():
+        days = rollup_days(rollup)
+        if days:
+            sources.append((days[-1], rollup["key"], days[0] if len(days) == 1 else None))
+    days = load_manifest(s3, bucket_name, category["s3_prefix"], "day")["rollups"]
+    sources += [(day, rollup["key"], day) for day, rollup in days.items() if day[:7] not in months]
+    return sorted(sources)
+
+def update_index(names=None, rebuild=False, until=None, workers=DEFAULT_WORKERS, upload=True):
+    """
+    Folds newly landed daily outputs into the month-day index and saves it.
+    Each category records the last day folded in (and that day's files), so
+    a daily run reads the prefix indexes plus the new files, never the whole
+    history. rebuild=True starts from scratch, including days only kept in
+    day or month compaction rollups.
+    """
+    s3 = get_s3_client()
+    bucket_name = get_bucket_name()
+    until = until or datetime.now(timezone.utc).date().isoformat()
+    index = empty_index() if rebuild else load_index(s3, bucket_name)
+    resolver = IndexResolver(s3, bucket_name)
+
+    jobs = []
+    for name in names or CATEGORIES:
+        category = get_category(name)
+        sources = [(day, key, day) for day, key in pending_sources(resolver, index, category, until)]
+        if rebuild:
+            sources += [source for source in rollup_sources(s3, bucket_name, category) if source[0] <= until]
+        jobs += [(category, *source) for source in sources]
+    print(f"📅 On this day: {len(jobs)} new files to fold in")
+
+    def read(job):
+        """The rows of one file, by the day they belong to (their own "day" field, else the job's default)."""
+        category, day, key, default_day = job
+        by_day = {}
+        for row in iter_rows(s3, bucket_name, key):
+            by_day.setdefault(row.get("day") or default_day, []).append(row)
+        return job, by_day
+
+    with metrics.span("fetch"), ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(read, jobs))
+    with metrics.span("transform"):
+        for (category, day, key, _), by_day in sorted(results, key=lambda result: result[0][1:3]):
+            unplaced = by_day.pop(None, [])
+            if unplaced:
+                print(f"⚠️ On this day: skipped {len(unplaced)} rows of {key}, which don't say which day they're from")
+            for row_day, rows in sorted(by_day.items()):
+                merge_entries(index, row_day, normalized_entries(rows, category["name"]))
+            mark_done(index, category, day, [key])
+            metrics.count("posts_fetched", sum(len(rows) for rows in by_day.values()))
+    if upload:
+        with metrics.span("upload"):
+            size = save_index(index, bucket_name)
+        print(f"☁️ On this day: index covers {len(index['days'])} month-days ({size} bytes)")
+    with _cache_lock:
+        _cache[bucket_name] = (time.monotonic(), index)
+    return index
+
+def get_index(bucket_name=None, ttl=CACHE_TTL):
+    """The index for serving: one GET, then kept in-process for `ttl` seconds."""
+    bucket_name = bucket_name or get_bucket_name()
+    with _cache_lock:
+        cached = _cache.get(bucket_name)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    index = load_index(get_s3_client(), bucket_name)
+    with _cache_lock:
+        _cache[bucket_name] = (time.monotonic(), index)
+    return index
+
+def on_this_day(index, day=None, limit=DEFAULT_LIMIT, category=None):
+    """
+    The best posts from earlier years on `day`'s month and day (today by
+    default), best first, each story once with the year it was published.
+    """
+    day = day or datetime.now(timezone.utc).date()
+    years = index["days"].get(day.strftime("%m-%d"), {})
+    best = {}
+    for year, entries in years.items():
+        if int(year) >= day.year:
+            continue
+        for entry in entries:
+            key = entry_key(entry)
+            if (not category or entry["category"] == category) and (key not in best or entry["norm"] > best[key]["norm"]):
+                best[key] = dict(entry, year=int(year))
+    return sorted(best.values(), key=lambda entry: (-entry["norm"], -entry["score"]))[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m on_this_day.on_this_day_scraper",
+                                     description="Build the Goatland \"on this day\" index from scrape history.")
+    parser.add_argument("categories", nargs="*", metavar="category",
+                        help=f"categories to fold in (default: all of {', '.join(CATEGORIES)})")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild the index from all history, including compaction rollups")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"files read in parallel (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--no-upload", action="store_true", help="build the index without saving it to S3")
+    parser.add_argument("--show", metavar="YYYY-MM-DD", type=date.fromisoformat,
+                        help="only print the posts the index holds for this date's earlier years")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    unknown = [name for name in args.categories if name not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(unknown)}")
+
+    if args.show:
+        index = get_index()
+    else:
+        metrics.start_run("on_this_day")
+        index = update_index(args.categories or None, rebuild=args.rebuild, workers=args.workers,
+                             upload=not args.no_upload)
+        metrics.finish_run(None if args.no_upload else get_bucket_name())
+    day = args.show or datetime.now(timezone.utc).date()
+    for post in on_this_day(index, day, args.limit):
+        print(f"{post['year']}  [{post.get('subreddit', post['category'])}] {post['title']} "
+              f"({post['score']} points, {post['norm']}x)")
+
+if __name__ == "__main__":
+    main()
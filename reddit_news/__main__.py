@@ -0,0 +1,95 @@
+import argparse
+import sys
+
+from reddit_news.categories import CATEGORIES
+from reddit_news.engine import (DEFAULT_CATEGORY_TIMEOUT, DEFAULT_CATEGORY_WORKERS, DEFAULT_CONCURRENCY, FETCH_MODES,
+                                CategoriesFailed, run_all)
+from shared.comments import DEFAULT_DEPTH, DEFAULT_REPLACE_MORE, DEFAULT_TIME_LIMIT, DEFAULT_WORKERS
+from shared.dedup_index import DEFAULT_INDEX_PATH
+from shared.listing_cache import DEFAULT_CACHE_DIR
+from shared.post_store import DEFAULT_STORE_PATH
+from shared.s3_utils import COMPRESSIONS
+from shared.scrape_state import DEFAULT_STATE_PATH
+from shared.writers import DATASET_FORMATS
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog or "python -m reddit_news",
+                                     description="Scrape every Goatland Reddit news category in one run.")
+    parser.add_argument("categories", nargs="*", metavar="category",
+                        help=f"categories to scrape (default: all of {', '.join(CATEGORIES)})")
+    parser.add_argument("--output-dir", help="also keep a local copy of every output in this directory")
+    parser.add_argument("--no-upload", action="store_true", help="write files locally without uploading to S3")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="sync",
+                        help="async requests every subreddit listing concurrently; http revalidates "
+                             "listings against the local listing cache (default: sync)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"max listing requests in flight in async mode (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--category-workers", type=int, default=DEFAULT_CATEGORY_WORKERS,
+                        help=f"categories fetched in parallel in sync and http modes "
+                             f"(default: {DEFAULT_CATEGORY_WORKERS})")
+    parser.add_argument("--category-timeout", type=float, default=DEFAULT_CATEGORY_TIMEOUT,
+                        help=f"seconds a category's fetch may take before the run goes on without it "
+                             f"(default: {DEFAULT_CATEGORY_TIMEOUT})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"listing cache directory for http mode (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-s3-prefix", help="mirror the listing cache to this S3 prefix (http mode)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="keep posts that were already published by another category or a recent run")
+    parser.add_argument("--dedup-path", default=DEFAULT_INDEX_PATH,
+                        help=f"dedup index file (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--dedup-s3-key", help="mirror the dedup index to this S3 key between runs")
+    parser.add_argument("--near-dedup", action="store_true",
+                        help="merge posts about the same story (similar titles) into one, with their sources")
+    parser.add_argument("--rank", action="store_true",
+                        help="keep each category's best posts overall (per-subreddit normalized, age-decayed) "
+                             "instead of every subreddit's top posts")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only emit posts since the last run, plus score changes of recent ones")
+    parser.add_argument("--state-path", default=DEFAULT_STATE_PATH,
+                        help=f"state file for incremental and ranked runs (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--state-s3-key", help="mirror the scrape state to this S3 key between runs")
+    parser.add_argument("--dataset-format", action="append", default=[], choices=DATASET_FORMATS,
+                        help="also write the partitioned dataset in this format (repeatable)")
+    parser.add_argument("--compress", choices=COMPRESSIONS,
+                        help="upload CSV/JSON outputs compressed, with a matching Content-Encoding")
+    parser.add_argument("--no-store", action="store_true", help="don't record published posts in the post store")
+    parser.add_argument("--store-path", default=DEFAULT_STORE_PATH,
+                        help=f"post store file (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--store-s3-key", help="mirror the post store to this S3 key between runs")
+    parser.add_argument("--comments", type=int, default=0, metavar="N",
+                        help="also fetch the top N comments of every published post")
+    parser.add_argument("--comment-depth", type=int, default=DEFAULT_DEPTH,
+                        help=f"levels of replies kept, counting top-level comments (default: {DEFAULT_DEPTH})")
+    parser.add_argument("--replace-more", type=int, default=DEFAULT_REPLACE_MORE,
+                        help=f"\"load more comments\" expansions per post, one request each "
+                             f"(default: {DEFAULT_REPLACE_MORE})")
+    parser.add_argument("--comment-workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"comment threads fetched in parallel (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--comment-time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help=f"seconds the whole comment stage may take (default: {DEFAULT_TIME_LIMIT})")
+    parser.add_argument("--metrics-path",
+                        help="also write the run's stage timings as a Prometheus textfile (e.g. for node_exporter)")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.categories if name not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(unknown)}")
+
+    try:
+        run_all(args.categories or None, output_dir=args.output_dir, upload=not args.no_upload,
+                fetch_mode=args.fetch_mode, concurrency=args.concurrency,
+                cache_dir=args.cache_dir, cache_s3_prefix=args.cache_s3_prefix,
+                dedup=not args.no_dedup, dedup_path=args.dedup_path, dedup_s3_key=args.dedup_s3_key,
+                incremental=args.incremental, state_path=args.state_path, state_s3_key=args.state_s3_key,
+                dataset_formats=args.dataset_format, compression=args.compress,
+                near_dedup=args.near_dedup, rank=args.rank,
+                store=not args.no_store, store_path=args.store_path, store_s3_key=args.store_s3_key,
+                metrics_path=args.metrics_path, comments=args.comments, comment_depth=args.comment_depth,
+                replace_more=args.replace_more, comment_workers=args.comment_workers,
+                comment_time_limit=args.comment_time_limit,
+                category_workers=args.category_workers, category_timeout=args.category_timeout)
+    except CategoriesFailed as e:
+        sys.exit(f"❌ {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+
+from reddit_news.categories import CATEGORIES, get_category
+from reddit_news.compaction import load_manifest, rollup_days
+from reddit_news.engine import build_record, render_outputs, save_outputs
+from shared import metrics
+from shared.post import Post
+from shared.post_store import DEFAULT_STORE_PATH, PostStore
+from shared.reddit_http import as_thing, get_http_client
+from shared.s3_index import IndexResolver
+from shared.s3_utils import get_bucket_name, get_s3_client, upload_many
+from shared.writers import DATASET_FORMATS, get_dataset_writer
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".cache", "backfill")
+DEFAULT_WORKERS = 4
+# Reddit stops paging a listing after about 1000 items
+MAX_LISTING = 1000
+# Narrowest top() window that still reaches back to a given age, in days
+TIME_FILTERS = [(1, "day"), (7, "week"), (31, "month"), (365, "year")]
+
+def date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+def existing_dates(s3, bucket_name, category):
+    """
+    Dates that already have output under a category's prefix: per-run files
+    (from the prefix index) plus the days every day and month rollup covers,
+    since compaction may have deleted their sources and daily rollups.
+    """
+    dates = set(IndexResolver(s3, bucket_name).dates(category["s3_prefix"]))
+    for period in ("day", "month"):
+        for rollup in load_manifest(s3, bucket_name, category["s3_prefix"], period)["rollups"].values():
+            dates.update(rollup_days(rollup))
+    return dates
+
+def missing_dates(s3, bucket_name, category, start, end):
+    """Returns the dates in [start, end] with no output for the category."""
+    existing = existing_dates(s3, bucket_name, category)
+    return [day for day in date_range(start, end) if day.isoformat() not in existing]
+
+def time_filter_for(start):
+    age = (datetime.now(timezone.utc).date() - start).days + 1
+    return next((name for days, name in TIME_FILTERS if age <= days), "all")
+
+class BackfillCheckpoint:
+    """
+    Progress of one backfill in a JSON file: the listings already fetched per
+    subreddit and the dates already written. An interrupted backfill started
+    again with the same arguments skips both.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.listings = {}
+        self.done = set()
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        self.listings = {sub: [Post.from_dict(record) for record in records]
+                         for sub, records in data.get("listings", {}).items()}
+        self.done = set(data.get("done", []))
+
+    def save(self):
+        with self.lock:
+            dirpath = os.path.dirname(self.path)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                listings = {sub: [post.to_dict() for post in posts] for sub, posts in self.listings.items()}
+                json.dump({"listings": listings, "done": sorted(self.done)}, file)
+            os.replace(tmp_path, self.path)
+
+    def add_listing(self, sub, posts):
+        with self.lock:
+            self.listings[sub] = posts
+        self.save()
+
+    def mark_done(self, day):
+        with self.lock:
+            self.done.add(day.isoformat())
+        self.save()
+
+def fetch_history(client, sub, category, start, end, time_filter):
+    """
+    Returns Posts for a subreddit's top posts created
+    between start and end, from one top() listing wide enough to reach start.
+    """
+    first = datetime.combine(start, dt_time.min, timezone.utc).timestamp()
+    last = datetime.combine(end + timedelta(days=1), dt_time.min, timezone.utc).timestamp()
+    listing = map(as_thing, client.iter_listing(sub, "top", MAX_LISTING, t=time_filter))
+    return [build_record(post, sub, category)
+            for post in listing if not post.stickied and first <= post.created_utc < last]
+
+def posts_for_day(posts, category, day):
+    """What a daily run would have kept: each subreddit's top `limit` (capped at max_posts) of that day."""
+    start = datetime.combine(day, dt_time.min, timezone.utc).timestamp()
+    results = []
+    for sub in category["subreddits"]:
+        ranked = sorted((post for post in posts.get(sub, []) if start <= post.created_utc < start + 86400),
+                        key=lambda post: -post.score)
+        results.extend(ranked[:min(category["limit"], category["max_posts"] or category["limit"])])
+    return results
+
+def backfill_category(name, start, end, workers=DEFAULT_WORKERS, checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+                      upload=True, output_dir=None, dataset_formats=(), dry_run=False, store_path=DEFAULT_STORE_PATH,
+                      store_s3_key=None):
+    """
+    Writes the daily outputs a category is missing between start and end.
+    Missing days are found from the prefix's object index and its
+    compaction manifests, without listing the prefix. Each subreddit's history for the whole range is
+    then fetched with a single top() listing, subreddits in parallel on a
+    thread pool sharing the run's HTTP session and rate budget, and split into per-day files.
+    Backfilled posts are recorded in the post store at `store_path` (None to
+    skip), mirrored to `store_s3_key` when one is given and uploads are on,
+    as the scraper does. Returns the dates written.
+    """
+    category = get_category(name)
+    for fmt in dataset_formats:
+        get_dataset_writer(fmt)
+    bucket_name = get_bucket_name()
+    s3 = get_s3_client()
+
+    checkpoint = BackfillCheckpoint(os.path.join(checkpoint_dir, f"{name}_{start}_{end}.json"))
+    days = [day for day in missing_dates(s3, bucket_name, category, start, end)
+            if day.isoformat() not in checkpoint.done]
+    print(f"🔎 {name}: {len(days)} missing days between {start} and {end}")
+    if not days or dry_run:
+        for day in days:
+            print(f"   {day}")
+        return []
+
+    client = get_http_client()
+    time_filter = time_filter_for(days[0])
+    pending = [sub for sub in category["subreddits"] if sub not in checkpoint.listings]
+    with metrics.span("fetch"), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_history, client, sub, category, days[0], days[-1], time_filter): sub
+                   for sub in pending}
+        for future in as_completed(futures):
+            sub = futures[future]
+            checkpoint.add_listing(sub, future.result())
+            print(f"📥 {name}: fetched r/{sub} history (top/{time_filter})")
+
+    post_store = PostStore(store_path) if store_path else None
+    if post_store and store_s3_key and upload:
+        post_store.sync_from_s3(s3, bucket_name, store_s3_key)
+    for day in days:
+        posts = posts_for_day(checkpoint.listings, category, day)
+        metrics.count("posts_published", len(posts))
+        now = datetime.combine(day, dt_time(23, 59, 59), timezone.utc)
+        outputs = render_outputs(category, posts, now, dataset_formats)
+        if output_dir:
+            save_outputs(outputs, output_dir)
+        if upload:
+            with metrics.span("upload"):
+                upload_many(outputs, bucket_name)
+        if post_store:
+            with metrics.span("store"):
+                post_store.upsert(posts, name, day.isoformat())
+        checkpoint.mark_done(day)
+        print(f"🧩 {name}: backfilled {day} with {len(posts)} posts")
+    if post_store:
+        if store_s3_key and upload:
+            post_store.sync_to_s3(s3, bucket_name, store_s3_key)
+        post_store.close()
+    # Finished: a later backfill of the same range should look at S3 afresh
+    os.remove(checkpoint.path)
+    print(f"📡 Reddit: {client.scheduler.summary()}")
+    return days
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog or "python -m reddit_news.backfill",
+                                     description="Fill in the daily outputs a category is missing in S3.")
+    parser.add_argument("categories", nargs="+", metavar="category", help=f"any of {', '.join(CATEGORIES)}")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat,
+                        default=datetime.now(timezone.utc).date() - timedelta(days=1),
+                        help="last day (default: yesterday, UTC)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"subreddit histories fetched in parallel (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"where resumable progress is kept (default: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument("--dataset-format", action="append", default=[], choices=DATASET_FORMATS,
+                        help="also write the partitioned dataset in this format (repeatable)")
+    parser.add_argument("--output-dir", help="also keep a local copy of every output in this directory")
+    parser.add_argument("--no-upload", action="store_true", help="write outputs locally without uploading to S3")
+    parser.add_argument("--dry-run", action="store_true", help="only list the missing days")
+    parser.add_argument("--store-path", default=DEFAULT_STORE_PATH,
+                        help=f"record backfilled posts in this post store (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--no-store", action="store_true", help="don't record backfilled posts in the post store")
+    parser.add_argument("--store-s3-key", help="mirror the post store to this S3 key, as the scraper does")
+    parser.add_argument("--metrics-path", help="also write the run's stage timings as a Prometheus textfile")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.categories if name not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(unknown)}")
+    if args.start > args.end:
+        parser.error("--start must not be after --end")
+
+    metrics.start_run("backfill")
+    for name in args.categories:
+        backfill_category(name, args.start, args.end, workers=args.workers, checkpoint_dir=args.checkpoint_dir,
+                          upload=not args.no_upload, output_dir=args.output_dir,
+                          dataset_formats=args.dataset_format, dry_run=args.dry_run,
+                          store_path=None if args.no_store else args.store_path, store_s3_key=args.store_s3_key)
+    metrics.finish_run(None if args.no_upload or args.dry_run else get_bucket_name(), args.metrics_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Registry of every category the engine scrapes.
+# Adding a category is a new entry here; unset keys fall back to DEFAULTS.
+
+# Root of the typed, Hive-partitioned (category=/date=) dataset written next to the legacy files
+DATASET_PREFIX = "reddit_news_dataset"
+
+DEFAULTS = {
+    "limit": 5,
+    "max_posts": None,
+    "format": "csv",
+    "fields": ["title", "url", "permalink", "score", "subreddit"],
+    "permalink_host": "https://reddit.com",
+    "timestamped": False,
+}
+
+CATEGORIES = {
+    "news_headlines": {
+        "subreddits": ["news", "worldnews"],
+        "s3_prefix": "reddit_news_headlines",
+        "filename_prefix": "reddit_news_headlines",
+    },
+    "entertainment_news": {
+        "subreddits": ["entertainment", "movies", "television"],
+        "s3_prefix": "reddit_entertainment_news",
+        "filename_prefix": "reddit_entertainment_news",
+    },
+    "music_news": {
+        "subreddits": ["musicnews", "Music"],
+        "s3_prefix": "reddit_music_news",
+        "filename_prefix": "reddit_music_news",
+    },
+    "sports_news": {
+        "subreddits": ["sports", "sportsnewstoday"],
+        "s3_prefix": "reddit_sports_news",
+        "filename_prefix": "reddit_sports_news",
+    },
+    "gamer_news": {
+        "subreddits": ["gamernews"],
+        "s3_prefix": "reddit_gamer_news",
+        "filename_prefix": "reddit_gamer_news",
+    },
+    "weird_news": {
+        "subreddits": ["weirdnews", "nottheonion"],
+        "s3_prefix": "reddit_weird_news",
+        "filename_prefix": "reddit_weird_news",
+        # Full timestamp so each run creates a unique file
+        "timestamped": True,
+    },
+    "fantasy_baseball_news": {
+        "subreddits": ["fantasybaseball"],
+        "limit": 15,
+        "max_posts": 10,
+        "s3_prefix": "reddit_fantasy_baseball",
+        "filename_prefix": "reddit_fantasybaseball_articles",
+        "format": "json",
+        "fields": ["title", "score", "url", "permalink"],
+        "permalink_host": "https://www.reddit.com",
+    },
+}
+
+def get_category(name):
+    """Returns the full config for a category, with defaults applied."""
+    if name not in CATEGORIES:
+        raise ValueError(f"Unknown category: {name} (expected one of {', '.join(CATEGORIES)})")
+    config = dict(DEFAULTS)
+    config.update(CATEGORIES[name])
+    config["name"] = name
+    return config
@@ -0,0 +1,252 @@
+import argparse
+import codecs
+import csv
+import gzip
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+
+from reddit_news.categories import CATEGORIES, get_category
+from shared import metrics
+from shared.s3_index import KEY_DATE, update_index
+from shared.s3_utils import decoding_stream, get_bucket_name, get_s3_client, upload_stream
+from shared.writers import get_writer
+
+ROLLUP_DIR = "_rollups"
+MANIFEST_NAME = "manifest.json"
+PERIODS = {"day": 10, "month": 7}  # length of the YYYY-MM-DD prefix that identifies a period
+# Daily rollups name their day in the key: <prefix>/_rollups/day/<YYYY-MM-DD>/rollup-<fp>.jsonl.gz
+ROLLUP_DAY = re.compile(rf"/{ROLLUP_DIR}/day/(\d{{4}}-\d{{2}}-\d{{2}})/")
+
+def manifest_key(prefix, period):
+    return f"{prefix}/{ROLLUP_DIR}/{period}/{MANIFEST_NAME}"
+
+def load_manifest(s3, bucket_name, prefix, period):
+    """Returns the day or month compaction manifest for a prefix, or an empty one."""
+    try:
+        body = s3.get_object(Bucket=bucket_name, Key=manifest_key(prefix, period))["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return {"rollups": {}}
+    return json.loads(body)
+
+def save_manifest(s3, bucket_name, prefix, period, manifest):
+    """Replaces the manifest with one PUT, which is what makes a compaction visible."""
+    manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+    s3.put_object(Bucket=bucket_name, Key=manifest_key(prefix, period),
+                  Body=json.dumps(manifest, indent=2).encode("utf-8"), ContentType="application/json")
+
+def source_day(key):
+    """The day a source covers: a per-run output's date, or a daily rollup's day, or None."""
+    match = KEY_DATE.search(key) or ROLLUP_DAY.search(key)
+    return match.group(1) if match else None
+
+def rollup_days(rollup):
+    """
+    Every day a manifest entry holds rows for. Entries written before "days"
+    was recorded fall back to their sources' dates.
+    """
+    if "days" in rollup:
+        return rollup["days"]
+    return sorted({day for day in map(source_day, rollup["sources"]) if day})
+
+def list_sources(s3, bucket_name, prefix, period):
+    """Groups the per-run objects under a prefix by day or month, skipping the rollups themselves."""
+    groups = {}
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/"):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.startswith(f"{prefix}/{ROLLUP_DIR}/"):
+                continue
+            match = KEY_DATE.search(key)
+            if match:
+                groups.setdefault(match.group(1)[:PERIODS[period]], []).append({"key": key, "etag": obj["ETag"]})
+    return groups
+
+def iter_rows(s3, bucket_name, key):
+    """Streams the rows of one source object (CSV, JSON array or a previous .jsonl.gz rollup)."""
+    response = s3.get_object(Bucket=bucket_name, Key=key)
+    body = response["Body"]
+    if key.endswith(".jsonl.gz"):
+        with gzip.GzipFile(fileobj=body) as file:
+            for line in file:
+                yield json.loads(line)
+        return
+    # Runs uploaded with --compress keep their names but carry a Content-Encoding
+    body = decoding_stream(body, response.get("ContentEncoding"))
+    if key.endswith(".json"):
+        # Daily JSON files are small arrays; only one is held at a time
+        yield from json.load(body)
+    else:
+        reader = csv.DictReader(codecs.getreader("utf-8")(body))
+        for row in reader:
+            if str(row.get("score", "")).lstrip("-").isdigit():
+                row["score"] = int(row["score"])
+            yield row
+
+def row_key(row):
+    """Identity of a row for dedup: its permalink, or the whole row if it has none."""
+    identity = row.get("permalink") or json.dumps(row, sort_keys=True)
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=8).digest()
+
+def fingerprint(sources):
+    digest = hashlib.sha256()
+    for source in sorted(sources, key=lambda source: source["key"]):
+        digest.update(f"{source['key']}|{source['etag']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def compact_period(s3, bucket_name, prefix, period, period_id, sources):
+    """
+    Streams every source of one period, in the given order, into a gzipped
+    NDJSON rollup and uploads it under a key derived from the sources'
+    fingerprint; the first copy of a row wins. Each row gets a "day" field
+    from its source's key, so a month rollup still tells its days apart. Rows are never all held in
+    memory: they are serialized, compressed and sent as multipart parts as
+    they are read, and only an 8-byte hash per row is kept for dedup.
+    Returns the rollup's manifest entry.
+    """
+    seen = set()
+    counts = {"rows": 0, "duplicates": 0}
+
+    def unique_rows():
+        for source in sources:
+            day = source_day(source["key"])
+            for row in iter_rows(s3, bucket_name, source["key"]):
+                if day and "day" not in row:
+                    row["day"] = day
+                key = row_key(row)
+                if key in seen:
+                    counts["duplicates"] += 1
+                    continue
+                seen.add(key)
+                counts["rows"] += 1
+                yield row
+
+    fp = fingerprint(sources)
+    rollup_key = f"{prefix}/{ROLLUP_DIR}/{period}/{period_id}/rollup-{fp[:16]}.jsonl.gz"
+    upload_stream(get_writer("ndjson").stream(unique_rows(), None), bucket_name, rollup_key,
+                  content_type="application/x-ndjson", compression="gzip", s3=s3)
+    rows, duplicates = counts["rows"], counts["duplicates"]
+    metrics.count("rows_compacted", rows)
+    metrics.count("duplicates_dropped", duplicates)
+    print(f"🗜️ {prefix} {period_id}: {len(sources)} objects → {rows} rows ({duplicates} duplicates dropped) in {rollup_key}")
+    return {
+        "key": rollup_key,
+        "fingerprint": fp,
+        "sources": [source["key"] for source in sources],
+        # Compared on the next run, so a source re-uploaded under the same key is compacted again
+        "etags": {source["key"]: source["etag"] for source in sources},
+        "days": sorted({day for day in map(source_day, (source["key"] for source in sources)) if day}),
+        "rows": rows,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def compact_prefix(prefix, period="day", bucket_name=None, include_current=False, delete_sources=False, s3=None):
+    """
+    Compacts every complete day/month under a prefix into one rollup each.
+
+    The manifest at <prefix>/_rollups/<period>/manifest.json is the source of
+    truth: it is rewritten with a single PUT after the new rollups are
+    uploaded, so readers switch over atomically. Periods whose sources haven't
+    changed (same keys and ETags) are skipped, so re-running is a no-op. When
+    files are added or re-uploaded, a period whose compacted sources are all
+    still there is compacted again from them; otherwise the previous rollup is
+    folded in after the changed files, so their rows win. Monthly compaction
+    also folds in that month's daily rollups. With delete_sources the compacted
+    objects (and folded daily rollups) are removed only after the manifest
+    lists them. Readers should prefer a month rollup over the day rollups of
+    the same month.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period} (expected one of {', '.join(PERIODS)})")
+    s3 = s3 or get_s3_client()
+    bucket_name = bucket_name or get_bucket_name()
+    prefix = prefix.rstrip("/")
+
+    manifest = load_manifest(s3, bucket_name, prefix, period)
+    rollups = manifest["rollups"]
+    current = datetime.now(timezone.utc).strftime("%Y-%m-%d")[:PERIODS[period]]
+    groups = list_sources(s3, bucket_name, prefix, period)
+    deletable = {source["key"] for sources in groups.values() for source in sources}
+
+    day_manifest = None
+    if period == "month":
+        day_manifest = load_manifest(s3, bucket_name, prefix, "day")
+        for day, rollup in day_manifest["rollups"].items():
+            # A rollup's key already encodes its fingerprint, which stands in for an ETag
+            groups.setdefault(day[:PERIODS["month"]], []).append({"key": rollup["key"], "etag": rollup["fingerprint"]})
+            deletable.add(rollup["key"])
+
+    replaced = []
+    for period_id, sources in sorted(groups.items()):
+        if period_id >= current and not include_current:
+            continue
+        sources = sorted(sources, key=lambda source: source["key"])
+        previous = rollups.get(period_id)
+        if not previous:
+            rollups[period_id] = compact_period(s3, bucket_name, prefix, period, period_id, sources)
+            continue
+        # Entries written before "etags" was recorded can only tell new keys apart
+        etags = previous.get("etags", {})
+        changed = [source for source in sources if source["key"] not in previous["sources"]
+                   or etags.get(source["key"], source["etag"]) != source["etag"]]
+        if not changed:
+            continue  # already compacted
+        if set(previous["sources"]) <= {source["key"] for source in sources}:
+            rollups[period_id] = compact_period(s3, bucket_name, prefix, period, period_id, sources)
+        else:
+            # Some compacted sources are gone (--delete-sources): only the previous rollup still has their rows
+            etag = s3.head_object(Bucket=bucket_name, Key=previous["key"])["ETag"]
+            entry = compact_period(s3, bucket_name, prefix, period, period_id,
+                                   changed + [{"key": previous["key"], "etag": etag}])
+            entry["sources"] = previous["sources"] + [source["key"] for source in changed
+                                                      if source["key"] not in previous["sources"]]
+            entry["etags"] = dict(etags, **{source["key"]: source["etag"] for source in changed})
+            # The folded-in previous rollup's key names no day; its own entry knows which it held
+            entry["days"] = sorted(set(entry["days"]) | set(rollup_days(previous)))
+            rollups[period_id] = entry
+        replaced.append(previous["key"])
+
+    save_manifest(s3, bucket_name, prefix, period, manifest)
+
+    obsolete = [key for key in replaced if key not in {rollup["key"] for rollup in rollups.values()}]
+    if delete_sources:
+        compacted = {key for rollup in rollups.values() for key in rollup["sources"]}
+        obsolete += sorted(deletable & compacted)
+        if day_manifest:
+            day_manifest["rollups"] = {day: rollup for day, rollup in day_manifest["rollups"].items()
+                                       if rollup["key"] not in compacted}
+            save_manifest(s3, bucket_name, prefix, "day", day_manifest)
+    if obsolete:
+        # Readers resolving through the prefix index must stop seeing deleted objects first
+        update_index(s3, bucket_name, prefix, remove=obsolete)
+    for start in range(0, len(obsolete), 1000):
+        s3.delete_objects(Bucket=bucket_name,
+                          Delete={"Objects": [{"Key": key} for key in obsolete[start:start + 1000]]})
+    print(f"✅ {prefix}: {len(rollups)} rollups in manifest, {len(obsolete)} objects removed")
+    return manifest
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog or "python -m reddit_news.compaction",
+                                     description="Merge small per-run S3 objects into daily or monthly rollups.")
+    parser.add_argument("prefixes", nargs="+", metavar="prefix",
+                        help="S3 prefixes (e.g. reddit_weird_news) or category names to compact")
+    parser.add_argument("--period", choices=PERIODS, default="day")
+    parser.add_argument("--include-current", action="store_true", help="also compact the still-open day/month")
+    parser.add_argument("--delete-sources", action="store_true",
+                        help="delete per-run objects once their rollup is in the manifest")
+    parser.add_argument("--metrics-path", help="also write the run's stage timings as a Prometheus textfile")
+    args = parser.parse_args(argv)
+
+    metrics.start_run("compaction")
+    for prefix in args.prefixes:
+        if prefix in CATEGORIES:
+            prefix = get_category(prefix)["s3_prefix"]
+        with metrics.span("compact"):
+            compact_prefix(prefix, period=args.period, include_current=args.include_current,
+                           delete_sources=args.delete_sources)
+    metrics.finish_run(get_bucket_name(), args.metrics_path)
+
+if __name__ == "__main__":
+    main()
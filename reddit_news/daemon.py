@@ -0,0 +1,240 @@
+import argparse
+import os
+import signal
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from reddit_news.categories import CATEGORIES, get_category
+from reddit_news.engine import build_filename, build_record, fetch_new_since
+from shared import metrics
+from shared.writers import get_writer
+from shared.post_store import DEFAULT_STORE_PATH, PostStore
+from shared.rate_limiter import is_retryable
+from shared.reddit_http import get_http_client
+from shared.reddit_utils import get_reddit_client
+from shared.s3_utils import COMPRESSIONS, get_bucket_name, get_s3_client, upload_bytes
+from shared.scrape_state import ScrapeState
+
+DEFAULT_STATE_PATH = os.path.join(".cache", "stream_state.json")
+DEFAULT_FLUSH_SECONDS = 300
+DEFAULT_FLUSH_ROWS = 500
+# How many recent fullnames to remember for skipping posts a stream replays
+RECENT_IDS = 10000
+
+class MicroBatch:
+    """
+    Posts buffered for one category until the batch is big or old enough to
+    flush. They are held as slotted Post records, not praw objects, so a large
+    backlog stays small in memory.
+    """
+
+    def __init__(self, category):
+        self.category = category
+        self.rows = []
+        self.started = None
+
+    def add(self, post):
+        if not self.rows:
+            self.started = time.monotonic()
+        self.rows.append(post)
+
+    def is_due(self, max_rows, max_seconds):
+        if not self.rows:
+            return False
+        return len(self.rows) >= max_rows or time.monotonic() - self.started >= max_seconds
+
+    def clear(self):
+        self.rows, self.started = [], None
+
+class StreamDaemon:
+    """
+    Follows the submission stream of every configured subreddit (as one
+    multireddit) and writes posts to S3 in micro-batches per category, flushed
+    by row count or age. The per-subreddit checkpoint only advances after a
+    batch is uploaded. On start the daemon catches up from the checkpoint with
+    new() listings and then skips whatever the stream replays, so restarts
+    leave no gaps and no duplicates. SIGINT/SIGTERM flush and exit cleanly.
+    Every flushed batch is also upserted into the post store at `store_path`
+    (None to skip), mirrored to `store_s3_key` along with the checkpoint.
+    """
+
+    def __init__(self, names=None, output_dir=None, upload=True, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS, state_path=DEFAULT_STATE_PATH, state_s3_key=None,
+                 compression=None, metrics_path=None, store_path=DEFAULT_STORE_PATH, store_s3_key=None):
+        self.categories = [dict(get_category(name), timestamped=True) for name in names or CATEGORIES]
+        self.subreddits = OrderedDict(
+            (sub.lower(), (sub, category)) for category in self.categories for sub in category["subreddits"]
+        )
+        self.batches = {category["name"]: MicroBatch(category) for category in self.categories}
+        self.output_dir = output_dir
+        self.upload = upload
+        self.compression = compression
+        self.metrics_path = metrics_path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.state = ScrapeState(state_path)
+        self.state_s3_key = state_s3_key
+        self.post_store = PostStore(store_path) if store_path else None
+        self.store_s3_key = store_s3_key
+        self.recent = OrderedDict()
+        self.last_filenames = {}
+        self.stopping = False
+        self.bucket_name = get_bucket_name() if upload else None
+
+    def request_stop(self, signum, frame):
+        print(f"🛑 Received signal {signum}, flushing and shutting down...")
+        self.stopping = True
+
+    def is_duplicate(self, post, sub):
+        if post.fullname in self.recent:
+            return True
+        mark = self.state.get_mark(sub)
+        return bool(mark) and (post.fullname == mark["fullname"] or post.created_utc < mark["created_utc"])
+
+    def handle(self, post):
+        # Streamed posts carry a praw Subreddit; caught-up ones are raw API data holding its name
+        entry = self.subreddits.get(getattr(post.subreddit, "display_name", post.subreddit).lower())
+        if entry is None or post.stickied:
+            return
+        sub, category = entry
+        if self.is_duplicate(post, sub):
+            return
+        self.recent[post.fullname] = True
+        if len(self.recent) > RECENT_IDS:
+            self.recent.popitem(last=False)
+        self.batches[category["name"]].add(build_record(post, sub, category))
+
+    def catch_up(self, client):
+        """Reads everything posted since the checkpoint, oldest first, before streaming."""
+        for sub, _ in self.subreddits.values():
+            mark = self.state.get_mark(sub)
+            if mark is None:
+                continue  # first run: the stream's initial backlog bootstraps the checkpoint
+            for post in reversed(fetch_new_since(client, sub, mark, None)):
+                self.handle(post)
+
+    def flush(self, batch):
+        category = batch.category
+        now = datetime.now(timezone.utc)
+        filename = build_filename(category, now)
+        if filename == self.last_filenames.get(category["name"]):
+            time.sleep(1)  # filenames carry seconds; never overwrite the previous batch
+            now = datetime.now(timezone.utc)
+            filename = build_filename(category, now)
+        self.last_filenames[category["name"]] = filename
+
+        writer = get_writer(category["format"])
+        with metrics.span("serialize"):
+            body = writer.serialize(batch.rows, category["fields"])
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, filename), "wb") as file:
+                file.write(body)
+        if self.upload:
+            with metrics.span("upload"):
+                upload_bytes(body, self.bucket_name, f"{category['s3_prefix']}/{filename}",
+                             content_type=writer.content_type,
+                             compression=self.compression if writer.compressible else None, index=True)
+        if self.post_store:
+            with metrics.span("store"):
+                self.post_store.upsert(batch.rows, category["name"], now.strftime("%Y-%m-%d"))
+        metrics.count("posts_published", len(batch.rows))
+        print(f"💾 {category['name']}: flushed {len(batch.rows)} posts to {filename}")
+
+        for post in batch.rows:
+            self.state.set_mark(post.subreddit, post.fullname, post.created_utc)
+        batch.clear()
+        self.checkpoint()
+        if self.metrics_path:
+            metrics.get_metrics().write_prometheus(self.metrics_path)
+
+    def checkpoint(self):
+        if self.state_s3_key and self.upload:
+            self.state.sync_to_s3(get_s3_client(), self.bucket_name, self.state_s3_key)
+        else:
+            self.state.save()
+        if self.post_store and self.store_s3_key and self.upload:
+            self.post_store.sync_to_s3(get_s3_client(), self.bucket_name, self.store_s3_key)
+
+    def flush_due(self, force=False):
+        for batch in self.batches.values():
+            if batch.rows and (force or batch.is_due(self.flush_rows, self.flush_seconds)):
+                self.flush(batch)
+
+    def run(self):
+        metrics.start_run("reddit_news_daemon")
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        if self.state_s3_key and self.upload:
+            self.state.sync_from_s3(get_s3_client(), self.bucket_name, self.state_s3_key)
+        if self.post_store and self.store_s3_key and self.upload:
+            self.post_store.sync_from_s3(get_s3_client(), self.bucket_name, self.store_s3_key)
+
+        self.catch_up(get_http_client())
+        reddit = get_reddit_client()
+        multireddit = "+".join(sub for sub, _ in self.subreddits.values())
+        print(f"📡 Streaming r/{multireddit}")
+
+        delay = 1
+        while not self.stopping:
+            try:
+                # pause_after=0 yields None whenever a poll finds nothing new, so flushes and
+                # shutdown requests are handled even when the stream is quiet
+                for post in reddit.subreddit(multireddit).stream.submissions(pause_after=0):
+                    if post is not None:
+                        metrics.count("posts_fetched")
+                        self.handle(post)
+                    self.flush_due()
+                    delay = 1
+                    if self.stopping:
+                        break
+            except Exception as e:
+                if not is_retryable(e):
+                    self.flush_due(force=True)
+                    raise
+                print(f"⏳ Stream interrupted ({e}), reconnecting in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+
+        self.flush_due(force=True)
+        if self.post_store:
+            self.post_store.close()
+        metrics.finish_run(self.bucket_name, self.metrics_path)
+        print("👋 Stream daemon stopped")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m reddit_news.daemon",
+                                     description="Stream new posts of every category to S3 in micro-batches.")
+    parser.add_argument("categories", nargs="*", metavar="category",
+                        help=f"categories to stream (default: all of {', '.join(CATEGORIES)})")
+    parser.add_argument("--flush-rows", type=int, default=DEFAULT_FLUSH_ROWS,
+                        help=f"flush a category once it has this many posts (default: {DEFAULT_FLUSH_ROWS})")
+    parser.add_argument("--flush-seconds", type=float, default=DEFAULT_FLUSH_SECONDS,
+                        help=f"flush a category this long after its first buffered post (default: {DEFAULT_FLUSH_SECONDS})")
+    parser.add_argument("--output-dir", help="also keep a local copy of every batch in this directory")
+    parser.add_argument("--no-upload", action="store_true", help="write files locally without uploading to S3")
+    parser.add_argument("--state-path", default=DEFAULT_STATE_PATH,
+                        help=f"checkpoint file (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--state-s3-key", help="mirror the checkpoint to this S3 key after every flush")
+    parser.add_argument("--compress", choices=COMPRESSIONS,
+                        help="upload batches compressed, with a matching Content-Encoding")
+    parser.add_argument("--metrics-path", help="rewrite this Prometheus textfile with the stage timings after every flush")
+    parser.add_argument("--no-store", action="store_true", help="don't record flushed posts in the post store")
+    parser.add_argument("--store-path", default=DEFAULT_STORE_PATH,
+                        help=f"post store file (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--store-s3-key", help="mirror the post store to this S3 key after every flush")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.categories if name not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(unknown)}")
+
+    StreamDaemon(args.categories or None, output_dir=args.output_dir, upload=not args.no_upload,
+                 flush_rows=args.flush_rows, flush_seconds=args.flush_seconds,
+                 state_path=args.state_path, state_s3_key=args.state_s3_key,
+                 compression=args.compress, metrics_path=args.metrics_path,
+                 store_path=None if args.no_store else args.store_path, store_s3_key=args.store_s3_key).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from reddit_news.categories import CATEGORIES, DATASET_PREFIX, get_category
+from shared import metrics
+from shared.comments import COMMENTS_DIR, DEFAULT_DEPTH as DEFAULT_COMMENT_DEPTH, DEFAULT_REPLACE_MORE
+from shared.comments import DEFAULT_TIME_LIMIT as DEFAULT_COMMENT_TIME_LIMIT
+from shared.comments import DEFAULT_WORKERS as DEFAULT_COMMENT_WORKERS, enrich_posts, to_ndjson
+from shared.dedup_index import DEFAULT_INDEX_PATH, DedupIndex
+from shared.listing_cache import DEFAULT_CACHE_DIR, ListingCache
+from shared.near_dedup import collapse_near_duplicates
+from shared.post import Post
+from shared.post_store import DEFAULT_STORE_PATH, PostStore
+from shared.ranking import Ranker, TopK
+from shared.rate_limiter import get_scheduler
+from shared.reddit_http import RedditHttpClient, as_thing, get_http_client
+from shared.reddit_utils import get_async_reddit_client
+from shared.scrape_state import DEFAULT_STATE_PATH, ScrapeState
+from shared.writers import get_dataset_writer, get_writer, partition_key
+from shared.s3_utils import get_bucket_name, get_s3_client, upload_many
+
+FETCH_MODES = ("sync", "async", "http")
+DEFAULT_CONCURRENCY = 8
+# Categories fetched at once; every registry category gets its own worker by default
+DEFAULT_CATEGORY_WORKERS = 8
+# Seconds one category's fetch may take before the run goes on without it
+DEFAULT_CATEGORY_TIMEOUT = 180
+# Reddit listings end after roughly 1000 items, so never page further than that
+MAX_INCREMENTAL_POSTS = 1000
+INCREMENTAL_FIELDS = ["status", "score_delta"]
+NEAR_DEDUP_FIELDS = ["cluster_size", "sources"]
+
+class CategoriesFailed(Exception):
+    """Raised by run_all, after everything else was published, when some categories failed or timed out."""
+
+def build_record(post, sub, category):
+    """Builds the output record (a Post) for one listing item."""
+    return Post.from_submission(post, sub, category["permalink_host"])
+
+def select_posts(listing, sub, category):
+    """Turns one subreddit listing into output records, skipping stickied posts."""
+    results = []
+    for post in listing:
+        if post.stickied:
+            continue
+        results.append(build_record(post, sub, category))
+        if category["max_posts"] and len(results) >= category["max_posts"]:
+            break
+    return results
+
+def select_top_posts(listings, category, ranker):
+    """
+    Picks the best posts of a category across all its subreddits. `listings`
+    yields (subreddit, listing) pairs and may be lazy: each listing is ranked
+    as it arrives and only the current top K records are kept, where K is the
+    category's max_posts (or limit). Returns them best first.
+    """
+    top = TopK(category["max_posts"] or category["limit"])
+    for sub, listing in listings:
+        scores = []
+        for post in listing:
+            if post.stickied:
+                continue
+            scores.append(post.score)
+            top.push(post.id, ranker.rank(sub, post), lambda: build_record(post, sub, category))
+        ranker.observe(sub, scores)
+    return top.items()
+
+def fetch_listing(client, sub, limit):
+    """
+    Fetches one hot listing through the client's rate-limit scheduler; with a
+    ListingCache on the client it is revalidated instead of refetched.
+    """
+    return [as_thing(data) for data in client.get_listing(sub, "hot", limit)]
+
+def fetch_posts(client, category, ranker=None):
+    """
+    Fetches the hot, non-stickied posts for every subreddit in a category, one
+    listing at a time. With a ranker the category's best posts overall are
+    returned instead of every subreddit's top `limit`.
+    """
+    listings = ((sub, fetch_listing(client, sub, category["limit"])) for sub in category["subreddits"])
+    if ranker:
+        return select_top_posts(listings, category, ranker)
+    results = []
+    for sub, listing in listings:
+        results.extend(select_posts(listing, sub, category))
+    return results
+
+def fetch_new_since(client, sub, mark, limit):
+    """
+    Pages a subreddit's new() listing, newest first, down to the high-water
+    mark. Without a mark (first run) only the newest `limit` posts are taken.
+    """
+    posts = []
+    for data in client.iter_listing(sub, "new", None if mark else limit):
+        post = as_thing(data)
+        if mark and (post.fullname == mark["fullname"] or post.created_utc < mark["created_utc"]):
+            break
+        posts.append(post)
+        if len(posts) >= MAX_INCREMENTAL_POSTS:
+            break
+    return posts
+
+def fetch_posts_incremental(client, category, state):
+    """
+    Returns the posts submitted since the last run (status "new") plus score
+    changes of posts emitted by earlier runs (status "updated"), and advances
+    the category's high-water marks in `state`.
+    """
+    results = []
+
+    tracked = state.tracked_in(category["subreddits"])
+    for post in map(as_thing, client.get_info(tracked) if tracked else []):
+        previous = state.tracked[post.fullname]
+        delta = post.score - previous["score"]
+        if delta:
+            results.append(replace(build_record(post, previous["subreddit"], category),
+                                   status="updated", score_delta=delta))
+            previous["score"] = post.score
+
+    for sub in category["subreddits"]:
+        listing = fetch_new_since(client, sub, state.get_mark(sub), category["limit"])
+        for post in listing:
+            state.set_mark(sub, post.fullname, post.created_utc)
+            if post.stickied:
+                continue
+            results.append(replace(build_record(post, sub, category), status="new", score_delta=post.score))
+            state.track(post.fullname, sub, post.score, post.created_utc)
+    return results
+
+async def fetch_all_posts_async(categories, concurrency=DEFAULT_CONCURRENCY, scheduler=None, ranker=None,
+                                timeout=DEFAULT_CATEGORY_TIMEOUT):
+    """
+    Fetches every subreddit listing of every category concurrently, with at most
+    `concurrency` requests in flight. Results are merged in registry and subreddit
+    order, so they match what fetch_posts returns for each category. A category
+    whose listings fail or take more than `timeout` seconds is left out; returns
+    (posts by category, results by category) like fetch_categories.
+    """
+    import asyncio
+
+    scheduler = scheduler or get_scheduler()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request_listing(reddit, sub, limit):
+        subreddit = await reddit.subreddit(sub)
+        return [post async for post in subreddit.hot(limit=limit)]
+
+    async def fetch_listing_async(reddit, sub, limit):
+        async with semaphore:
+            listing = await scheduler.call_async(request_listing, reddit, sub, limit)
+            scheduler.update_from_limits(reddit.auth.limits)
+            return listing
+
+    async def fetch_category_async(reddit, category):
+        started = time.monotonic()
+        try:
+            listings = await asyncio.wait_for(asyncio.gather(
+                *(fetch_listing_async(reddit, sub, category["limit"]) for sub in category["subreddits"])), timeout)
+        except asyncio.TimeoutError:
+            return None, category_result("timeout", started, error=f"no listings after {timeout}s")
+        except Exception as e:
+            return None, category_result("failed", started, error=e)
+        finally:
+            metrics.observe("category", time.monotonic() - started)
+        return list(zip(category["subreddits"], listings)), category_result("ok", started)
+
+    async with get_async_reddit_client() as reddit:
+        fetches = await asyncio.gather(*(fetch_category_async(reddit, category) for category in categories))
+
+    fetched = {}
+    results = {}
+    for category, (listings, result) in zip(categories, fetches):
+        results[category["name"]] = result
+        if listings is None:
+            continue
+        if ranker:
+            fetched[category["name"]] = select_top_posts(listings, category, ranker)
+        else:
+            fetched[category["name"]] = [record for sub, listing in listings
+                                         for record in select_posts(listing, sub, category)]
+        result["posts"] = len(fetched[category["name"]])
+    return fetched, results
+
+def category_result(status, started, posts=0, error=None):
+    result = {"status": status, "seconds": round(time.monotonic() - started, 3), "posts": posts}
+    if error is not None:
+        result["error"] = str(error) or type(error).__name__
+    return result
+
+def fetch_categories(categories, fetch, workers=DEFAULT_CATEGORY_WORKERS, timeout=DEFAULT_CATEGORY_TIMEOUT):
+    """
+    Calls fetch(category) for every category on `workers` threads, so their
+    requests overlap instead of running back to back; `fetch` must be
+    thread-safe, as RedditHttpClient is. With enough workers a run takes
+    about as long as its slowest category, unless the shared rate budget is
+    the tighter bound. A category that raises, or is still running `timeout`
+    seconds after its worker picked it up, is left out instead of failing
+    the run. Returns ({name: posts}
+    for the categories that finished, {name: result} with each one's status,
+    seconds, post count and error).
+    """
+    jobs = queue.Queue()
+    for category in categories:
+        jobs.put(category)
+    finished = queue.Queue()
+    started = {}
+
+    def work():
+        while True:
+            try:
+                category = jobs.get_nowait()
+            except queue.Empty:
+                return
+            started[category["name"]] = time.monotonic()
+            try:
+                with metrics.span("category"):
+                    finished.put((category["name"], fetch(category), None))
+            except Exception as e:
+                finished.put((category["name"], None, e))
+
+    # Daemon threads: a fetch given up on keeps going until its request returns, but can't hold up the exit
+    for _ in range(max(1, min(workers, len(categories)))):
+        threading.Thread(target=work, daemon=True).start()
+
+    fetched = {}
+    results = {}
+    remaining = [category["name"] for category in categories]
+    while remaining:
+        now = time.monotonic()
+        # Queued categories' clocks haven't started yet; check back on them soon
+        deadline = min((started[name] + timeout for name in remaining if name in started), default=now + 1)
+        try:
+            name, posts, error = finished.get(timeout=max(0.0, deadline - now))
+        except queue.Empty:
+            name = None
+        if name in remaining:
+            remaining.remove(name)
+            if error is None:
+                fetched[name] = posts
+                results[name] = category_result("ok", started[name], len(posts))
+            else:
+                results[name] = category_result("failed", started[name], error=error)
+                print(f"❌ {name}: {results[name]['error']}")
+        now = time.monotonic()
+        for name in [name for name in remaining if name in started and now - started[name] >= timeout]:
+            remaining.remove(name)
+            results[name] = category_result("timeout", started[name], error=f"still fetching after {timeout}s")
+            print(f"⌛ {name}: gave up after {timeout}s")
+    return fetched, {category["name"]: results[category["name"]] for category in categories}
+
+def print_summary(results, seconds):
+    """Prints one line per category: status, post count and fetch time."""
+    failed = [name for name, result in results.items() if result["status"] != "ok"]
+    print(f"📋 Categories: {len(results) - len(failed)} ok, {len(failed)} failed, fetched in {seconds:.1f}s")
+    for name, result in results.items():
+        icon = "✅" if result["status"] == "ok" else "❌"
+        detail = f"{result['posts']} posts" if result["status"] == "ok" else f"{result['status']}: {result['error']}"
+        print(f"  {icon} {name}: {detail} ({result['seconds']:.1f}s)")
+
+def build_filename(category, now):
+    """Builds the output filename, e.g. reddit_music_news_2025-07-16.csv"""
+    stamp = now.strftime("%Y-%m-%d_%H-%M-%S" if category["timestamped"] else "%Y-%m-%d")
+    return f"{category['filename_prefix']}_{stamp}.{category['format']}"
+
+def save_posts(posts, path, category):
+    """Writes posts in the category's output format, keeping only its fields."""
+    get_writer(category["format"]).write(posts, category["fields"], path)
+
+@metrics.timed("serialize")
+def render_outputs(category, posts, now, dataset_formats=(), compression=None, threads=None):
+    """
+    Serializes one category's posts in memory: its legacy file plus one
+    partition of the typed, category=/date= partitioned dataset per requested
+    columnar format, and the posts' comment threads (from enrich_posts) as
+    gzipped NDJSON under COMMENTS_DIR. Returns upload dicts for
+    shared.s3_utils.upload_many.
+    """
+    writer = get_writer(category["format"])
+    filename = build_filename(category, now)
+    outputs = [{
+        "key": f"{category['s3_prefix']}/{filename}",
+        "path": filename,
+        "body": writer.serialize(posts, category["fields"]),
+        "content_type": writer.content_type,
+        "compression": compression if writer.compressible else None,
+    }]
+
+    rows = [replace(post, scraped_at=now) for post in posts] if dataset_formats else []
+    for fmt in dataset_formats:
+        writer = get_dataset_writer(fmt)
+        part = f"part-{now.strftime('%Y-%m-%dT%H-%M-%S')}.{writer.extension}"
+        key = partition_key(f"{DATASET_PREFIX}/{fmt}", category["name"], now.strftime("%Y-%m-%d"), part)
+        outputs.append({
+            "key": key,
+            "path": key,
+            "body": writer.serialize(rows, None),
+            "content_type": writer.content_type,
+        })
+
+    comments = to_ndjson(posts, threads) if threads else b""
+    if comments:
+        path = f"{COMMENTS_DIR}/{os.path.splitext(filename)[0]}.jsonl"
+        outputs.append({
+            "key": f"{category['s3_prefix']}/{path}",
+            "path": path,
+            "body": comments,
+            "content_type": "application/x-ndjson",
+            "compression": "gzip",
+        })
+    return outputs
+
+def save_outputs(outputs, output_dir):
+    """Keeps local copies of rendered outputs (uncompressed) under output_dir."""
+    for output in outputs:
+        path = os.path.join(output_dir, output["path"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(output["body"])
+
+def publish_posts(category, posts, now, dataset_formats=(), compression=None, threads=None):
+    """Prints a category's posts and renders its outputs."""
+    for post in posts:
+        print(f"[{post.subreddit}] {post.title} ({post.score} points)")
+        print(f"Link: {post.permalink}\n")
+
+    outputs = render_outputs(category, posts, now, dataset_formats, compression, threads)
+    print(f"💾 {category['name']}: rendered {len(posts)} posts into {len(outputs)} outputs")
+    return outputs
+
+def run_all(names=None, output_dir=None, upload=True, fetch_mode="sync", concurrency=DEFAULT_CONCURRENCY,
+            cache_dir=DEFAULT_CACHE_DIR, cache_s3_prefix=None,
+            dedup=True, dedup_path=DEFAULT_INDEX_PATH, dedup_s3_key=None,
+            incremental=False, state_path=DEFAULT_STATE_PATH, state_s3_key=None, dataset_formats=(),
+            compression=None, near_dedup=False, rank=False,
+            store=True, store_path=DEFAULT_STORE_PATH, store_s3_key=None, metrics_path=None,
+            comments=0, comment_depth=DEFAULT_COMMENT_DEPTH, replace_more=DEFAULT_REPLACE_MORE,
+            comment_workers=DEFAULT_COMMENT_WORKERS, comment_time_limit=DEFAULT_COMMENT_TIME_LIMIT,
+            category_workers=DEFAULT_CATEGORY_WORKERS, category_timeout=DEFAULT_CATEGORY_TIMEOUT):
+    """
+    Runs every requested category (all of them by default) in this process,
+    sharing one Reddit session, one rate budget and one S3 client.
+    Categories are fetched concurrently, `category_workers` at a time
+    (fetch_categories), over the thread-safe RedditHttpClient, so their
+    requests overlap; rank/incremental state is kept per category and
+    merged back once the fetch is done. One that fails or runs past
+    `category_timeout` seconds is left out and the rest are still
+    published; run_all then raises CategoriesFailed. With fetch_mode="async" all listings are
+    requested up front on one event loop instead; with fetch_mode="http"
+    they are revalidated against the on-disk listing cache, which is
+    mirrored to `cache_s3_prefix` when one is given.
+
+    Dedup, near-dedup and the post store run afterwards on the calling
+    thread, in registry order, so their SQLite connections never cross
+    threads and which category keeps a shared story doesn't depend on
+    which fetch finished first.
+
+    Unless dedup is off, posts already published (by ID or normalized URL) in
+    this run, another category or a recent run are dropped before writing; the
+    index is mirrored to `dedup_s3_key` when one is given. With near_dedup the
+    remaining posts of each category are also clustered by title similarity
+    (MinHash/LSH), and each cluster is written as one post with the cluster's
+    total score, its size and the permalinks of every member.
+
+    With incremental=True (sync fetch only) each subreddit is read from its
+    high-water mark in the scrape state, and the output files, always
+    timestamped, hold only new posts plus score changes of tracked ones.
+
+    With rank=True (not incremental) each category's `limit` means its best
+    posts overall: scores are normalized per subreddit and decayed by age
+    (shared/ranking.py), and the subreddits' typical scores are kept in the
+    scrape state between runs.
+
+    Every format in `dataset_formats` (parquet, arrow) also gets a partition
+    under DATASET_PREFIX/<format>/category=<name>/date=<day>/.
+
+    Outputs are rendered in memory and uploaded in parallel over the shared S3
+    connection pool, optionally gzip/zstd compressed; they only touch disk
+    when `output_dir` asks for local copies.
+
+    With comments=N the top N comments of every newly published post are
+    fetched (shared/comments.py), with replies down to `comment_depth` levels
+    and at most `replace_more` "load more" expansions per post, on
+    `comment_workers` threads under the run's rate budget. The stage gives up
+    after `comment_time_limit` seconds, so it can't hold up the run; threads
+    are written as gzipped NDJSON next to each category's output.
+
+    Unless store is off, every published post is also upserted into the
+    post store (shared/post_store.py), mirrored to `store_s3_key` when one
+    is given.
+
+    Stage timings and counts (shared/metrics.py) go to a JSON run report
+    under _run_reports/reddit_news/ when uploading, and to a Prometheus
+    textfile at `metrics_path` when one is given.
+    """
+    if fetch_mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {fetch_mode} (expected one of {', '.join(FETCH_MODES)})")
+    if incremental and fetch_mode != "sync":
+        raise ValueError("Incremental mode only supports the sync fetch mode")
+    if incremental and rank:
+        raise ValueError("Incremental mode emits every new post, so it can't be ranked")
+    for fmt in dataset_formats:
+        get_dataset_writer(fmt)
+    names = names or list(CATEGORIES)
+    categories = [get_category(name) for name in names]  # fail fast on typos
+    metrics.start_run("reddit_news")
+    if incremental:
+        categories = [dict(category, fields=category["fields"] + INCREMENTAL_FIELDS, timestamped=True)
+                      for category in categories]
+    if near_dedup:
+        categories = [dict(category, fields=category["fields"] + NEAR_DEDUP_FIELDS) for category in categories]
+
+    bucket_name = None
+    if upload:
+        bucket_name = get_bucket_name()
+        get_s3_client()
+    now = datetime.now(timezone.utc)
+
+    scheduler = get_scheduler()
+    state = ranker = None
+    if incremental or rank:
+        state = ScrapeState(state_path)
+        if state_s3_key:
+            state.sync_from_s3(get_s3_client(), get_bucket_name(), state_s3_key)
+    if rank:
+        ranker = Ranker(state.scales, now=now.timestamp())
+
+    client = None
+    started = time.monotonic()
+    with metrics.span("fetch"):
+        if fetch_mode == "async":
+            import asyncio
+
+            fetched, results = asyncio.run(fetch_all_posts_async(categories, concurrency, scheduler, ranker,
+                                                                 category_timeout))
+        else:
+            # Worker threads rank into their own copies of the typical scores, merged back below
+            rankers = {category["name"]: ranker.scratch() for category in categories} if ranker else {}
+            if fetch_mode == "http":
+                cache = ListingCache(cache_dir)
+                if cache_s3_prefix:
+                    cache.sync_from_s3(get_s3_client(), get_bucket_name(), cache_s3_prefix)
+                client = RedditHttpClient(cache=cache, scheduler=scheduler)
+            else:
+                # One session and OAuth token for the run; the workers' requests overlap on it
+                client = get_http_client()
+            if incremental:
+                scratches = {category["name"]: state.scratch() for category in categories}
+                fetch = lambda category: fetch_posts_incremental(client, category, scratches[category["name"]])
+            else:
+                fetch = lambda category: fetch_posts(client, category, rankers.get(category["name"]))
+            fetched, results = fetch_categories(categories, fetch, category_workers, category_timeout)
+            # Only categories that finished update the shared state; the others are fetched again next run
+            for category in categories:
+                if category["name"] not in fetched:
+                    continue
+                if incremental:
+                    state.merge(scratches[category["name"]], category["subreddits"])
+                if ranker:
+                    ranker.merge(rankers[category["name"]], category["subreddits"])
+            if fetch_mode == "http":
+                print(f"🗄️ Listing cache: {cache.stats['hits']} revalidated, {cache.stats['misses']} refetched")
+                if cache_s3_prefix and upload:
+                    cache.sync_to_s3(get_s3_client(), bucket_name, cache_s3_prefix)
+                else:
+                    cache.evict()
+    print(f"📡 Reddit: {scheduler.summary()}")
+    print_summary(results, time.monotonic() - started)
+    failed = [name for name, result in results.items() if result["status"] != "ok"]
+    metrics.count("categories_ok", len(results) - len(failed))
+    metrics.count("categories_failed", len(failed))
+    metrics.record("categories", results)
+
+    index = None
+    if dedup:
+        index = DedupIndex(dedup_path)
+        if dedup_s3_key:
+            index.sync_from_s3(get_s3_client(), get_bucket_name(), dedup_s3_key)
+
+    post_store = None
+    if store:
+        post_store = PostStore(store_path)
+        if store_s3_key:
+            post_store.sync_from_s3(get_s3_client(), get_bucket_name(), store_s3_key)
+
+    published = []
+    outputs = []
+    merged = 0
+    for category in categories:
+        if category["name"] not in fetched:
+            continue
+        posts = fetched[category["name"]]
+        metrics.count("posts_fetched", len(posts))
+        with metrics.span("transform"):
+            if index:
+                # Score updates are about posts we already published, so only new posts are deduplicated
+                updates = [post for post in posts if post.get("status") == "updated"]
+                fresh = [post for post in posts if post.get("status") != "updated"]
+                posts = index.filter_new(fresh, source=build_filename(category, now)) + updates
+            if near_dedup:
+                updates = [post for post in posts if post.get("status") == "updated"]
+                fresh = [post for post in posts if post.get("status") != "updated"]
+                clustered = collapse_near_duplicates(fresh)
+                merged += len(fresh) - len(clustered)
+                posts = clustered + updates
+        metrics.count("posts_published", len(posts))
+        published.append((category, posts))
+
+    threads = None
+    if comments:
+        fresh = [post for _, posts in published for post in posts if post.get("status") != "updated"]
+        with metrics.span("enrich"):
+            threads = enrich_posts(fresh, comments, comment_depth, replace_more=replace_more,
+                                   workers=comment_workers, time_limit=comment_time_limit, client=client)
+
+    for category, posts in published:
+        outputs.extend(publish_posts(category, posts, now, dataset_formats, compression, threads))
+        if post_store:
+            with metrics.span("store"):
+                post_store.upsert(posts, category["name"], now.strftime("%Y-%m-%d"))
+
+    if near_dedup:
+        print(f"🧩 Near-duplicates: merged {merged} posts into their clusters")
+    if output_dir:
+        save_outputs(outputs, output_dir)
+        print(f"💾 Saved {len(outputs)} outputs under {output_dir}")
+    if upload:
+        with metrics.span("upload"):
+            sent = upload_many(outputs, bucket_name)
+        print(f"☁️ Uploaded {len(outputs)} outputs ({sent} bytes)")
+
+    if index:
+        print(f"🧹 Dedup: kept {index.stats['kept']} posts, dropped {index.stats['dropped']} duplicates")
+        if dedup_s3_key and upload:
+            index.sync_to_s3(get_s3_client(), bucket_name, dedup_s3_key)
+        else:
+            index.commit()
+        index.close()
+    if state:
+        if state_s3_key and upload:
+            state.sync_to_s3(get_s3_client(), bucket_name, state_s3_key)
+        else:
+            state.save()
+    if post_store:
+        if store_s3_key and upload:
+            post_store.sync_to_s3(get_s3_client(), bucket_name, store_s3_key)
+        post_store.close()
+    metrics.finish_run(bucket_name, metrics_path)
+    if failed:
+        raise CategoriesFailed(f"{len(failed)} of {len(categories)} categories failed: {', '.join(failed)}")
+    return outputs
@@ -0,0 +1,244 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from reddit_news.categories import CATEGORIES, get_category
+from shared import metrics
+from shared.article_cache import DEFAULT_ARTICLE_CACHE_PATH, ArticleCache
+from shared.article_fetcher import ArticleFetcher
+from shared.completion_cache import DEFAULT_CACHE_PATH, CompletionCache, completion_key
+from shared.openai_utils import UsageCounter, get_openai_client
+from shared.rate_limiter import RateLimitScheduler
+from shared.s3_utils import download_latest_file, get_bucket_name, get_s3_client, upload_bytes
+from shared.url_utils import normalize_url
+from shared.writers import get_writer
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_WORKERS = 8
+# Requests per minute; well under the lowest paid tier's limit for the mini models
+DEFAULT_RPM = 500
+BATCH_POLL_SECONDS = 30
+BATCH_DONE = ("completed", "failed", "expired", "cancelled")
+PROMPT_TEMPLATE = (
+    "Rewrite this trending Reddit post as a short, punchy headline for Goatland News. "
+    "Keep it factual, don't add details that aren't in the title, and reply with the headline only.\n\n"
+    "Title: {title}\n"
+    "Link: {url}"
+)
+# Used when articles were fetched; a separate template keeps their completions apart in the cache
+ARTICLE_PROMPT_TEMPLATE = PROMPT_TEMPLATE + "\n\nArticle excerpt:\n{article}"
+ARTICLE_EXCERPT_CHARS = 3000
+
+def build_messages(post, template=PROMPT_TEMPLATE):
+    content = template.format(title=post.get("title", ""), url=post.get("url", ""), article=post.get("article", ""))
+    return [{"role": "user", "content": content}]
+
+def load_posts(path):
+    """Reads a scraped CSV or JSON file back into post dicts."""
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.endswith(".json"):
+            return json.load(file)
+        return list(csv.DictReader(file))
+
+def split_cached(posts, cache, counter, model, template):
+    """
+    Returns each post's cache key, the completions already cached, and the
+    posts still to send (one per key, so duplicates in a file are paid once).
+    """
+    keys = [completion_key(template, model, post.get("title"), post.get("url"), post.get("article"))
+            for post in posts]
+    done, pending = {}, {}
+    for post, key in zip(posts, keys):
+        if key in done or key in pending:
+            continue
+        cached = cache.get(key)
+        if cached is None:
+            pending[key] = post
+        else:
+            done[key] = cached
+            counter.count("cached")
+    return keys, done, pending
+
+def request_completion(client, post, model, template, scheduler):
+    response = scheduler.call(client.chat.completions.create, model=model, messages=build_messages(post, template))
+    return response.choices[0].message.content.strip(), response.model, response.usage
+
+def complete_concurrently(client, pending, cache, counter, model, template, workers, scheduler):
+    """Sends pending posts through a bounded thread pool; results are cached as they arrive."""
+    done = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(request_completion, client, post, model, template, scheduler): key
+                   for key, post in pending.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                text, response_model, usage = future.result()
+            except Exception as e:
+                # Left uncached, so the next run retries just this post
+                print(f"❌ Rewrite failed for {pending[key].get('title')!r}: {e}")
+                counter.count("failed")
+                continue
+            cache.put(key, model, text, usage.prompt_tokens, usage.completion_tokens)
+            counter.add(response_model, usage.prompt_tokens, usage.completion_tokens)
+            done[key] = text
+    return done
+
+def complete_batch(client, pending, cache, counter, model, template, poll_seconds=BATCH_POLL_SECONDS):
+    """
+    Submits pending posts as one Batch API job (half price, results within
+    24h) and waits for it. Meant for offline runs where latency doesn't matter.
+    """
+    lines = [json.dumps({"custom_id": key, "method": "POST", "url": "/v1/chat/completions",
+                         "body": {"model": model, "messages": build_messages(post, template)}})
+             for key, post in pending.items()]
+    batch_input = client.files.create(file=("rewrite_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_input.id, endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+    print(f"📦 Submitted batch {batch.id} with {len(lines)} requests")
+    while batch.status not in BATCH_DONE:
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+        print(f"⏳ Batch {batch.id}: {batch.status}")
+
+    done = {}
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            body = response["body"]
+            text = body["choices"][0]["message"]["content"].strip()
+            usage = body["usage"]
+            cache.put(result["custom_id"], model, text, usage["prompt_tokens"], usage["completion_tokens"])
+            counter.add(body["model"], usage["prompt_tokens"], usage["completion_tokens"], batch=True)
+            done[result["custom_id"]] = text
+    counter.count("failed", len(pending) - len(done))
+    if len(done) < len(pending):
+        print(f"⚠️ Batch {batch.id} ended {batch.status} with {len(pending) - len(done)} requests unanswered")
+    return done
+
+def rewrite_posts(posts, client, cache, counter, model=DEFAULT_MODEL, template=PROMPT_TEMPLATE,
+                  workers=DEFAULT_WORKERS, batch=False, scheduler=None):
+    """
+    Returns the posts with a `rewrite` column. Cached completions are reused;
+    the rest go out concurrently (or as one Batch API job). Posts whose
+    rewrite failed get an empty one and are retried by the next run.
+    """
+    keys, done, pending = split_cached(posts, cache, counter, model, template)
+    if pending:
+        if batch:
+            done.update(complete_batch(client, pending, cache, counter, model, template))
+        else:
+            scheduler = scheduler or RateLimitScheduler(rate=DEFAULT_RPM / 60, burst=workers)
+            done.update(complete_concurrently(client, pending, cache, counter, model, template, workers, scheduler))
+    cache.commit()
+    return [dict(post, rewrite=done.get(key, "")) for post, key in zip(posts, keys)]
+
+def add_articles(posts, fetcher):
+    """Attaches an excerpt of each post's linked article; links that couldn't be read get none."""
+    texts = fetcher.fetch_many([post.get("url") for post in posts])
+    return [dict(post, article=texts.get(normalize_url(post.get("url")), "")[:ARTICLE_EXCERPT_CHARS])
+            for post in posts]
+
+def rewrite_category(name, client, cache, counter, input_path=None, output_dir=None, upload=True,
+                     model=DEFAULT_MODEL, workers=DEFAULT_WORKERS, batch=False, fetcher=None):
+    """
+    Rewrites a category's latest scraped file (or `input_path`) and uploads the
+    result next to it under <s3_prefix>_rewritten/, so compaction of the
+    original prefix never mixes the two.
+    """
+    category = get_category(name)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with metrics.span("fetch"):
+            if not input_path:
+                latest = download_latest_file(get_bucket_name(), category["s3_prefix"], tmp_dir,
+                                              extension=category["format"])
+                input_path = os.path.join(tmp_dir, os.path.basename(latest["key"]))
+            posts = load_posts(input_path)
+    metrics.count("posts_fetched", len(posts))
+
+    template = PROMPT_TEMPLATE
+    if fetcher:
+        with metrics.span("articles"):
+            posts = add_articles(posts, fetcher)
+        template = ARTICLE_PROMPT_TEMPLATE
+    with metrics.span("transform"):
+        rows = rewrite_posts(posts, client, cache, counter, model=model, template=template, workers=workers,
+                             batch=batch)
+    writer = get_writer(category["format"])
+    with metrics.span("serialize"):
+        body = writer.serialize(rows, category["fields"] + ["rewrite"])
+    filename = os.path.basename(input_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, filename), "wb") as file:
+            file.write(body)
+    metrics.count("posts_published", len(rows))
+    if upload:
+        with metrics.span("upload"):
+            upload_bytes(body, get_bucket_name(), f"{category['s3_prefix']}_rewritten/{filename}",
+                         content_type=writer.content_type, index=True)
+    print(f"✍️ {name}: rewrote {len(rows)} posts")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m reddit_news.rewrite",
+                                     description="Rewrite scraped posts into Goatland headlines with OpenAI.")
+    parser.add_argument("categories", nargs="+", metavar="category", help=f"one of {', '.join(CATEGORIES)}")
+    parser.add_argument("--input", help="rewrite this local file instead of the category's latest S3 file")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"(default: {DEFAULT_MODEL})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"completion requests in flight (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--batch", action="store_true",
+                        help="submit through the Batch API and wait for it (cheaper, for offline runs)")
+    parser.add_argument("--fetch-articles", action="store_true",
+                        help="fetch each linked article and give the model an excerpt of it")
+    parser.add_argument("--article-cache-path", default=DEFAULT_ARTICLE_CACHE_PATH,
+                        help=f"extracted article cache file (default: {DEFAULT_ARTICLE_CACHE_PATH})")
+    parser.add_argument("--output-dir", help="also keep a local copy of every rewritten file in this directory")
+    parser.add_argument("--no-upload", action="store_true", help="don't upload the rewritten files to S3")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help=f"completion cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--cache-s3-key", help="mirror the completion cache to this S3 key between runs")
+    parser.add_argument("--metrics-path", help="also write the run's stage timings as a Prometheus textfile")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.categories if name not in CATEGORIES]
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(unknown)}")
+    if args.input and len(args.categories) > 1:
+        parser.error("--input takes exactly one category")
+
+    metrics.start_run("rewrite")
+    # Retries are done by the scheduler, which honours Retry-After
+    client = get_openai_client(max_retries=0)
+    cache = CompletionCache(args.cache_path)
+    counter = UsageCounter()
+    fetcher = ArticleFetcher(cache=ArticleCache(args.article_cache_path)) if args.fetch_articles else None
+    if args.cache_s3_key:
+        cache.sync_from_s3(get_s3_client(), get_bucket_name(), args.cache_s3_key)
+    try:
+        for name in args.categories:
+            rewrite_category(name, client, cache, counter, input_path=args.input, output_dir=args.output_dir,
+                             upload=not args.no_upload, model=args.model, workers=args.workers, batch=args.batch,
+                             fetcher=fetcher)
+    finally:
+        cache.commit()
+        if args.cache_s3_key:
+            cache.sync_to_s3(get_s3_client(), get_bucket_name(), args.cache_s3_key)
+        cache.close()
+        if fetcher:
+            fetcher.cache.close()
+            print(f"📰 Articles: {fetcher.summary()}")
+        print(f"🤖 OpenAI: {counter.summary()}")
+        for key in ("completions", "cached", "failed", "prompt_tokens", "completion_tokens"):
+            metrics.count(f"openai_{key}", counter.stats[key])
+        metrics.finish_run(None if args.no_upload else get_bucket_name(), args.metrics_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import time
+
+DEFAULT_ARTICLE_CACHE_PATH = os.path.join(".cache", "articles.sqlite3")
+DEFAULT_TTL_DAYS = 7
+# Failed fetches (timeouts, 5xx, robots.txt) are retried sooner than articles are refreshed
+FAILURE_TTL_HOURS = 6
+
+class ArticleCache:
+    """
+    Extracted article text keyed by normalized URL, in a small SQLite file, so
+    a link shared by several posts or categories is fetched once. Failures are
+    cached too (with an empty text and a shorter lifetime), which keeps a dead
+    site from being hammered on every run.
+    """
+
+    def __init__(self, path=DEFAULT_ARTICLE_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 24 * 60 * 60
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "url TEXT PRIMARY KEY, status TEXT NOT NULL, text TEXT NOT NULL, fetched_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def get(self, url):
+        """Returns (status, text) for a fresh entry, or None."""
+        row = self.conn.execute("SELECT status, text, fetched_at FROM articles WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        status, text, fetched_at = row
+        ttl = self.ttl if status == "ok" else FAILURE_TTL_HOURS * 60 * 60
+        return (status, text) if fetched_at >= time.time() - ttl else None
+
+    def put(self, url, status, text=""):
+        self.conn.execute("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?)", (url, status, text, time.time()))
+
+    def expire(self):
+        self.conn.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - self.ttl,))
+
+    def commit(self):
+        self.expire()
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def sync_from_s3(self, s3, bucket_name, key):
+        """Replaces the local cache with the copy in S3, if there is one."""
+        tmp_path = f"{self.path}.download"
+        try:
+            s3.download_file(bucket_name, key, tmp_path)
+        except Exception as e:
+            print(f"⚠️ Article cache: keeping local copy, could not download s3://{bucket_name}/{key}: {e}")
+            return
+        self.conn.close()
+        os.replace(tmp_path, self.path)
+        self._connect()
+        print(f"⬇️ Article cache: restored s3://{bucket_name}/{key}")
+
+    def sync_to_s3(self, s3, bucket_name, key):
+        """Commits, compacts and uploads the cache file."""
+        self.commit()
+        self.conn.execute("VACUUM")
+        s3.upload_file(self.path, bucket_name, key)
+        print(f"☁️ Article cache: saved to s3://{bucket_name}/{key}")
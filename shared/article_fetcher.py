@@ -0,0 +1,206 @@
+import argparse
+import codecs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+from shared.html_text import extract_text
+from shared.url_utils import normalize_url
+
+USER_AGENT = "goatland-news-scrapers/1.0 (+https://github.com/brandoncoates/goatland-news-scrapers)"
+DEFAULT_WORKERS = 32
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+def content_length(headers):
+    """The declared body size, or 0 when it's missing or malformed (the streamed size is checked anyway)."""
+    try:
+        return int(headers.get("Content-Length") or 0)
+    except ValueError:
+        return 0
+
+def known_encoding(encoding):
+    """The page's declared encoding if Python knows it (pages declare things like utf8mb4), else utf-8."""
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return "utf-8"
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched once per run and shared by every worker."""
+
+    def __init__(self, session, user_agent=USER_AGENT, timeout=DEFAULT_TIMEOUT):
+        self.session = session
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.parsers = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _fetch(self, origin):
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout)
+        except requests.RequestException:
+            parser.allow_all = True  # unreachable robots.txt: the article fetch will report the real problem
+            return parser
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        return parser
+
+    def allowed(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self.lock:
+            origin_lock = self.locks.setdefault(origin, threading.Lock())
+        # One fetch per origin even when many workers hit a new site at once
+        with origin_lock:
+            if origin not in self.parsers:
+                self.parsers[origin] = self._fetch(origin)
+        return self.parsers[origin].can_fetch(self.user_agent, url)
+
+class ArticleFetcher:
+    """
+    Fetches linked articles and extracts their text. One pooled session serves
+    every worker thread; each host gets at most `per_host` requests in flight,
+    robots.txt is honoured, and responses are streamed so that slow or huge
+    pages are cut off by `timeout` and `max_bytes` instead of stalling the run.
+    Results are cached by normalized URL when an ArticleCache is given.
+    """
+
+    def __init__(self, cache=None, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 max_bytes=DEFAULT_MAX_BYTES, user_agent=USER_AGENT):
+        self.cache = cache
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host,
+                              max_retries=Retry(total=2, read=0, backoff_factor=0.3,
+                                                status_forcelist=(502, 503, 504)))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml"})
+        self.robots = RobotsCache(self.session, user_agent, timeout)
+        self.host_slots = {}
+        self.lock = threading.Lock()
+        self.stats = {"fetched": 0, "cached": 0, "skipped": 0, "failed": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    def _read_html(self, url):
+        """Returns (status, html); status is "ok" or why the page was skipped."""
+        with self._host_slot(url):
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                if response.status_code >= 400:
+                    return f"http_{response.status_code}", ""
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in HTML_TYPES:
+                    return "not_html", ""
+                if content_length(response.headers) > self.max_bytes:
+                    return "too_large", ""
+                chunks, size = [], 0
+                for chunk in response.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        return "too_large", ""
+                encoding = get_encoding_from_headers(response.headers) or "utf-8"
+        if encoding.lower() == "iso-8859-1" and "charset" not in response.headers.get("Content-Type", "").lower():
+            encoding = "utf-8"  # requests' default for text/*; most pages are really utf-8
+        return "ok", b"".join(chunks).decode(known_encoding(encoding), errors="replace")
+
+    def fetch(self, url):
+        """
+        Returns (status, text) for one article URL, without consulting the
+        cache. Any failure, in the request or in extraction, becomes an
+        error_<type> status, so one bad page can't sink the batch.
+        """
+        if urlsplit(url).scheme not in ("http", "https"):
+            return "unsupported", ""
+        try:
+            if not self.robots.allowed(url):
+                return "disallowed", ""
+            status, html = self._read_html(url)
+            return status, extract_text(html) if status == "ok" else ""
+        except Exception as e:
+            return f"error_{type(e).__name__}", ""
+
+    def fetch_many(self, urls):
+        """
+        Returns {normalized url: text} for every URL, fetching each distinct
+        article at most once; failed fetches map to an empty string.
+        """
+        targets = {}
+        for url in urls:
+            key = normalize_url(url)
+            if key and key not in targets:
+                targets[key] = url
+        results, pending = {}, {}
+        for key, url in targets.items():
+            cached = self.cache.get(key) if self.cache else None
+            if cached is None:
+                pending[key] = url
+            else:
+                results[key] = cached[1]
+                self._count("cached")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.fetch, url): key for key, url in pending.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                status, text = future.result()
+                self._count("fetched" if status == "ok" else "skipped" if status in (
+                    "disallowed", "not_html", "too_large", "unsupported") else "failed")
+                if self.cache:
+                    self.cache.put(key, status, text)
+                results[key] = text
+        if self.cache:
+            self.cache.commit()
+        return results
+
+    def summary(self):
+        stats = self.stats
+        return (f"{stats['fetched']} fetched, {stats['cached']} cached, "
+                f"{stats['skipped']} skipped, {stats['failed']} failed")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.article_fetcher",
+                                     description="Fetch articles and print how much text was extracted from each.")
+    parser.add_argument("urls", nargs="+", metavar="url")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    args = parser.parse_args()
+
+    fetcher = ArticleFetcher(workers=args.workers, per_host=args.per_host)
+    started = time.monotonic()
+    results = fetcher.fetch_many(args.urls)
+    for url, text in results.items():
+        print(f"{len(text):>7} chars  {url}")
+    print(f"📰 Articles: {fetcher.summary()} in {time.monotonic() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
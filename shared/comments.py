@@ -0,0 +1,149 @@
+import json
+import queue
+import threading
+import time
+
+from shared import metrics
+from shared.reddit_http import as_thing, get_http_client
+
+# Comment threads are written next to each output, under <s3_prefix>/_comments/
+COMMENTS_DIR = "_comments"
+DEFAULT_DEPTH = 2
+# Replies kept under each comment below the top level
+DEFAULT_REPLIES = 3
+# "Load more comments" expansions per post; each one is an extra request
+DEFAULT_REPLACE_MORE = 0
+DEFAULT_WORKERS = 8
+# Wall-clock cap for a whole run's enrichment; posts not reached by then go without comments
+DEFAULT_TIME_LIMIT = 120
+MAX_BODY = 500
+MAX_COMMENT_LIMIT = 500
+# Most stub children /api/morechildren expands per request
+MORE_CHILDREN = 100
+
+def tree_size(limit, depth, replies):
+    """Most comments a bounded tree can hold, which is what each post's request asks Reddit for."""
+    return min(MAX_COMMENT_LIMIT, sum(limit * replies ** level for level in range(depth)))
+
+def comment_records(children, parent, limit, depth, replies):
+    """
+    The best `limit` comments under `parent` (a fullname) in the compact
+    nested schema: author, score, body (truncated to MAX_BODY characters)
+    and their best `replies` replies, down to `depth` levels. Empty reply
+    lists are left out.
+    """
+    records = []
+    for comment in sorted(children.get(parent, []), key=lambda comment: -comment.score)[:limit]:
+        record = {
+            "id": comment.id,
+            "author": None if comment.author in (None, "[deleted]") else comment.author,
+            "score": comment.score,
+            "body": comment.body[:MAX_BODY],
+        }
+        if depth > 1:
+            nested = comment_records(children, comment.fullname, replies, depth - 1, replies)
+            if nested:
+                record["replies"] = nested
+        records.append(record)
+    return records
+
+def flatten(things, comments, stubs):
+    """Splits Reddit's nested comment things into flat lists of comments and "load more" stubs."""
+    for thing in things:
+        if thing["kind"] == "more":
+            stubs.append(thing["data"])
+        elif thing["kind"] == "t1":
+            comments.append(as_thing(thing["data"]))
+            if thing["data"].get("replies"):
+                flatten(thing["data"]["replies"]["data"]["children"], comments, stubs)
+
+def fetch_comments(client, post_id, limit, depth=DEFAULT_DEPTH, replies=DEFAULT_REPLIES,
+                   replace_more=DEFAULT_REPLACE_MORE, deadline=None):
+    """
+    Returns the top `limit` comments of a post with up to `depth` levels of
+    replies. Reddit is asked for a top-sorted tree cut to that depth and size
+    in one request. Then at most `replace_more` "load more" stubs are
+    expanded, largest first, one rate-limited request each, stopping early at
+    `deadline`; praw's replace_more() would send them all under one token.
+    "Continue this thread" stubs list no children and are never expanded.
+    """
+    loaded, stubs = [], []
+    flatten(client.get_comments(post_id, sort="top", limit=tree_size(limit, depth, replies), depth=depth),
+            loaded, stubs)
+    stubs = sorted((stub for stub in stubs if stub.get("children")), key=lambda stub: -stub["count"])
+    for stub in stubs[:replace_more]:
+        if deadline and time.monotonic() >= deadline:
+            break
+        flatten(client.get_more_children(f"t3_{post_id}", stub["children"][:MORE_CHILDREN]), loaded, [])
+        metrics.count("comment_expansions")
+
+    children = {}
+    seen = set()
+    for comment in loaded:
+        if comment.id not in seen:
+            seen.add(comment.id)
+            children.setdefault(comment.parent_id, []).append(comment)
+    return comment_records(children, f"t3_{post_id}", limit, depth, replies)
+
+def enrich_posts(posts, limit, depth=DEFAULT_DEPTH, replies=DEFAULT_REPLIES, replace_more=DEFAULT_REPLACE_MORE,
+                 workers=DEFAULT_WORKERS, time_limit=DEFAULT_TIME_LIMIT, client=None):
+    """
+    Fetches the comment threads of many posts concurrently, on `workers`
+    threads sharing one RedditHttpClient (the run's session and rate
+    budget; the process-wide one by default). The whole stage stops after
+    `time_limit` seconds: posts not fetched by then (or whose fetch failed)
+    are left out. The workers are daemon threads that take no new post after
+    the limit, so a request still in flight can't hold up the job's exit
+    either. Returns {post id: comments}.
+    """
+    client = client or get_http_client()
+    deadline = time.monotonic() + time_limit
+    jobs = queue.Queue()
+    for post in posts:
+        jobs.put(post.id)
+    finished = queue.Queue()
+
+    def work():
+        while time.monotonic() < deadline:
+            try:
+                post_id = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                with metrics.span("comment_thread"):
+                    finished.put((post_id, fetch_comments(client, post_id, limit, depth, replies, replace_more,
+                                                          deadline), None))
+            except Exception as e:
+                finished.put((post_id, None, e))
+
+    for _ in range(max(1, min(workers, len(posts)))):
+        threading.Thread(target=work, daemon=True).start()
+
+    threads = {}
+    failed = 0
+    remaining = len(posts)
+    while remaining:
+        try:
+            post_id, comments, error = finished.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        remaining -= 1
+        if error is None:
+            threads[post_id] = comments
+        else:
+            failed += 1
+            print(f"⚠️ Comments for {post_id} failed: {error}")
+
+    metrics.count("comment_threads", len(threads))
+    metrics.count("comments_fetched", sum(count_comments(comments) for comments in threads.values()))
+    print(f"💬 Comments: {len(threads)} threads fetched, {failed} failed, {remaining} skipped at the {time_limit}s limit")
+    return threads
+
+def count_comments(comments):
+    return sum(1 + count_comments(comment.get("replies", [])) for comment in comments)
+
+def to_ndjson(posts, threads):
+    """One line per enriched post: its id, permalink and comment tree."""
+    lines = [json.dumps({"id": post.id, "permalink": post.permalink, "comments": threads[post.id]},
+                        ensure_ascii=False) for post in posts if post.id in threads]
+    return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from shared.url_utils import normalize_url
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "completions.sqlite3")
+
+def completion_key(template, model, title, url, article=""):
+    """
+    Content hash of everything that determines a rewrite. The URL is
+    normalized, so the same story cross-posted with different tracking
+    parameters (or picked up by two categories) hits the same entry. A
+    hash of the article excerpt is included when there is one, so a link
+    that couldn't be read (or whose page changed) isn't served the
+    completion written from another fetch.
+    """
+    parts = [template, model, title or "", normalize_url(url) or url or ""]
+    if article:
+        parts.append(hashlib.sha256(article.encode("utf-8")).hexdigest())
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CompletionCache:
+    """
+    Completions already paid for, keyed by completion_key(), in a small SQLite
+    file. Entries never expire on their own: a prompt or model change produces
+    new keys, and stale ones can simply be deleted with the file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, completion TEXT NOT NULL, "
+            "prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL, created_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def get(self, key):
+        row = self.conn.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, model, completion, prompt_tokens=0, completion_tokens=0):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, completion, prompt_tokens, completion_tokens, time.time()),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def sync_from_s3(self, s3, bucket_name, key):
+        """Replaces the local cache with the copy in S3, if there is one."""
+        tmp_path = f"{self.path}.download"
+        try:
+            s3.download_file(bucket_name, key, tmp_path)
+        except Exception as e:
+            print(f"⚠️ Completion cache: keeping local copy, could not download s3://{bucket_name}/{key}: {e}")
+            return
+        self.conn.close()
+        os.replace(tmp_path, self.path)
+        self._connect()
+        print(f"⬇️ Completion cache: restored s3://{bucket_name}/{key}")
+
+    def sync_to_s3(self, s3, bucket_name, key):
+        """Commits and uploads the cache file."""
+        self.commit()
+        s3.upload_file(self.path, bucket_name, key)
+        print(f"☁️ Completion cache: saved to s3://{bucket_name}/{key}")
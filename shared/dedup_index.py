@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import time
+
+from shared.url_utils import normalize_url
+
+DEFAULT_INDEX_PATH = os.path.join(".cache", "dedup_index.sqlite3")
+DEFAULT_WINDOW_DAYS = 14
+
+def dedup_keys(post):
+    """Returns the index keys for a post: its Reddit ID and its normalized article URL."""
+    keys = []
+    post_id = post.get("id")
+    if post_id:
+        keys.append(f"id:{post_id}")
+    url = normalize_url(post.get("url"))
+    if url:
+        keys.append(f"url:{url}")
+    return keys
+
+class DedupIndex:
+    """
+    Persistent set of post IDs and normalized URLs already published, kept in
+    a small SQLite file (primary-key lookups, one row per key). Keys older than
+    `window_days` expire. Each key remembers the output it was published in, so
+    re-running a day rewrites that day's file instead of emptying it, and new
+    keys are only committed by commit(), so a failed run can simply be re-run.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, window_days=DEFAULT_WINDOW_DAYS):
+        self.path = path
+        self.window = window_days * 24 * 60 * 60
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self.stats = {"kept": 0, "dropped": 0}
+        self._connect()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "key TEXT PRIMARY KEY, seen_at REAL NOT NULL, source TEXT NOT NULL DEFAULT '') WITHOUT ROWID"
+        )
+
+    def seen_source(self, key):
+        """Returns the output a key was published in, or None if it is new (or expired)."""
+        row = self.conn.execute("SELECT source FROM seen WHERE key = ? AND seen_at >= ?",
+                                (key, time.time() - self.window)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, key):
+        return self.seen_source(key) is not None
+
+    def add(self, keys, source="", seen_at=None):
+        seen_at = seen_at or time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO seen (key, seen_at, source) VALUES (?, ?, ?)",
+                              [(key, seen_at, source) for key in keys])
+
+    def filter_new(self, posts, source=""):
+        """
+        Returns only the posts whose ID and URL weren't already published in
+        another output, and records them under `source`. Duplicates within the
+        same batch are dropped too.
+        """
+        results = []
+        batch = set()
+        for post in posts:
+            keys = dedup_keys(post)
+            if any(key in batch or self.seen_source(key) not in (None, source) for key in keys):
+                self.stats["dropped"] += 1
+                continue
+            batch.update(keys)
+            self.add(keys, source)
+            self.stats["kept"] += 1
+            results.append(post)
+        return results
+
+    def expire(self):
+        """Deletes keys that fell out of the window."""
+        self.conn.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.window,))
+
+    def commit(self):
+        self.expire()
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def sync_from_s3(self, s3, bucket_name, key):
+        """Replaces the local index with the copy in S3, if there is one."""
+        tmp_path = f"{self.path}.download"
+        try:
+            s3.download_file(bucket_name, key, tmp_path)
+        except Exception as e:
+            print(f"⚠️ Dedup index: keeping local copy, could not download s3://{bucket_name}/{key}: {e}")
+            return
+        self.conn.close()
+        os.replace(tmp_path, self.path)
+        self._connect()
+        print(f"⬇️ Dedup index: restored s3://{bucket_name}/{key}")
+
+    def sync_to_s3(self, s3, bucket_name, key):
+        """Commits, compacts and uploads the index file."""
+        self.commit()
+        self.conn.execute("VACUUM")
+        s3.upload_file(self.path, bucket_name, key)
+        print(f"☁️ Dedup index: saved to s3://{bucket_name}/{key}")
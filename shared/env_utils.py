@@ -0,0 +1,16 @@
+import os
+from dotenv import load_dotenv
+
+# Load .env file once for every module that reads configuration
+load_dotenv()
+
+def require_env(*names):
+    """
+    Returns a dict of the requested environment variables.
+    Raises ValueError naming the first one that is missing or empty.
+    """
+    values = {name: os.getenv(name) for name in names}
+    for key, value in values.items():
+        if not value:
+            raise ValueError(f"Missing environment variable: {key}")
+    return values
@@ -0,0 +1,160 @@
+"""
+A local stand-in for the OpenAI API, for exercising the rewrite stage
+without a key or network access. It answers chat completions with a
+deterministic rewrite and word-count token usage, supports the Files and
+Batch endpoints the offline mode uses (batches complete immediately), and can
+answer every Nth request with a 429 to exercise retries.
+
+    python -m shared.fake_openai --port 8082 --fail-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8082/v1 OPENAI_API_KEY=test python -m reddit_news.rewrite weird_news --input out/weird.csv
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOpenAIStore:
+    """Uploaded files, batches and request counters, shared by every handler thread."""
+
+    def __init__(self, fail_every=0):
+        self.fail_every = fail_every
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.requests = 0
+
+    def next_id(self, prefix):
+        return f"{prefix}-{next(self.ids)}"
+
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            return bool(self.fail_every) and self.requests % self.fail_every == 0
+
+    def add_file(self, filename, data, purpose):
+        file = {"id": self.next_id("file"), "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+        with self.lock:
+            self.files[file["id"]] = (file, data)
+        return file
+
+def fake_completion(body):
+    """Rewrites the first `Title:` line of the prompt; usage counts whitespace-separated words."""
+    prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+    title = next((line[len("Title:"):].strip() for line in prompt.splitlines() if line.startswith("Title:")), prompt)
+    content = f"Goatland Report: {title}"
+    prompt_tokens, completion_tokens = len(prompt.split()), len(content.split())
+    return {
+        "id": f"chatcmpl-{abs(hash(prompt)) % 10 ** 12}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake-model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+def run_batch(store, input_data):
+    """Answers every request line of a batch input file and returns the output JSONL."""
+    lines = []
+    for line in input_data.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        lines.append(json.dumps({
+            "id": store.next_id("batch_req"),
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "request_id": store.next_id("req"), "body": fake_completion(request["body"])},
+            "error": None,
+        }))
+    return "\n".join(lines).encode("utf-8")
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, body, content_type, status=200, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, payload, status=200, headers=None):
+            self.send_body(json.dumps(payload).encode("utf-8"), "application/json", status, headers)
+
+        def read_body(self):
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def do_POST(self):
+            data = self.read_body()
+            if self.path.endswith("/chat/completions"):
+                if store.should_fail():
+                    self.send_json({"error": {"message": "Rate limit reached", "type": "requests",
+                                              "code": "rate_limit_exceeded"}},
+                                   status=429, headers={"Retry-After": "0"})
+                else:
+                    self.send_json(fake_completion(json.loads(data)))
+            elif self.path.endswith("/files"):
+                message = BytesParser(policy=email_policy).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + data)
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+                upload = fields["file"]
+                self.send_json(store.add_file(upload.get_filename() or "upload.jsonl", upload.get_payload(decode=True),
+                                              fields["purpose"].get_content().strip() if "purpose" in fields else "batch"))
+            elif self.path.endswith("/batches"):
+                request = json.loads(data)
+                _, input_data = store.files[request["input_file_id"]]
+                output = store.add_file("batch_output.jsonl", run_batch(store, input_data), "batch_output")
+                now = int(time.time())
+                batch = {"id": store.next_id("batch"), "object": "batch", "endpoint": request["endpoint"],
+                         "input_file_id": request["input_file_id"], "output_file_id": output["id"],
+                         "completion_window": request["completion_window"], "status": "completed",
+                         "created_at": now, "completed_at": now}
+                store.batches[batch["id"]] = batch
+                self.send_json(batch)
+            else:
+                self.send_json({"error": {"message": "Not found"}}, status=404)
+
+        def do_GET(self):
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in store.batches:
+                self.send_json(store.batches[parts[-1]])
+            elif len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content" and parts[-2] in store.files:
+                _, data = store.files[parts[-2]]
+                self.send_body(data, "application/octet-stream")
+            else:
+                self.send_json({"error": {"message": "Not found"}}, status=404)
+
+    return Handler
+
+def start_server(store, host="127.0.0.1", port=0):
+    """Starts the fake API on a background thread and returns (server, base_url) for OPENAI_BASE_URL."""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.fake_openai", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth completion with a 429")
+    args = parser.parse_args()
+
+    server, base_url = start_server(FakeOpenAIStore(fail_every=args.fail_every), port=args.port)
+    print(f"🧪 Fake OpenAI listening on {base_url} (set OPENAI_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
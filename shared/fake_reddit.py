@@ -0,0 +1,331 @@
+"""
+A local stand-in for the Reddit API, for exercising the scrapers without
+credentials or network access. It serves app-only OAuth tokens, subreddit
+listings (hot/new/top, including multireddits like a+b with before/after
+paging), /api/info and synthetic comment threads (/comments/<id> cut by
+limit and depth into "load more" stubs, and /api/morechildren) from an
+in-memory post store, and can keep submitting synthetic posts to exercise
+the streaming daemon. The store can also be
+filled from a cassette of recorded listings, scaled up to any size.
+
+    python -m shared.fake_reddit --port 8081 --subreddits weirdnews,nottheonion --posts-per-minute 30
+    python -m shared.fake_reddit --cassette hot.json.gz --posts-per-subreddit 1000
+    REDDIT_OAUTH_URL=http://127.0.0.1:8081 python -m reddit_news.daemon
+"""
+import argparse
+import gzip
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Seconds covered by each time filter of top listings
+TIME_FILTERS = {"hour": 3600, "day": 86400, "week": 7 * 86400, "month": 31 * 86400, "year": 366 * 86400,
+                "all": float("inf")}
+
+# Synthetic comment threads: top-level comments per post (capped by num_comments), replies per comment, levels
+THREAD_SHAPE = (40, 4, 4)
+
+# Listing fields kept when recording a cassette
+CASSETTE_FIELDS = ("id", "name", "title", "url", "permalink", "score", "num_comments", "created_utc", "subreddit",
+                   "subreddit_subscribers", "author", "stickied", "is_self")
+
+class FakeRedditStore:
+    """
+    Thread-safe in-memory collection of posts, keyed by fullname. `latency` is
+    added to every response; `ratelimit_remaining` is what the X-Ratelimit
+    headers report (raise it to benchmark without client-side pacing).
+    """
+
+    def __init__(self, latency=0.0, ratelimit_remaining=99):
+        self.posts = {}
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.latency = latency
+        self.ratelimit_remaining = ratelimit_remaining
+
+    def add_post(self, subreddit, title=None, url=None, score=None, created_utc=None, stickied=False, **extra):
+        post_id = extra.pop("id", None) or format(next(self.ids) + 36 ** 5, "x")
+        post = {
+            "id": post_id,
+            "name": f"t3_{post_id}",
+            "title": title or f"Synthetic {subreddit} story {post_id}",
+            "url": url or f"https://news.example.com/{subreddit}/{post_id}?utm_source=reddit",
+            "permalink": f"/r/{subreddit}/comments/{post_id}/synthetic_story/",
+            "score": random.randint(1, 5000) if score is None else score,
+            "num_comments": extra.pop("num_comments", random.randint(0, 500)),
+            "created_utc": time.time() if created_utc is None else created_utc,
+            "subreddit": subreddit,
+            "author": "goatland_fake",
+            "stickied": stickied,
+            "is_self": False,
+        }
+        post.update(extra)
+        with self.lock:
+            self.posts[post["name"]] = post
+        return post
+
+    def listing(self, subreddits, sort, limit=25, before=None, after=None, time_filter="all"):
+        wanted = {sub.lower() for sub in subreddits}
+        since = time.time() - TIME_FILTERS.get(time_filter, TIME_FILTERS["all"]) if sort == "top" else 0
+        with self.lock:
+            posts = [post for post in self.posts.values()
+                     if post["subreddit"].lower() in wanted and post["created_utc"] >= since]
+        if sort == "hot":
+            posts.sort(key=lambda post: (not post["stickied"], -post["score"]))
+        elif sort == "top":
+            posts.sort(key=lambda post: -post["score"])
+        else:
+            posts.sort(key=lambda post: -post["created_utc"])
+
+        names = [post["name"] for post in posts]
+        if before in names:
+            posts = posts[:names.index(before)][-limit:]
+        elif after in names:
+            posts = posts[names.index(after) + 1:][:limit]
+        elif before or after:
+            posts = []
+        else:
+            posts = posts[:limit]
+        return posts
+
+    def info(self, fullnames):
+        with self.lock:
+            return [self.posts[name] for name in fullnames if name in self.posts]
+
+    def thread(self, post_id):
+        """
+        The post's synthetic comments as {parent fullname: [comments]}, best
+        first; generated from the post ID on first use, so they are stable.
+        """
+        with self.lock:
+            post = self.posts.get(f"t3_{post_id}")
+            if post is None:
+                return None
+            if post_id not in self.threads:
+                self.threads[post_id] = synthetic_thread(post)
+            return self.threads[post_id]
+
+def synthetic_thread(post):
+    rng = random.Random(post["id"])
+    top_level, replies, levels = THREAD_SHAPE
+    children = {}
+    ids = itertools.count(1)
+
+    def add(parent, depth, count):
+        for _ in range(count):
+            comment_id = f"{post['id']}c{next(ids)}"
+            children.setdefault(parent, []).append({
+                "id": comment_id,
+                "name": f"t1_{comment_id}",
+                "parent_id": parent,
+                "link_id": post["name"],
+                "author": f"goat_fan_{rng.randint(1, 999)}",
+                "body": f"Comment {comment_id} on {post['title']}",
+                "score": int(rng.paretovariate(1.3) * 5),
+                "created_utc": post["created_utc"] + rng.uniform(0, 86400),
+                "depth": depth,
+            })
+            if depth + 1 < levels:
+                add(f"t1_{comment_id}", depth + 1, rng.randint(0, replies))
+        if count:
+            children[parent].sort(key=lambda comment: -comment["score"])
+
+    add(post["name"], 0, min(top_level, post.get("num_comments") or 0))
+    return children
+
+def comment_listing(thread, parent, depth, budget):
+    """
+    Renders the comments under `parent` down to `depth` levels, at most
+    budget[0] comments in all; the rest of each level goes into one "more" stub.
+    """
+    things = []
+    siblings = thread.get(parent, [])
+    for i, comment in enumerate(siblings):
+        if budget[0] <= 0:
+            rest = [sibling["id"] for sibling in siblings[i:]]
+            things.append({"kind": "more", "data": {"count": len(rest), "name": f"t1_{rest[0]}", "id": rest[0],
+                                                    "parent_id": parent, "depth": comment["depth"], "children": rest}})
+            break
+        budget[0] -= 1
+        replies = comment_listing(thread, comment["name"], depth, budget) if comment["depth"] + 1 < depth else []
+        things.append({"kind": "t1", "data": dict(comment, replies=listing_of(replies) if replies else "")})
+    return things
+
+def listing_of(children):
+    return {"kind": "Listing", "data": {"children": children, "after": None, "before": None}}
+
+def listing_json(posts):
+    return {
+        "kind": "Listing",
+        "data": {
+            "children": [{"kind": "t3", "data": post} for post in posts],
+            "after": posts[-1]["name"] if posts else None,
+            "before": None,
+        },
+    }
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            if store.latency:
+                time.sleep(store.latency)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-Ratelimit-Remaining", str(store.ratelimit_remaining))
+            self.send_header("X-Ratelimit-Used", "1")
+            self.send_header("X-Ratelimit-Reset", "60")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+            if self.path.startswith("/api/v1/access_token"):
+                self.send_json({"access_token": "fake-token", "token_type": "bearer",
+                                "expires_in": 86400, "scope": "*"})
+            elif self.path.startswith("/api/morechildren"):
+                form = {key: values[0] for key, values in parse_qs(body).items()}
+                thread = store.thread(form.get("link_id", "").removeprefix("t3_")) or {}
+                wanted = set(form.get("children", "").split(","))
+                things = [{"kind": "t1", "data": dict(comment, replies="")}
+                          for comments in thread.values() for comment in comments if comment["id"] in wanted]
+                self.send_json({"json": {"errors": [], "data": {"things": things}}})
+            else:
+                self.send_json({"error": 404}, status=404)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+            if parts[:2] == ["api", "info"]:
+                self.send_json(listing_json(store.info(query.get("id", "").split(","))))
+            elif len(parts) >= 2 and parts[0] == "comments":
+                thread = store.thread(parts[1])
+                if thread is None:
+                    return self.send_json({"error": 404}, status=404)
+                comments = comment_listing(thread, f"t3_{parts[1]}", int(query.get("depth", 10)),
+                                           [int(query.get("limit", 200))])
+                self.send_json([listing_json(store.info([f"t3_{parts[1]}"])), listing_of(comments)])
+            elif len(parts) >= 2 and parts[0] == "r":
+                sort = parts[2] if len(parts) > 2 else "hot"
+                posts = store.listing(parts[1].split("+"), sort, int(query.get("limit", 25)),
+                                      query.get("before"), query.get("after"), query.get("t", "all"))
+                self.send_json(listing_json(posts))
+            else:
+                self.send_json({"error": 404}, status=404)
+
+    return Handler
+
+def record_cassette(path, subreddits, limit=100):
+    """
+    Records the live hot listings of `subreddits` (needs Reddit credentials)
+    into a gzipped JSON cassette that load_cassette() can replay offline.
+    """
+    from shared.reddit_http import RedditHttpClient
+
+    client = RedditHttpClient()
+    listings = {}
+    for sub in subreddits:
+        listings[sub] = [{field: post.get(field) for field in CASSETTE_FIELDS}
+                         for post in client.get_listing(sub, "hot", limit)]
+        print(f"📼 Recorded {len(listings[sub])} posts from r/{sub}")
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump({"recorded_at": time.time(), "subreddits": listings}, file)
+
+def load_cassette(store, path, posts_per_subreddit=None, duplicate_rate=0.0, seed=0):
+    """
+    Fills the store with a cassette's posts, shifted so they are as old now as
+    when they were recorded. With posts_per_subreddit each listing is scaled up
+    (or cut down) to that many posts: extra posts are variants of recorded ones
+    with fresh IDs and URLs, except a `duplicate_rate` share that reuse another
+    post's URL, as crossposts do. Returns the number of posts added.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        cassette = json.load(file)
+    return fill_store(store, cassette["subreddits"], posts_per_subreddit, duplicate_rate, seed,
+                      shift=time.time() - cassette.get("recorded_at", time.time()))
+
+def fill_store(store, listings, posts_per_subreddit=None, duplicate_rate=0.0, seed=0, shift=0.0):
+    """Adds recorded (or synthetic) listings to the store, scaled as described in load_cassette()."""
+    rng = random.Random(seed)
+    urls = []
+    added = 0
+    for sub, recorded in listings.items():
+        recorded = recorded or [{"title": f"Synthetic {sub} story", "url": f"https://news.example.com/{sub}"}]
+        count = posts_per_subreddit or len(recorded)
+        for i in range(count):
+            template = recorded[i % len(recorded)]
+            copy = i // len(recorded)
+            url = template.get("url") or f"https://news.example.com/{sub}/{i}"
+            if copy:
+                url = f"{url}{'&' if '?' in url else '?'}copy={copy}"
+            if urls and rng.random() < duplicate_rate:
+                url = rng.choice(urls)
+            urls.append(url)
+            store.add_post(
+                template.get("subreddit") or sub,
+                title=template.get("title", "") + (f" ({copy + 1})" if copy else ""),
+                url=url,
+                score=max(1, int((template.get("score") or 1) * rng.uniform(0.5, 1.5))) if copy else template.get("score"),
+                created_utc=(template.get("created_utc") or time.time()) + shift - copy * 60,
+                stickied=bool(template.get("stickied")) and not copy,
+                num_comments=template.get("num_comments") or 0,
+                subreddit_subscribers=template.get("subreddit_subscribers") or 0,
+            )
+            added += 1
+    return added
+
+def start_server(store, host="127.0.0.1", port=0):
+    """Starts the fake API on a background thread and returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.fake_reddit", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--subreddits", default="weirdnews,nottheonion", help="comma-separated subreddits to fill")
+    parser.add_argument("--initial-posts", type=int, default=25, help="posts per subreddit to start with")
+    parser.add_argument("--posts-per-minute", type=float, default=0, help="keep submitting synthetic posts")
+    parser.add_argument("--history-days", type=float, default=0,
+                        help="spread the initial posts over this many past days instead of the last minutes")
+    parser.add_argument("--cassette", help="serve the listings recorded in this cassette instead of synthetic posts")
+    parser.add_argument("--posts-per-subreddit", type=int, help="scale every cassette listing to this many posts")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    store = FakeRedditStore(latency=args.latency)
+    subreddits = args.subreddits.split(",")
+    if args.cassette:
+        added = load_cassette(store, args.cassette, args.posts_per_subreddit)
+        print(f"📼 Loaded {added} posts from {args.cassette}")
+    else:
+        now = time.time()
+        spacing = args.history_days * 86400 / args.initial_posts if args.history_days else 60
+        for sub in subreddits:
+            for i in range(args.initial_posts):
+                store.add_post(sub, created_utc=now - (args.initial_posts - i) * spacing)
+
+    server, base_url = start_server(store, port=args.port)
+    print(f"🧪 Fake Reddit listening on {base_url} (set REDDIT_OAUTH_URL={base_url})")
+    try:
+        while True:
+            if args.posts_per_minute:
+                time.sleep(60 / args.posts_per_minute)
+                store.add_post(random.choice(subreddits))
+            else:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
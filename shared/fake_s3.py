@@ -0,0 +1,276 @@
+"""
+A local stand-in for S3, for exercising uploads, indexes and compaction
+without AWS. It keeps objects in memory and speaks the subset of the S3 REST
+API the scrapers use (path-style): Put/Get/Head/DeleteObject(s), ListObjectsV2,
+conditional PUTs (If-Match/If-None-Match), ranged GETs and multipart uploads.
+Signatures are not checked.
+
+    python -m shared.fake_s3 --port 8083 --buckets goatland
+    AWS_ENDPOINT_URL=http://127.0.0.1:8083 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x AWS_REGION=us-east-1 \\
+        S3_BUCKET_NAME=goatland python -m reddit_news --no-dedup
+"""
+import argparse
+import hashlib
+import itertools
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+S3_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+MAX_KEYS = 1000
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+class FakeS3Store:
+    """Thread-safe in-memory buckets, objects and pending multipart uploads."""
+
+    def __init__(self, buckets=()):
+        self.buckets = {name: {} for name in buckets}
+        self.uploads = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.requests = 0
+
+    def put(self, bucket, key, data, headers, etag=None):
+        obj = {
+            "data": data,
+            "etag": etag or f'"{hashlib.md5(data).hexdigest()}"',
+            "modified": time.time(),
+            "content_type": headers.get("Content-Type") or "binary/octet-stream",
+            "content_encoding": headers.get("Content-Encoding"),
+        }
+        self.buckets[bucket][key] = obj
+        return obj
+
+    def list(self, bucket, prefix="", start_after="", max_keys=MAX_KEYS):
+        with self.lock:
+            keys = sorted(key for key in self.buckets[bucket] if key.startswith(prefix) and key > start_after)
+            page = keys[:max_keys]
+            return [(key, self.buckets[bucket][key]) for key in page], len(keys) > max_keys
+
+def decode_aws_chunked(body):
+    """Strips the aws-chunked framing (chunk sizes, signatures and trailing checksums) botocore may send."""
+    data = bytearray()
+    position = 0
+    while True:
+        line_end = body.index(b"\r\n", position)
+        size = int(body[position:line_end].split(b";")[0], 16)
+        if size == 0:
+            return bytes(data)
+        data += body[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def xml(root, children, namespace=S3_NS):
+    attributes = f' xmlns="{namespace}"' if namespace else ""
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<{root}{attributes}>{children}</{root}>'.encode("utf-8")
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without TCP_NODELAY keep-alive GETs stall on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send(self, status, body=b"", headers=None, head=False):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                if value is not None:
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def error(self, status, code, message, head=False):
+            body = b"" if head else xml("Error", f"<Code>{code}</Code><Message>{escape(message)}</Message>", namespace=None)
+            self.send(status, body, {"Content-Type": "application/xml"}, head=head)
+
+        def read_body(self):
+            if "chunked" in self.headers.get("Transfer-Encoding", ""):
+                body = bytearray()
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    if size == 0:
+                        while self.rfile.readline() not in (b"\r\n", b""):
+                            pass
+                        break
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+                body = bytes(body)
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if "aws-chunked" in self.headers.get("Content-Encoding", "") or \
+                    self.headers.get("x-amz-content-sha256", "").startswith("STREAMING-"):
+                body = decode_aws_chunked(body)
+            return body
+
+        def object_headers(self):
+            headers = {name: value for name, value in self.headers.items()}
+            encodings = [value.strip() for value in self.headers.get("Content-Encoding", "").split(",")
+                         if value.strip() and value.strip() != "aws-chunked"]
+            headers["Content-Encoding"] = ",".join(encodings) or None
+            return headers
+
+        def route(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+            bucket, _, key = url.path.lstrip("/").partition("/")
+            with store.lock:
+                store.requests += 1
+            return unquote(bucket), unquote(key), query
+
+        def do_PUT(self):
+            bucket, key, query = self.route()
+            body = self.read_body()
+            if not key:
+                with store.lock:
+                    store.buckets.setdefault(bucket, {})
+                return self.send(200, headers={"Location": f"/{bucket}"})
+            if bucket not in store.buckets:
+                return self.error(404, "NoSuchBucket", bucket)
+            if "uploadId" in query:
+                with store.lock:
+                    upload = store.uploads.get(query["uploadId"])
+                    if upload is None:
+                        return self.error(404, "NoSuchUpload", query["uploadId"])
+                    etag = f'"{hashlib.md5(body).hexdigest()}"'
+                    upload["parts"][int(query["partNumber"])] = (body, etag)
+                return self.send(200, headers={"ETag": etag})
+            with store.lock:
+                current = store.buckets[bucket].get(key)
+                if self.headers.get("If-None-Match") == "*" and current:
+                    return self.error(412, "PreconditionFailed", "At least one of the pre-conditions you specified did not hold")
+                if self.headers.get("If-Match") and (not current or current["etag"] != self.headers["If-Match"]):
+                    return self.error(412, "PreconditionFailed", "At least one of the pre-conditions you specified did not hold")
+                obj = store.put(bucket, key, body, self.object_headers())
+            self.send(200, headers={"ETag": obj["etag"]})
+
+        def do_POST(self):
+            bucket, key, query = self.route()
+            body = self.read_body()
+            if bucket not in store.buckets:
+                return self.error(404, "NoSuchBucket", bucket)
+            if "delete" in query:
+                tree = ElementTree.fromstring(body)
+                keys = [node.text for node in tree.iter() if node.tag.rsplit("}", 1)[-1] == "Key"]
+                with store.lock:
+                    for name in keys:
+                        store.buckets[bucket].pop(name, None)
+                return self.send(200, xml("DeleteResult", "".join(
+                    f"<Deleted><Key>{escape(name)}</Key></Deleted>" for name in keys)), {"Content-Type": "application/xml"})
+            if "uploads" in query:
+                upload_id = f"upload-{next(store.ids)}"
+                with store.lock:
+                    store.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {},
+                                                "headers": self.object_headers()}
+                return self.send(200, xml("InitiateMultipartUploadResult",
+                                          f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                                          f"<UploadId>{upload_id}</UploadId>"), {"Content-Type": "application/xml"})
+            if "uploadId" in query:
+                with store.lock:
+                    upload = store.uploads.pop(query["uploadId"], None)
+                    if upload is None:
+                        return self.error(404, "NoSuchUpload", query["uploadId"])
+                    parts = [upload["parts"][number] for number in sorted(upload["parts"])]
+                    digest = hashlib.md5(b"".join(bytes.fromhex(etag.strip('"')) for _, etag in parts)).hexdigest()
+                    obj = store.put(bucket, key, b"".join(data for data, _ in parts), upload["headers"],
+                                    etag=f'"{digest}-{len(parts)}"')
+                return self.send(200, xml("CompleteMultipartUploadResult",
+                                          f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                                          f"<ETag>{escape(obj['etag'])}</ETag>"), {"Content-Type": "application/xml"})
+            self.error(400, "InvalidRequest", "Unsupported POST")
+
+        def do_DELETE(self):
+            bucket, key, query = self.route()
+            with store.lock:
+                if "uploadId" in query:
+                    store.uploads.pop(query["uploadId"], None)
+                elif bucket in store.buckets:
+                    store.buckets[bucket].pop(key, None)
+            self.send(204)
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def do_GET(self, head=False):
+            bucket, key, query = self.route()
+            if bucket not in store.buckets:
+                return self.error(404, "NoSuchBucket", bucket, head=head)
+            if not key:
+                return self.list_objects(bucket, query)
+            with store.lock:
+                obj = store.buckets[bucket].get(key)
+            if obj is None:
+                return self.error(404, "NoSuchKey", "The specified key does not exist.", head=head)
+            headers = {
+                "ETag": obj["etag"],
+                "Last-Modified": formatdate(obj["modified"], usegmt=True),
+                "Content-Type": obj["content_type"],
+                "Content-Encoding": obj["content_encoding"],
+                "Accept-Ranges": "bytes",
+            }
+            data = obj["data"]
+            match = RANGE.fullmatch(self.headers.get("Range", ""))
+            if match and data:
+                start, end = match.groups()
+                if start:
+                    start, end = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+                else:
+                    start, end = max(0, len(data) - int(end)), len(data) - 1
+                headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+                return self.send(206, data[start:end + 1], headers, head=head)
+            self.send(200, data, headers, head=head)
+
+        def list_objects(self, bucket, query):
+            prefix = query.get("prefix", "")
+            start_after = query.get("continuation-token") or query.get("start-after", "")
+            max_keys = min(int(query.get("max-keys", MAX_KEYS)), MAX_KEYS)
+            page, truncated = store.list(bucket, prefix, start_after, max_keys)
+            contents = "".join(
+                f"<Contents><Key>{escape(key)}</Key><LastModified>{iso(obj['modified'])}</LastModified>"
+                f"<ETag>{escape(obj['etag'])}</ETag><Size>{len(obj['data'])}</Size>"
+                f"<StorageClass>STANDARD</StorageClass></Contents>"
+                for key, obj in page
+            )
+            token = f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>" if truncated else ""
+            self.send(200, xml("ListBucketResult",
+                               f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+                               f"<KeyCount>{len(page)}</KeyCount><MaxKeys>{max_keys}</MaxKeys>"
+                               f"<IsTruncated>{str(truncated).lower()}</IsTruncated>{contents}{token}"),
+                      {"Content-Type": "application/xml"})
+
+    return Handler
+
+def start_server(store, host="127.0.0.1", port=0):
+    """Starts the fake S3 on a background thread and returns (server, endpoint_url) for AWS_ENDPOINT_URL."""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.fake_s3", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--buckets", default="goatland", help="comma-separated buckets to create")
+    args = parser.parse_args()
+
+    server, endpoint_url = start_server(FakeS3Store(args.buckets.split(",")), port=args.port)
+    print(f"🧪 Fake S3 listening on {endpoint_url} (set AWS_ENDPOINT_URL={endpoint_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
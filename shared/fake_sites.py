@@ -0,0 +1,98 @@
+"""
+Local news sites for exercising the article fetcher without network access.
+Each site is its own server (so its own host:port) and serves synthetic
+article pages plus a few misbehaving ones:
+
+    /article/<n>    an article page with boilerplate around the body
+    /private/<n>    disallowed by the site's robots.txt
+    /slow/<n>       answers after --slow-seconds
+    /huge           a page far bigger than the fetcher's size cap
+    /image.png      a non-HTML response
+
+    python -m shared.fake_sites --sites 4 --latency 0.05
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROBOTS_TXT = "User-agent: *\nDisallow: /private/\n"
+
+def article_html(site, number):
+    paragraphs = "".join(
+        f"<p>Paragraph {i} of story {number} on site {site}: a goat was spotted doing something remarkable "
+        f"near the town square, and residents had a lot to say about it.</p>"
+        for i in range(1, 6)
+    )
+    return (
+        f"<html><head><title>Story {number}</title><script>var tracking = true;</script></head><body>"
+        f"<header><nav><a href='/'>Home</a> <a href='/weird'>Weird</a></nav></header>"
+        f"<article><h1>Story {number}</h1><p>By Staff</p>{paragraphs}<figure><p>Photo caption that is long "
+        f"enough to look like a paragraph but should be dropped.</p></figure></article>"
+        f"<aside><p>Related stories you might like if you enjoyed reading about goats today.</p></aside>"
+        f"<footer>© Site {site}</footer></body></html>"
+    )
+
+def make_handler(site, latency=0.0, slow_seconds=15.0):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, body, content_type="text/html; charset=utf-8", status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the fetcher hung up on purpose (size cap or timeout)
+
+        def do_GET(self):
+            time.sleep(latency)
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if parts == ["robots.txt"]:
+                self.send_body(ROBOTS_TXT.encode("utf-8"), "text/plain")
+            elif len(parts) == 2 and parts[0] in ("article", "private"):
+                self.send_body(article_html(site, parts[1]).encode("utf-8"))
+            elif len(parts) == 2 and parts[0] == "slow":
+                time.sleep(slow_seconds)
+                self.send_body(article_html(site, parts[1]).encode("utf-8"))
+            elif parts == ["huge"]:
+                self.send_body(b"<html><body>" + (b"<p>" + b"x" * 1024 + b"</p>") * 4096 + b"</body></html>")
+            elif parts == ["image.png"]:
+                self.send_body(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64, "image/png")
+            else:
+                self.send_body(b"<html><body>Not found</body></html>", status=404)
+
+    return Handler
+
+def start_sites(count=1, latency=0.0, slow_seconds=15.0, host="127.0.0.1"):
+    """Starts `count` sites on background threads and returns (servers, base_urls)."""
+    servers, urls = [], []
+    for site in range(1, count + 1):
+        server = ThreadingHTTPServer((host, 0), make_handler(site, latency, slow_seconds))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        urls.append(f"http://{host}:{server.server_port}")
+    return servers, urls
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.fake_sites", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sites", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--slow-seconds", type=float, default=15.0, help="how long /slow/ pages take")
+    args = parser.parse_args()
+
+    servers, urls = start_sites(args.sites, args.latency, args.slow_seconds)
+    for url in urls:
+        print(f"🧪 Fake news site on {url} (try {url}/article/1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
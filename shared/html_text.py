@@ -0,0 +1,79 @@
+import re
+
+# Page furniture that never holds article text
+SKIP_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure", "iframe", "svg")
+# Shorter <p>s are usually captions, bylines or share buttons
+MIN_PARAGRAPH_CHARS = 40
+DEFAULT_MAX_CHARS = 20000
+WHITESPACE = re.compile(r"\s+")
+# XHTML pages open with one; lxml refuses an encoding declaration in already-decoded text
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+def clean(text):
+    return WHITESPACE.sub(" ", text or "").strip()
+
+def pick_paragraphs(paragraphs, fallback, max_chars):
+    kept = [text for text in map(clean, paragraphs) if len(text) >= MIN_PARAGRAPH_CHARS]
+    return ("\n\n".join(kept) if kept else clean(fallback))[:max_chars]
+
+def extract_with_selectolax(html, max_chars):
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:  # selectolax < 0.3 only has the Modest backend
+        from selectolax.parser import HTMLParser
+
+    tree = HTMLParser(html)
+    for node in tree.css(", ".join(SKIP_TAGS)):
+        node.decompose()
+    root = tree.css_first("article") or tree.css_first("main") or tree.body
+    if root is None:
+        return ""
+    return pick_paragraphs([p.text(separator=" ") for p in root.css("p")], root.text(separator=" "), max_chars)
+
+def extract_with_lxml(html, max_chars):
+    import lxml.etree
+    import lxml.html
+
+    if not html.strip():
+        return ""
+    try:
+        doc = lxml.html.document_fromstring(XML_DECLARATION.sub("", html, count=1))
+    except (lxml.etree.ParserError, ValueError):
+        # e.g. "Document is empty" for comment-only pages; html.parser takes anything
+        return extract_with_bs4(html, max_chars)
+    for element in doc.xpath(" | ".join(f"//{tag}" for tag in SKIP_TAGS)):
+        element.drop_tree()
+    root = (doc.xpath("//article") or doc.xpath("//main") or doc.xpath("//body") or [doc])[0]
+    return pick_paragraphs([p.text_content() for p in root.iter("p")], root.text_content(), max_chars)
+
+def extract_with_bs4(html, max_chars):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(SKIP_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    return pick_paragraphs([p.get_text(" ") for p in root.find_all("p")], root.get_text(" "), max_chars)
+
+def available_extractor():
+    """Returns the fastest installed extractor: selectolax, then lxml, then BeautifulSoup."""
+    for module, extractor in (("selectolax", extract_with_selectolax), ("lxml.html", extract_with_lxml)):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return extractor
+    return extract_with_bs4
+
+_extractor = None
+
+def extract_text(html, max_chars=DEFAULT_MAX_CHARS):
+    """
+    Returns the readable body of an article page: the paragraphs inside its
+    <article> (or <main>, or <body>), minus navigation, scripts and other
+    furniture, joined by blank lines.
+    """
+    global _extractor
+    if _extractor is None:
+        _extractor = available_extractor()
+    return _extractor(html, max_chars)
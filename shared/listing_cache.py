@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "listings")
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+class ListingCache:
+    """
+    On-disk cache of Reddit listing responses, one JSON file per
+    (subreddit, sort, limit) holding the body and its ETag/Last-Modified
+    validators. Entries are revalidated with conditional requests, so a 304
+    costs no body download; entries older than `ttl` are evicted, and the
+    least recently fetched ones go first once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0}
+        self.dirty = set()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, subreddit, sort, limit):
+        digest = hashlib.sha1(f"{subreddit.lower()}|{sort}|{limit}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, subreddit, sort, limit):
+        """Returns the cached entry, or None if there isn't one or it has expired."""
+        path = self._path(subreddit, sort, limit)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, entry):
+        """Builds If-None-Match / If-Modified-Since headers for a cached entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, subreddit, sort, limit, body, etag=None, last_modified=None):
+        """Stores a fresh response body with its validators."""
+        entry = {
+            "key": [subreddit, sort, limit],
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+        path = self._path(subreddit, sort, limit)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+        self.dirty.add(os.path.basename(path))
+
+    def touch(self, subreddit, sort, limit):
+        """Marks a cached entry as just revalidated (after a 304), restarting its TTL."""
+        path = self._path(subreddit, sort, limit)
+        os.utime(path)
+        self.dirty.add(os.path.basename(path))
+
+    def evict(self):
+        """Drops expired entries, then the oldest ones until the cache fits in max_bytes."""
+        now = time.time()
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            if now - stat.st_mtime > self.ttl:
+                os.remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def sync_from_s3(self, s3, bucket_name, prefix):
+        """Seeds the local cache from S3 so ephemeral runners start warm."""
+        paginator = s3.get_paginator("list_objects_v2")
+        count = 0
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/"):
+            for obj in page.get("Contents", []):
+                name = os.path.basename(obj["Key"])
+                if name.endswith(".json"):
+                    path = os.path.join(self.cache_dir, name)
+                    s3.download_file(bucket_name, obj["Key"], path)
+                    # Keep the TTL running from when the entry was last validated, not downloaded
+                    fetched_at = obj["LastModified"].timestamp()
+                    os.utime(path, (fetched_at, fetched_at))
+                    count += 1
+        print(f"⬇️ Listing cache: restored {count} entries from s3://{bucket_name}/{prefix}/")
+
+    def sync_to_s3(self, s3, bucket_name, prefix):
+        """Evicts, then uploads entries written this run and removes evicted ones from S3."""
+        self.evict()
+        local = {name for name in os.listdir(self.cache_dir) if name.endswith(".json")}
+        for name in local & self.dirty:
+            s3.upload_file(os.path.join(self.cache_dir, name), bucket_name, f"{prefix}/{name}")
+        self.dirty.clear()
+
+        paginator = s3.get_paginator("list_objects_v2")
+        stale = []
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/"):
+            stale.extend({"Key": obj["Key"]} for obj in page.get("Contents", [])
+                         if os.path.basename(obj["Key"]) not in local)
+        for start in range(0, len(stale), 1000):
+            s3.delete_objects(Bucket=bucket_name, Delete={"Objects": stale[start:start + 1000]})
+        print(f"☁️ Listing cache: {len(local)} entries in s3://{bucket_name}/{prefix}/ ({len(stale)} evicted)")
@@ -0,0 +1,194 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_PREFIX = "_run_reports"
+# Latency samples kept per stage for percentiles; counts and sums cover every sample
+MAX_SAMPLES = 10000
+QUANTILES = (0.5, 0.95, 0.99)
+
+def percentile(samples, q):
+    """Nearest-rank percentile of an unsorted sample list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+class RunMetrics:
+    """
+    Thread-safe timings and counters for one run of a job. span() times a
+    stage (fetch, transform, serialize, upload, ...), count() adds to a
+    counter (posts, requests, retries, bytes, ...), record() keeps any other
+    JSON-serializable detail (such as per-category outcomes). report()
+    summarizes them with per-stage p50/p95/p99 latencies.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.details = {}
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = {"count": 0, "sum": 0.0, "samples": deque(maxlen=MAX_SAMPLES)}
+            stats["count"] += 1
+            stats["sum"] += seconds
+            stats["samples"].append(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, value):
+        with self.lock:
+            self.details[name] = value
+
+    def report(self):
+        """The run as a JSON-serializable dict."""
+        with self.lock:
+            stages = {stage: dict(stats, samples=list(stats["samples"])) for stage, stats in self.stages.items()}
+            counters = dict(self.counters)
+            details = dict(self.details)
+        report = {
+            "job": self.job,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {
+                stage: {
+                    "count": stats["count"],
+                    "total_seconds": round(stats["sum"], 4),
+                    **{f"p{round(q * 100)}_seconds": round(percentile(stats["samples"], q), 4) for q in QUANTILES},
+                    "max_seconds": round(max(stats["samples"], default=0.0), 4),
+                }
+                for stage, stats in sorted(stages.items())
+            },
+            "counters": dict(sorted(counters.items())),
+        }
+        if details:
+            report["details"] = details
+        return report
+
+    def summary(self, report=None):
+        report = report or self.report()
+        stages = ", ".join(f"{stage} {stats['total_seconds']:.2f}s" for stage, stats in report["stages"].items())
+        return f"{report['duration_seconds']:.1f}s total ({stages or 'no stages'})"
+
+    def report_key(self):
+        return f"{REPORT_PREFIX}/{self.job}/{self.started_at.strftime('%Y-%m-%d_%H-%M-%S')}.json"
+
+    def upload_report(self, bucket_name, report=None):
+        """Writes the run report to S3 under _run_reports/<job>/ and returns its key."""
+        from shared.s3_utils import upload_bytes
+
+        key = self.report_key()
+        upload_bytes(json.dumps(report or self.report(), indent=2).encode("utf-8"), bucket_name, key,
+                     content_type="application/json")
+        return key
+
+    def write_prometheus(self, path, report=None):
+        """
+        Writes the run as Prometheus text exposition (summaries per stage,
+        counters as totals) for node_exporter's textfile collector. The file
+        is replaced atomically so a scrape never sees half of it.
+        """
+        report = report or self.report()
+        job = self.job.replace("\\", "\\\\").replace('"', '\\"')
+        lines = [
+            "# HELP goatland_stage_seconds Time spent per stage of the last run.",
+            "# TYPE goatland_stage_seconds summary",
+        ]
+        for stage, stats in report["stages"].items():
+            labels = f'job="{job}",stage="{stage}"'
+            for q in QUANTILES:
+                lines.append(f'goatland_stage_seconds{{{labels},quantile="{q}"}} {stats[f"p{round(q * 100)}_seconds"]}')
+            lines.append(f"goatland_stage_seconds_sum{{{labels}}} {stats['total_seconds']}")
+            lines.append(f"goatland_stage_seconds_count{{{labels}}} {stats['count']}")
+        lines += [
+            "# HELP goatland_run_count Counters of the last run (posts, requests, retries, bytes, ...).",
+            "# TYPE goatland_run_count gauge",
+        ]
+        lines += [f'goatland_run_count{{job="{job}",name="{name}"}} {value}'
+                  for name, value in report["counters"].items()]
+        lines += [
+            "# HELP goatland_run_duration_seconds Wall time of the last run.",
+            "# TYPE goatland_run_duration_seconds gauge",
+            f'goatland_run_duration_seconds{{job="{job}"}} {report["duration_seconds"]}',
+            "# HELP goatland_run_finished_timestamp_seconds When the last run finished.",
+            "# TYPE goatland_run_finished_timestamp_seconds gauge",
+            f'goatland_run_finished_timestamp_seconds{{job="{job}"}} {time.time():.0f}',
+        ]
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+_metrics = RunMetrics("default")
+
+def start_run(job):
+    """Starts a fresh set of metrics for a run and makes it the process-wide one."""
+    global _metrics
+    _metrics = RunMetrics(job)
+    return _metrics
+
+def get_metrics():
+    return _metrics
+
+def span(stage):
+    """Times a block as `stage` in the current run: `with span("upload"): ...`."""
+    return _metrics.span(stage)
+
+def count(name, amount=1):
+    _metrics.count(name, amount)
+
+def observe(stage, seconds):
+    _metrics.observe(stage, seconds)
+
+def record(name, value):
+    _metrics.record(name, value)
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _metrics.span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def finish_run(bucket_name=None, metrics_path=None):
+    """
+    Prints the run's stage timings and exports them: the JSON report to S3
+    when a bucket is given, the Prometheus textfile when a path is.
+    """
+    # One snapshot for both exports, taken before the report's own upload is timed
+    report = _metrics.report()
+    print(f"⏱️ {_metrics.job}: {_metrics.summary(report)}")
+    if bucket_name:
+        key = _metrics.upload_report(bucket_name, report)
+        print(f"📊 Run report: s3://{bucket_name}/{key}")
+    if metrics_path:
+        _metrics.write_prometheus(metrics_path, report)
+    return report
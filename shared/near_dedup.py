@@ -0,0 +1,120 @@
+import random
+import re
+import zlib
+from dataclasses import replace
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands of 4 rows: pairs above ~0.6 Jaccard almost always share a bucket
+DEFAULT_THRESHOLD = 0.6
+# Only the lead of an extracted article body is compared; it carries most of the story
+BODY_WORDS = 60
+MERSENNE_PRIME = (1 << 61) - 1
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "he", "her", "his", "in",
+    "is", "it", "its", "of", "on", "or", "over", "says", "she", "that", "the", "their", "they", "this", "to",
+    "was", "were", "will", "with", "after", "new", "s",
+}
+
+def tokenize(text):
+    return [token for token in TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+def shingles(post):
+    """
+    Shingles of a post: its title words (outlets reorder headlines, so titles
+    are compared as bags of words), plus word triples from the lead of its
+    extracted article body when there is one.
+    """
+    result = set(tokenize(post.get("title")))
+    body = tokenize(post.get("article"))[:BODY_WORDS]
+    result |= {" ".join(body[i:i + 3]) for i in range(len(body) - 2)}
+    return result
+
+class MinHasher:
+    """MinHash signatures from `num_perm` seeded universal hash permutations of CRC32 shingle hashes."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return None
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+        return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.params)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing over MinHash signatures. Each signature
+    is cut into `bands` slices and filed under each; only items sharing a
+    slice become candidates, so lookups don't scan every earlier item.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+
+    def query_and_insert(self, item, signature):
+        """Returns the items already indexed that share a band with `signature`, then indexes it."""
+        candidates = set()
+        for band, buckets in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows]
+            bucket = buckets.setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(item)
+        return candidates
+
+def cluster_posts(posts, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Groups near-duplicate posts. Returns clusters as lists of indexes into
+    `posts`, in order of first appearance. Candidate pairs come from the LSH
+    index and are confirmed by signature similarity, then joined with a
+    union-find, so the work grows with the number of posts, not their pairs.
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(num_perm, bands)
+    parent = list(range(len(posts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = []
+    for i, post in enumerate(posts):
+        signature = hasher.signature(shingles(post))
+        signatures.append(signature)
+        if signature is None:
+            continue
+        for j in index.query_and_insert(i, signature):
+            if find(i) != find(j) and similarity(signature, signatures[j]) >= threshold:
+                parent[find(i)] = find(j)
+
+    clusters = {}
+    for i in range(len(posts)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+def merge_cluster(posts):
+    """
+    Canonical post of a cluster: its highest-scoring member, carrying the
+    cluster's total score, its size and every member's permalink as sources.
+    """
+    canonical = max(posts, key=lambda post: int(post.get("score") or 0))
+    return replace(
+        canonical,
+        score=sum(int(post.get("score") or 0) for post in posts),
+        cluster_size=len(posts),
+        sources=";".join(post.get("permalink", "") for post in posts),
+    )
+
+def collapse_near_duplicates(posts, threshold=DEFAULT_THRESHOLD):
+    """Replaces every group of near-duplicate posts with its canonical post."""
+    return [merge_cluster([posts[i] for i in members]) for members in cluster_posts(posts, threshold)]
@@ -1,10 +1,59 @@
 import openai
 import os
+import threading
 
-def get_openai_client():
-    """Initializes and returns an OpenAI API client using the API key from environment variables."""
+# USD per 1M (input, output) tokens; the Batch API bills half of that
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+BATCH_DISCOUNT = 0.5
+
+def get_openai_client(max_retries=2):
+    """
+    Initializes and returns an OpenAI API client using the API key from environment variables.
+    OPENAI_BASE_URL points it at another server, such as shared/fake_openai.py.
+    """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("❌ OPENAI_API_KEY environment variable not set")
-    
-    return openai.OpenAI(api_key=api_key)
+
+    return openai.OpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL") or None, max_retries=max_retries)
+
+def estimate_cost(model, prompt_tokens, completion_tokens, batch=False):
+    """Estimated USD cost of a completion; models missing from MODEL_PRICES count as free."""
+    # Responses name dated snapshots (gpt-4o-mini-2024-07-18), so match the longest known prefix
+    known = [name for name in MODEL_PRICES if model.startswith(name)]
+    if not known:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[max(known, key=len)]
+    cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+class UsageCounter:
+    """Thread-safe running totals of completions, cache hits, tokens and estimated cost."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {"completions": 0, "cached": 0, "failed": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+
+    def add(self, model, prompt_tokens, completion_tokens, batch=False):
+        with self.lock:
+            self.stats["completions"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.stats["cost"] += estimate_cost(model, prompt_tokens, completion_tokens, batch)
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def summary(self):
+        stats = self.stats
+        return (f"{stats['completions']} completions, {stats['cached']} cached, {stats['failed']} failed, "
+                f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens "
+                f"(~${stats['cost']:.4f})")
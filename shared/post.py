@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from dataclasses import asdict, dataclass, fields as dataclass_fields
+from datetime import datetime
+from operator import attrgetter
+
+@dataclass(slots=True, frozen=True)
+class Post:
+    """
+    One scraped Reddit post, as the scrape engine, backfill and stream daemon
+    build it. Slotted, so it holds no per-instance dict (a fraction of the
+    memory of the equivalent record dict), and frozen, so stages derive
+    changed copies with dataclasses.replace() instead of mutating a post
+    another stage still holds: incremental runs set status/score_delta,
+    near-dedup cluster_size/sources, and dataset partitions scraped_at.
+    get() mirrors dict.get, so code reading records works on Posts too.
+    """
+
+    id: str
+    title: str
+    url: str
+    permalink: str
+    score: int
+    subreddit: str
+    created_utc: float = 0.0
+    num_comments: int = 0
+    status: str = None
+    score_delta: int = None
+    cluster_size: int = None
+    sources: str = None
+    scraped_at: datetime = None
+
+    @classmethod
+    def from_submission(cls, submission, subreddit, permalink_host="https://reddit.com"):
+        """Builds a Post from a praw/asyncpraw submission (or anything with the same attributes)."""
+        return cls(
+            id=submission.id,
+            title=submission.title,
+            url=submission.url,
+            permalink=f"{permalink_host}{submission.permalink}",
+            score=submission.score,
+            subreddit=subreddit,
+            created_utc=float(getattr(submission, "created_utc", 0) or 0),
+            num_comments=int(getattr(submission, "num_comments", 0) or 0),
+        )
+
+    @classmethod
+    def from_dict(cls, record):
+        """Builds a Post from a record dict (e.g. to_dict() output), ignoring keys that aren't Post fields."""
+        return cls(**{name: record[name] for name in POST_FIELDS if name in record})
+
+    @property
+    def fullname(self):
+        return f"t3_{self.id}"
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        return asdict(self)
+
+POST_FIELDS = tuple(field.name for field in dataclass_fields(Post))
+
+def all_posts(rows, fields):
+    """True when `rows` is a list of Posts and every one of `fields` is a Post field, so the converters apply."""
+    return (isinstance(rows, list) and fields is not None and all(name in POST_FIELDS for name in fields)
+            and all(type(row) is Post for row in rows))
+
+def row_getter(fields):
+    """A C-level getter returning a tuple of `fields` from a Post; every field must be a Post field."""
+    getter = attrgetter(*fields)
+    return getter if len(fields) > 1 else lambda post: (getter(post),)
+
+def to_csv(posts, fields=POST_FIELDS):
+    """Renders posts as CSV bytes with a header row, like CsvWriter (None becomes an empty cell)."""
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    writer.writerows(map(row_getter(fields), posts))
+    return buffer.getvalue().encode("utf-8")
+
+def to_json(posts, fields=POST_FIELDS):
+    """Renders posts as the indented JSON array of `fields` objects that JsonWriter writes."""
+    getter = row_getter(fields)
+    return json.dumps([dict(zip(fields, getter(post))) for post in posts],
+                      ensure_ascii=False, indent=2).encode("utf-8")
+
+def to_record_batch(posts, schema):
+    """Converts posts to one pyarrow RecordBatch with `schema` (whose names are Post fields), column by column."""
+    import pyarrow as pa  # optional: only needed for the columnar formats
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array(list(map(attrgetter(field.name), posts)), type=field.type) for field in schema], schema=schema)
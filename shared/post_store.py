@@ -0,0 +1,203 @@
+import argparse
+import os
+import sqlite3
+import time
+
+from shared.url_utils import normalize_url
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "posts.sqlite3")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS posts (
+        id TEXT PRIMARY KEY,
+        category TEXT NOT NULL,
+        date TEXT NOT NULL,
+        subreddit TEXT NOT NULL,
+        title TEXT NOT NULL,
+        url TEXT,
+        normalized_url TEXT,
+        permalink TEXT,
+        score INTEGER,
+        created_utc REAL,
+        num_comments INTEGER,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS posts_category_date ON posts (category, date)",
+    "CREATE INDEX IF NOT EXISTS posts_subreddit ON posts (subreddit COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS posts_normalized_url ON posts (normalized_url)",
+    # External-content FTS table over titles, kept in step by triggers
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, content='posts', content_rowid='rowid')",
+    """CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts (rowid, title) VALUES (new.rowid, new.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE OF title ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+        INSERT INTO posts_fts (rowid, title) VALUES (new.rowid, new.title);
+    END""",
+]
+
+UPSERT = """
+    INSERT INTO posts (id, category, date, subreddit, title, url, normalized_url, permalink, score,
+                       created_utc, num_comments, first_seen, last_seen)
+    VALUES (:id, :category, :date, :subreddit, :title, :url, :normalized_url, :permalink, :score,
+            :created_utc, :num_comments, :seen, :seen)
+    ON CONFLICT (id) DO UPDATE SET
+        title = excluded.title,
+        score = excluded.score,
+        num_comments = COALESCE(excluded.num_comments, posts.num_comments),
+        created_utc = COALESCE(excluded.created_utc, posts.created_utc),
+        last_seen = excluded.last_seen
+"""
+
+COLUMNS = ("id", "category", "date", "subreddit", "title", "url", "permalink", "score", "created_utc", "num_comments")
+
+class PostStore:
+    """
+    Every published post in one SQLite file (WAL mode), keyed by Reddit post
+    ID, for answering "what did we publish about X" without scanning S3.
+    Indexed by (category, date), subreddit and normalized URL, with an FTS5
+    index on titles. A post published again keeps its first category and
+    date; only its score and last_seen move.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    def upsert(self, posts, category, date):
+        """Inserts or refreshes a batch of post records in a single transaction. Returns the batch size."""
+        seen = time.time()
+        rows = [{
+            "id": post.get("id"),
+            "category": category,
+            "date": date,
+            "subreddit": post.get("subreddit"),
+            "title": post.get("title"),
+            "url": post.get("url"),
+            "normalized_url": normalize_url(post.get("url")) or None,
+            "permalink": post.get("permalink"),
+            "score": post.get("score"),
+            "created_utc": post.get("created_utc"),
+            "num_comments": post.get("num_comments"),
+            "seen": seen,
+        } for post in posts if post.get("id")]
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def _select(self, where, params, limit, order="p.date DESC, p.score DESC"):
+        columns = ", ".join(f"p.{column}" for column in COLUMNS)
+        query = f"SELECT {columns} FROM posts p {where} ORDER BY {order} LIMIT ?"
+        return [dict(row) for row in self.conn.execute(query, (*params, limit))]
+
+    def search(self, text, since=None, until=None, category=None, limit=50):
+        """
+        Full-text search over titles (FTS5 query syntax, e.g. `goat OR sheep`),
+        optionally within a date range and category, best matches first.
+        """
+        where = ["posts_fts MATCH ?"]
+        params = [text]
+        for clause, value in (("p.date >= ?", since), ("p.date <= ?", until), ("p.category = ?", category)):
+            if value:
+                where.append(clause)
+                params.append(value)
+        return self._select(f"JOIN posts_fts ON posts_fts.rowid = p.rowid WHERE {' AND '.join(where)}", params,
+                            limit, order="posts_fts.rank")
+
+    def for_date(self, category, date, limit=1000):
+        return self._select("WHERE p.category = ? AND p.date = ?", (category, date), limit)
+
+    def for_subreddit(self, subreddit, limit=100):
+        return self._select("WHERE p.subreddit = ? COLLATE NOCASE", (subreddit,), limit)
+
+    def for_url(self, url, limit=100):
+        """Every post linking to the same article, whatever tracking parameters it carried."""
+        return self._select("WHERE p.normalized_url = ?", (normalize_url(url),), limit)
+
+    def close(self):
+        self.conn.close()
+
+    def sync_from_s3(self, s3, bucket_name, key):
+        """Replaces the local store with the snapshot in S3, if there is one."""
+        tmp_path = f"{self.path}.download"
+        try:
+            s3.download_file(bucket_name, key, tmp_path)
+        except Exception as e:
+            print(f"⚠️ Post store: keeping local copy, could not download s3://{bucket_name}/{key}: {e}")
+            return
+        self.conn.close()
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        os.replace(tmp_path, self.path)
+        self._connect()
+        print(f"⬇️ Post store: restored s3://{bucket_name}/{key}")
+
+    def sync_to_s3(self, s3, bucket_name, key):
+        """Uploads a consistent single-file snapshot (taken with SQLite's backup API, WAL included)."""
+        snapshot_path = f"{self.path}.snapshot"
+        snapshot = sqlite3.connect(snapshot_path)
+        try:
+            self.conn.backup(snapshot)
+            snapshot.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            snapshot.close()
+        try:
+            s3.upload_file(snapshot_path, bucket_name, key)
+        finally:
+            os.remove(snapshot_path)
+        print(f"☁️ Post store: saved to s3://{bucket_name}/{key}")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m shared.post_store", description="Query the published post store.")
+    parser.add_argument("query", nargs="?", help="full-text search over titles (FTS5 syntax)")
+    parser.add_argument("--path", default=DEFAULT_STORE_PATH, help=f"store file (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--s3-key", help="query a fresh copy of the snapshot at this S3 key")
+    parser.add_argument("--since", help="first date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last date (YYYY-MM-DD)")
+    parser.add_argument("--category")
+    parser.add_argument("--subreddit")
+    parser.add_argument("--url", help="posts linking to this article")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    store = PostStore(args.path)
+    if args.s3_key:
+        from shared.s3_utils import get_bucket_name, get_s3_client
+
+        store.sync_from_s3(get_s3_client(), get_bucket_name(), args.s3_key)
+    started = time.perf_counter()
+    if args.query:
+        rows = store.search(args.query, args.since, args.until, args.category, args.limit)
+    elif args.url:
+        rows = store.for_url(args.url, args.limit)
+    elif args.subreddit:
+        rows = store.for_subreddit(args.subreddit, args.limit)
+    elif args.category and args.since:
+        rows = store.for_date(args.category, args.since, args.limit)
+    else:
+        parser.error("give a query, --url, --subreddit, or --category with --since")
+    elapsed = (time.perf_counter() - started) * 1000
+    for row in rows:
+        print(f"{row['date']}  {row['category']:<22} [{row['subreddit']}] {row['title']} ({row['score']} points)")
+        print(f"            {row['permalink']}")
+    print(f"🔎 {len(rows)} posts in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import copy
+import heapq
+import itertools
+import statistics
+import time
+
+DEFAULT_HALF_LIFE_HOURS = 12
+# Before a subreddit's typical score is known, assume hot posts get about one upvote per 10k subscribers
+SUBSCRIBER_ENGAGEMENT = 1e-4
+# Weight of the latest run when updating a subreddit's typical score
+SCALE_SMOOTHING = 0.3
+
+class TopK:
+    """
+    Keeps the `k` highest-ranked items seen so far in a min-heap, so a stream
+    of any length is reduced to the best k with O(k) memory. Items pushed
+    twice under the same key (e.g. by a retried request) are kept once.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.keys = set()
+        self.order = itertools.count()
+
+    def push(self, key, rank, make_item):
+        """Offers an item; `make_item` is only called if it makes the cut."""
+        if key in self.keys or self.k <= 0:
+            return
+        if len(self.heap) >= self.k and rank <= self.heap[0][0]:
+            return
+        # The counter breaks rank ties in arrival order, so items themselves are never compared
+        entry = (rank, -next(self.order), key, make_item())
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.keys.discard(heapq.heapreplace(self.heap, entry)[2])
+        self.keys.add(key)
+
+    def items(self):
+        """Returns the kept items, best first."""
+        return [entry[3] for entry in sorted(self.heap, reverse=True)]
+
+class Ranker:
+    """
+    Ranks posts from different subreddits on one scale: a post's score divided
+    by its subreddit's typical score, decayed by age with a half-life. The
+    typical score is learned from earlier runs (`scales`, a smoothed median per
+    subreddit); until then it is estimated from the subscriber count.
+    """
+
+    def __init__(self, scales=None, half_life_hours=DEFAULT_HALF_LIFE_HOURS, now=None):
+        self.scales = scales if scales is not None else {}
+        self.half_life = half_life_hours * 60 * 60
+        self.now = now or time.time()
+
+    def expected_score(self, sub, subscribers=None):
+        scale = self.scales.get(sub.lower())
+        if scale:
+            return scale
+        return max(1.0, (subscribers or 0) * SUBSCRIBER_ENGAGEMENT)
+
+    def rank(self, sub, post):
+        expected = self.expected_score(sub, getattr(post, "subreddit_subscribers", None))
+        age = max(0.0, self.now - (getattr(post, "created_utc", None) or self.now))
+        return max(post.score, 0) / expected * 0.5 ** (age / self.half_life)
+
+    def scratch(self):
+        """
+        A copy with its own scales, for ranking one category on a worker thread
+        without touching the shared ones; merge() folds them back afterwards.
+        """
+        scratch = copy.copy(self)
+        scratch.scales = dict(self.scales)
+        return scratch
+
+    def merge(self, scratch, subreddits):
+        """Takes the typical scores of `subreddits` from a scratch copy."""
+        wanted = {sub.lower() for sub in subreddits}
+        self.scales.update({sub: scale for sub, scale in scratch.scales.items() if sub in wanted})
+
+    def observe(self, sub, scores):
+        """Folds the median score of a fresh listing into the subreddit's typical score."""
+        if not scores:
+            return
+        median = max(1.0, float(statistics.median(scores)))
+        previous = self.scales.get(sub.lower())
+        self.scales[sub.lower()] = median if previous is None else (
+            SCALE_SMOOTHING * median + (1 - SCALE_SMOOTHING) * previous)
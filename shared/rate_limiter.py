@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+
+from shared import metrics
+
+# Reddit allows 100 OAuth requests per minute per client ID
+DEFAULT_RATE = 100 / 60
+DEFAULT_BURST = 10
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RateLimitExceeded(Exception):
+    """Raised when a request still fails after every retry."""
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to `capacity`.
+    reserve() takes a token and returns how long the caller must wait for it,
+    so the same bucket can pace threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def drain_until(self, resume_at):
+        """Empties the bucket so nothing is handed out before `resume_at` (a clock() value)."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.tokens, -(resume_at - now) * self.rate)
+            self.updated = now
+
+def get_status_code(error):
+    """Returns the HTTP status behind a prawcore/requests/aiohttp/openai error, if there is one."""
+    response = getattr(error, "response", None)
+    for attr in ("status_code", "status"):
+        code = getattr(response, attr, None)
+        if isinstance(code, int):
+            return code
+    code = getattr(error, "status", None)
+    return code if isinstance(code, int) else None
+
+def get_retry_after(error):
+    """Returns the Retry-After delay in seconds sent with an error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After") or headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error):
+    """429s, 5xx responses and connection-level failures are worth retrying."""
+    code = get_status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in (
+        "RequestException", "ServerError", "ConnectionError", "Timeout", "ReadTimeout",
+        "ClientConnectionError", "ServerDisconnectedError", "APIConnectionError", "APITimeoutError",
+    )
+
+class RateLimitScheduler:
+    """
+    Paces every Reddit request of a run through one token bucket, slows down
+    further when Reddit's X-Ratelimit-* headers say the budget is running low,
+    and retries 429/5xx failures with exponential backoff and full jitter.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=5,
+                 base_delay=1.0, max_delay=60.0, clock=time.monotonic):
+        self.rate = rate
+        self.bucket = TokenBucket(rate, burst, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "waits": 0, "wait_seconds": 0.0}
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def update_from_headers(self, headers):
+        """Adapts pacing to Reddit's X-Ratelimit-Remaining / X-Ratelimit-Reset response headers."""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        try:
+            remaining = float(lowered["x-ratelimit-remaining"])
+            reset = float(lowered["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._apply_budget(remaining, reset)
+
+    def update_from_limits(self, limits):
+        """Same as update_from_headers, for the `reddit.auth.limits` dict praw/asyncpraw keep."""
+        remaining = limits.get("remaining")
+        reset_timestamp = limits.get("reset_timestamp")
+        if remaining is None or reset_timestamp is None:
+            return
+        self._apply_budget(float(remaining), max(0.0, reset_timestamp - time.time()))
+
+    def _apply_budget(self, remaining, reset_seconds):
+        if remaining < 1:
+            # Out of budget: hold everything until the window resets
+            self.bucket.drain_until(self.clock() + reset_seconds)
+            return
+        if reset_seconds > 0:
+            # Spread what is left evenly over the rest of the window
+            with self.bucket.lock:
+                self.bucket.rate = min(self.rate, remaining / reset_seconds)
+
+    def _next_delay(self, error, attempt):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(self.max_delay, retry_after))
+        return delay
+
+    def _wait_for_token(self):
+        delay = self.bucket.reserve()
+        if delay > 0:
+            self._count("waits")
+            self._count("wait_seconds", delay)
+            metrics.observe("rate_limit_wait", delay)
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) under the rate budget, retrying retryable failures."""
+        for attempt in range(self.max_retries + 1):
+            delay = self._wait_for_token()
+            if delay > 0:
+                time.sleep(delay)
+            self._count("requests")
+            metrics.count("reddit_requests")
+            try:
+                with metrics.span("reddit_request"):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    if is_retryable(e):
+                        raise RateLimitExceeded(f"Gave up after {attempt + 1} attempts: {e}") from e
+                    raise
+                self._count("retries")
+                metrics.count("reddit_retries")
+                backoff = self._next_delay(e, attempt)
+                print(f"⏳ Retrying in {backoff:.1f}s after error: {e}")
+                time.sleep(backoff)
+
+    async def call_async(self, func, *args, **kwargs):
+        """Async version of call() for coroutine functions."""
+        import asyncio
+
+        for attempt in range(self.max_retries + 1):
+            delay = self._wait_for_token()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._count("requests")
+            metrics.count("reddit_requests")
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                metrics.observe("reddit_request", time.perf_counter() - started)
+                return result
+            except Exception as e:
+                metrics.observe("reddit_request", time.perf_counter() - started)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    if is_retryable(e):
+                        raise RateLimitExceeded(f"Gave up after {attempt + 1} attempts: {e}") from e
+                    raise
+                self._count("retries")
+                metrics.count("reddit_retries")
+                backoff = self._next_delay(e, attempt)
+                print(f"⏳ Retrying in {backoff:.1f}s after error: {e}")
+                await asyncio.sleep(backoff)
+
+    def summary(self):
+        stats = self.stats
+        return (f"{stats['requests']} requests, {stats['retries']} retries, "
+                f"{stats['waits']} waits ({stats['wait_seconds']:.1f}s)")
+
+_scheduler = None
+
+def get_scheduler():
+    """Returns the process-wide scheduler every Reddit request in a run goes through."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RateLimitScheduler()
+    return _scheduler
+
+def configure_scheduler(**kwargs):
+    """Replaces the process-wide scheduler, e.g. to lift the request budget when running against a local fake."""
+    global _scheduler
+    _scheduler = RateLimitScheduler(**kwargs)
+    return _scheduler
@@ -0,0 +1,163 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from shared import metrics
+from shared.rate_limiter import get_scheduler
+from shared.reddit_utils import get_endpoint_overrides, get_reddit_credentials
+
+OAUTH_URL = "https://oauth.reddit.com"
+REDDIT_URL = "https://www.reddit.com"
+TOKEN_PATH = "/api/v1/access_token"
+# Most items Reddit returns per listing or /api/info request
+PAGE_SIZE = 100
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """
+    Returns the process-wide RedditHttpClient (one session and OAuth token),
+    creating it on first use. Unlike praw it can be shared by worker threads,
+    so every worker pool in a run fetches through it.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RedditHttpClient()
+    return _client
+
+def as_thing(data):
+    """Wraps a raw post or comment dict so it reads like a praw object (post.title, post.fullname, ...)."""
+    return SimpleNamespace(fullname=data.get("name"), **data)
+
+class RedditHttpClient:
+    """
+    Minimal application-only OAuth client for the Reddit endpoints the
+    scrapers read: listings, /api/info and comment threads. Unlike praw it
+    exposes response headers, which lets listings be fetched with
+    conditional requests against a ListingCache, and it is thread-safe:
+    every request goes through the rate-limit scheduler on its own, and only
+    the token refresh is locked.
+    """
+
+    def __init__(self, cache=None, scheduler=None, timeout=10, oauth_url=None, reddit_url=None):
+        import requests
+
+        credentials = get_reddit_credentials()
+        overrides = get_endpoint_overrides()
+        self.client_id = credentials["client_id"]
+        self.client_secret = credentials["client_secret"]
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = credentials["user_agent"]
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
+        self.timeout = timeout
+        self.oauth_url = oauth_url or overrides.get("oauth_url", OAUTH_URL)
+        self.token_url = (reddit_url or overrides.get("reddit_url", REDDIT_URL)) + TOKEN_PATH
+        self.token = None
+        self.token_expires = 0
+        # Category workers share one client; only one of them fetches a token
+        self.token_lock = threading.Lock()
+
+    def _authorize(self):
+        with self.token_lock:
+            self._refresh_token()
+
+    def _refresh_token(self):
+        if self.token and time.time() < self.token_expires - 60:
+            return
+        with metrics.span("oauth"):
+            response = self.session.post(
+                self.token_url,
+                auth=(self.client_id, self.client_secret),
+                data={"grant_type": "client_credentials"},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        payload = response.json()
+        self.token = payload["access_token"]
+        self.token_expires = time.time() + payload.get("expires_in", 3600)
+        self.session.headers["Authorization"] = f"bearer {self.token}"
+
+    def _get(self, path, params, headers=None):
+        self._authorize()
+        response = self.session.get(f"{self.oauth_url}{path}", params=params, headers=headers, timeout=self.timeout)
+        self.scheduler.update_from_headers(response.headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _post(self, path, data):
+        self._authorize()
+        response = self.session.post(f"{self.oauth_url}{path}", data=data, timeout=self.timeout)
+        self.scheduler.update_from_headers(response.headers)
+        response.raise_for_status()
+        return response
+
+    def get_listing(self, subreddit, sort="hot", limit=25):
+        """
+        Returns the raw post dicts of a listing. With a cache, the request is
+        conditional and a 304 is answered from the stored body.
+        """
+        entry = self.cache.get(subreddit, sort, limit) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        response = self.scheduler.call(self._get, f"/r/{subreddit}/{sort}", {"limit": limit, "raw_json": 1}, headers)
+
+        if response.status_code == 304 and entry:
+            self.cache.stats["hits"] += 1
+            self.cache.touch(subreddit, sort, limit)
+            body = entry["body"]
+        else:
+            body = response.json()
+            if self.cache:
+                self.cache.stats["misses"] += 1
+                self.cache.put(subreddit, sort, limit, body,
+                               etag=response.headers.get("ETag"),
+                               last_modified=response.headers.get("Last-Modified"))
+        return [child["data"] for child in body["data"]["children"]]
+
+    def iter_listing(self, subreddit, sort="new", limit=None, **params):
+        """
+        Yields the raw post dicts of a listing, newest page first, until
+        `limit` posts or the end of the listing (Reddit stops around 1000).
+        Each page of PAGE_SIZE is its own rate-limited request, so a retry
+        never refetches earlier pages. Extra params (e.g. t="week" for top)
+        are passed through; nothing is cached.
+        """
+        after = None
+        count = 0
+        while True:
+            size = min(PAGE_SIZE, limit - count) if limit else PAGE_SIZE
+            response = self.scheduler.call(self._get, f"/r/{subreddit}/{sort}",
+                                           dict(params, limit=size, after=after, raw_json=1))
+            data = response.json()["data"]
+            for child in data["children"]:
+                yield child["data"]
+                count += 1
+            after = data.get("after")
+            if not data["children"] or not after or (limit and count >= limit):
+                return
+
+    def get_info(self, fullnames):
+        """Returns the raw post dicts for a list of fullnames, PAGE_SIZE per request."""
+        posts = []
+        for start in range(0, len(fullnames), PAGE_SIZE):
+            response = self.scheduler.call(self._get, "/api/info",
+                                           {"id": ",".join(fullnames[start:start + PAGE_SIZE]), "raw_json": 1})
+            posts.extend(child["data"] for child in response.json()["data"]["children"])
+        return posts
+
+    def get_comments(self, post_id, **params):
+        """Returns a post's comment tree as Reddit sends it: a list of t1 and "more" things, replies nested."""
+        response = self.scheduler.call(self._get, f"/comments/{post_id}", dict(params, raw_json=1))
+        return response.json()[1]["data"]["children"]
+
+    def get_more_children(self, link_fullname, children, sort="top"):
+        """Expands one "load more comments" stub; returns its comments (and any nested stubs) as a flat list."""
+        response = self.scheduler.call(self._post, "/api/morechildren", {
+            "api_type": "json", "link_id": link_fullname, "children": ",".join(children), "sort": sort,
+            "raw_json": 1,
+        })
+        return response.json()["json"]["data"]["things"]
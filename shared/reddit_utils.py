@@ -0,0 +1,47 @@
+import os
+
+from shared.env_utils import require_env
+
+_reddit = None
+
+def get_reddit_credentials():
+    """Returns the client_id/client_secret/user_agent kwargs shared by every Reddit client."""
+    env = require_env("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT")
+    return {
+        "client_id": env["REDDIT_CLIENT_ID"],
+        "client_secret": env["REDDIT_CLIENT_SECRET"],
+        "user_agent": env["REDDIT_USER_AGENT"],
+    }
+
+def get_endpoint_overrides():
+    """
+    Points clients at another Reddit API (such as shared/fake_reddit.py) when
+    REDDIT_OAUTH_URL is set; REDDIT_URL defaults to the same address.
+    """
+    oauth_url = os.getenv("REDDIT_OAUTH_URL")
+    if not oauth_url:
+        return {}
+    return {"oauth_url": oauth_url, "reddit_url": os.getenv("REDDIT_URL") or oauth_url}
+
+def get_reddit_client():
+    """
+    Returns the process-wide praw client, authenticating on first use. Only
+    the daemon's stream and `goatland verify --live` still use praw; scrapes,
+    backfills and comment fetches share the thread-safe client from
+    shared/reddit_http.py instead, since praw clients aren't thread-safe.
+    """
+    global _reddit
+    if _reddit is None:
+        import praw  # deferred: costs more to import than most commands take to run
+
+        _reddit = praw.Reddit(**get_reddit_credentials(), **get_endpoint_overrides())
+    return _reddit
+
+def get_async_reddit_client():
+    """
+    Returns a new asyncpraw client. It must be created inside the running event
+    loop and closed by the caller, so use it as `async with get_async_reddit_client() as reddit:`.
+    """
+    import asyncpraw  # only needed for the async fetch mode
+
+    return asyncpraw.Reddit(**get_reddit_credentials(), **get_endpoint_overrides())
@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+INDEX_NAME = "_index.json"
+# Per-run outputs: <filename_prefix>_YYYY-MM-DD[_HH-MM-SS].<csv|json>
+KEY_DATE = re.compile(r"_(\d{4}-\d{2}-\d{2})(?:_\d{2}-\d{2}-\d{2})?\.(csv|json)$")
+DEFAULT_TTL = 60
+# Concurrent writers to one prefix retry their conditional PUT this many times
+MAX_ATTEMPTS = 8
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def index_key(prefix):
+    return f"{prefix}/{INDEX_NAME}"
+
+def key_prefix(key):
+    return key.rsplit("/", 1)[0] if "/" in key else ""
+
+def object_entry(key, body, size=None, encoding=None, sha256=None):
+    """
+    An index entry for an uploaded object: its stored size and the SHA-256 of
+    its (uncompressed) body, so readers can verify what read_object returns.
+    Streamed uploads pass the digest they computed on the way instead of a body.
+    """
+    return {
+        "key": key,
+        "size": len(body) if size is None else size,
+        "sha256": sha256 or hashlib.sha256(body).hexdigest(),
+        "encoding": encoding,
+        "uploaded_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def _is_precondition_failure(error):
+    return error.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict", "412")
+
+def load_index(s3, bucket_name, prefix):
+    """Returns (index, etag) for a prefix, or (None, None) when it has no index yet."""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=index_key(prefix))
+    except s3.exceptions.NoSuchKey:
+        return None, None
+    index = json.loads(response["Body"].read())
+    _remember(bucket_name, prefix, index)
+    return index, response["ETag"]
+
+def _remember(bucket_name, prefix, index):
+    with _cache_lock:
+        _cache[(bucket_name, prefix)] = (time.monotonic(), index)
+
+def build_index(s3, bucket_name, prefix):
+    """Builds a prefix's index from one full LIST; only needed once for prefixes that predate the index."""
+    index = {"dates": {}}
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/"):
+        for obj in page.get("Contents", []):
+            match = KEY_DATE.search(obj["Key"])
+            if match and key_prefix(obj["Key"]) == prefix:
+                index["dates"].setdefault(match.group(1), []).append({
+                    "key": obj["Key"],
+                    "size": obj["Size"],
+                    "etag": obj["ETag"].strip('"'),
+                    "uploaded_at": obj["LastModified"].isoformat(),
+                })
+    for entries in index["dates"].values():
+        entries.sort(key=lambda entry: entry["key"])
+    return index
+
+def update_index(s3, bucket_name, prefix, add=(), remove=()):
+    """
+    Drops keys from (and then adds entries to) a prefix's index. The index is
+    replaced with a conditional PUT (If-Match on the ETag just read, or
+    If-None-Match for a new index), so concurrent writers never lose each
+    other's entries: the loser re-reads and applies its change again.
+    """
+    from botocore.exceptions import ClientError
+
+    removed = set(remove)
+    for _ in range(MAX_ATTEMPTS):
+        index, etag = load_index(s3, bucket_name, prefix)
+        if index is None:
+            index = build_index(s3, bucket_name, prefix)
+        if removed:
+            index["dates"] = {day: kept for day, kept in (
+                (day, [entry for entry in entries if entry["key"] not in removed])
+                for day, entries in index["dates"].items()) if kept}
+        for entry in add:
+            match = KEY_DATE.search(entry["key"])
+            if not match:
+                continue
+            entries = [old for old in index["dates"].get(match.group(1), []) if old["key"] != entry["key"]]
+            index["dates"][match.group(1)] = sorted(entries + [entry], key=lambda item: item["key"])
+        index["updated_at"] = datetime.now(timezone.utc).isoformat()
+        condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+        try:
+            s3.put_object(Bucket=bucket_name, Key=index_key(prefix), Body=json.dumps(index).encode("utf-8"),
+                          ContentType="application/json", **condition)
+        except ClientError as e:
+            if _is_precondition_failure(e):
+                continue
+            raise
+        _remember(bucket_name, prefix, index)
+        return index
+    raise RuntimeError(f"Could not update s3://{bucket_name}/{index_key(prefix)}: too many concurrent writers")
+
+def record_uploads(s3, bucket_name, entries):
+    """Adds uploaded objects to their prefixes' indexes; keys that aren't dated per-run outputs are skipped."""
+    by_prefix = {}
+    for entry in entries:
+        if KEY_DATE.search(entry["key"]):
+            by_prefix.setdefault(key_prefix(entry["key"]), []).append(entry)
+    for prefix, added in by_prefix.items():
+        update_index(s3, bucket_name, prefix, add=added)
+
+class IndexResolver:
+    """
+    Answers "latest", "for date D" and "between dates" for an S3 prefix from
+    its index object: one small GET, cached in-process for `ttl` seconds,
+    whatever the filename convention (dated, timestamped, csv or json) and
+    however many objects the prefix holds. A prefix without an index gets one
+    built from a single LIST the first time it is asked about.
+    """
+
+    def __init__(self, s3, bucket_name, ttl=DEFAULT_TTL):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.ttl = ttl
+
+    def index(self, prefix, refresh=False):
+        with _cache_lock:
+            cached = _cache.get((self.bucket_name, prefix))
+        if cached and not refresh and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        index, _ = load_index(self.s3, self.bucket_name, prefix)
+        if index is None:
+            index = update_index(self.s3, self.bucket_name, prefix)
+        return index
+
+    def dates(self, prefix):
+        return sorted(self.index(prefix)["dates"])
+
+    def for_date(self, prefix, day, extension=None):
+        """Entries for one day (a date or YYYY-MM-DD), oldest first."""
+        entries = self.index(prefix)["dates"].get(str(day), [])
+        return [entry for entry in entries if not extension or entry["key"].endswith(f".{extension}")]
+
+    def between(self, prefix, start, end, extension=None):
+        """Entries for every day from start to end inclusive, oldest first."""
+        return [entry for day in self.dates(prefix) if str(start) <= day <= str(end)
+                for entry in self.for_date(prefix, day, extension)]
+
+    def latest(self, prefix, extension=None):
+        """The most recent entry under a prefix, or None."""
+        for day in reversed(self.dates(prefix)):
+            entries = self.for_date(prefix, day, extension)
+            if entries:
+                return entries[-1]
+        return None
+
+def main():
+    from shared.s3_utils import get_bucket_name, get_s3_client
+
+    parser = argparse.ArgumentParser(prog="python -m shared.s3_index",
+                                     description="Look up or rebuild the object index of S3 prefixes.")
+    parser.add_argument("prefix", help="S3 prefix, e.g. reddit_weird_news")
+    parser.add_argument("--date", help="list the objects of one day (YYYY-MM-DD)")
+    parser.add_argument("--since", help="list the objects from this day on (YYYY-MM-DD)")
+    parser.add_argument("--until", default="9999-12-31", help="last day for --since")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from a full LIST of the prefix")
+    args = parser.parse_args()
+
+    s3 = get_s3_client()
+    bucket_name = get_bucket_name()
+    if args.rebuild:
+        index, _ = load_index(s3, bucket_name, args.prefix)
+        fresh = build_index(s3, bucket_name, args.prefix)
+        stale = [entry["key"] for entries in (index or {"dates": {}})["dates"].values() for entry in entries]
+        update_index(s3, bucket_name, args.prefix, add=[entry for entries in fresh["dates"].values()
+                                                         for entry in entries], remove=stale)
+        print(f"🗂️ Rebuilt s3://{bucket_name}/{index_key(args.prefix)} ({len(fresh['dates'])} days)")
+        return
+    resolver = IndexResolver(s3, bucket_name)
+    if args.date:
+        entries = resolver.for_date(args.prefix, args.date)
+    elif args.since:
+        entries = resolver.between(args.prefix, args.since, args.until)
+    else:
+        entries = [entry for entry in [resolver.latest(args.prefix)] if entry]
+    for entry in entries:
+        print(f"{entry['key']}  {entry['size']} bytes  {entry.get('sha256') or entry.get('etag')}")
+
+if __name__ == "__main__":
+    main()
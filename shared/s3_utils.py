@@ -1,21 +1,257 @@
-import boto3
-import datetime
+import gzip
+import hashlib
+import io
 import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
-def download_latest_file(bucket_name, prefix, filename_prefix, local_path):
+from shared import metrics
+from shared.env_utils import require_env
+from shared.s3_index import IndexResolver, object_entry, record_uploads
+
+# One connection pool for the whole process, big enough for parallel uploads
+MAX_POOL_CONNECTIONS = 32
+DEFAULT_UPLOAD_WORKERS = 8
+TRANSFER_SETTINGS = {
+    "multipart_threshold": 8 * 1024 * 1024,
+    "multipart_chunksize": 8 * 1024 * 1024,
+    "max_concurrency": 8,
+    "use_threads": True,
+}
+COMPRESSIONS = ("gzip", "zstd")
+# Parts of streamed uploads; S3 needs at least 5 MB for every part but the last
+STREAM_PART_SIZE = 8 * 1024 * 1024
+
+_s3 = None
+_s3_lock = threading.Lock()
+_transfer_config = None
+
+def get_s3_client():
     """
-    Downloads the latest CSV file from the given S3 bucket and prefix.
-    The filename is expected to follow the format: prefix_YYYY-MM-DD.csv
+    Returns the process-wide S3 client, creating it on first use. boto3
+    clients are thread-safe, so every upload in a run shares its connection pool.
+    boto3 itself is only imported here, so commands that never touch S3
+    don't pay for it.
     """
-    s3 = boto3.client("s3")
-    today = datetime.date.today().strftime("%Y-%m-%d")
-    filename = f"{filename_prefix}_{today}.csv"
-    key = f"{prefix}/{filename}"
-    
+    global _s3
+    if _s3 is None:
+        with _s3_lock:
+            if _s3 is None:
+                import boto3
+                from botocore.config import Config
+
+                env = require_env("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_REGION")
+                _s3 = boto3.client(
+                    "s3",
+                    aws_access_key_id=env["AWS_ACCESS_KEY_ID"],
+                    aws_secret_access_key=env["AWS_SECRET_ACCESS_KEY"],
+                    region_name=env["AWS_REGION"],
+                    config=Config(
+                        max_pool_connections=MAX_POOL_CONNECTIONS,
+                        retries={"max_attempts": 5, "mode": "adaptive"},
+                    ),
+                )
+    return _s3
+
+def get_transfer_config():
+    """The boto3 TransferConfig (multipart thresholds and concurrency) for managed uploads."""
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+
+        _transfer_config = TransferConfig(**TRANSFER_SETTINGS)
+    return _transfer_config
+
+def get_bucket_name():
+    """Returns the bucket all scrapers write to."""
+    return require_env("S3_BUCKET_NAME")["S3_BUCKET_NAME"]
+
+def compress(data, compression):
+    """Compresses bytes with gzip or zstd (zstd needs the optional zstandard package)."""
+    if compression == "gzip":
+        return gzip.compress(data, mtime=0)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+
+def compress_stream(chunks, compression):
+    """compress() for a generator of byte chunks: yields compressed chunks as they fill up."""
+    if compression == "gzip":
+        # wbits=31 writes a gzip header (with a zero mtime, like compress()) and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    elif compression == "zstd":
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=10).compressobj()
+    else:
+        raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def decompress(data, content_encoding):
+    """Reverses compress() based on an object's Content-Encoding."""
+    if content_encoding == "gzip":
+        return gzip.decompress(data)
+    if content_encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+def decoding_stream(body, content_encoding):
+    """Wraps a streaming object body so reads return decompressed bytes."""
+    if content_encoding == "gzip":
+        return gzip.GzipFile(fileobj=body)
+    if content_encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().stream_reader(body)
+    return body
+
+def upload_bytes(data, bucket_name, s3_path, content_type=None, compression=None, index=False):
+    """
+    Uploads an in-memory payload straight from a buffer, no temp file. With
+    compression the stored bytes are gzip/zstd and Content-Encoding says so.
+    With index=True the object is also added to its prefix's index
+    (shared/s3_index.py). Returns the bytes sent.
+    """
+    extra_args = {}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    stored = data
+    if compression:
+        stored = compress(data, compression)
+        extra_args["ContentEncoding"] = compression
+    with metrics.span("s3_put"):
+        get_s3_client().upload_fileobj(io.BytesIO(stored), bucket_name, s3_path,
+                                       ExtraArgs=extra_args, Config=get_transfer_config())
+    metrics.count("uploads")
+    metrics.count("upload_bytes", len(stored))
+    print(f"☁️ Uploaded {len(stored)} bytes to s3://{bucket_name}/{s3_path}")
+    if index:
+        record_uploads(get_s3_client(), bucket_name, [object_entry(s3_path, data, len(stored), compression)])
+    return len(stored)
+
+def upload_many(uploads, bucket_name, max_workers=DEFAULT_UPLOAD_WORKERS, index=True):
+    """
+    Uploads many in-memory outputs in parallel over the shared connection pool.
+    `uploads` holds dicts with "body" and "key", plus optional "content_type"
+    and "compression". Dated outputs are then added to their prefixes' indexes,
+    one index update per prefix. Returns the total bytes sent.
+    """
+    def send(upload):
+        size = upload_bytes(upload["body"], bucket_name, upload["key"],
+                            content_type=upload.get("content_type"), compression=upload.get("compression"))
+        return object_entry(upload["key"], upload["body"], size, upload.get("compression"))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        entries = list(pool.map(send, uploads))
+    if index:
+        record_uploads(get_s3_client(), bucket_name, entries)
+    return sum(entry["size"] for entry in entries)
+
+def upload_stream(chunks, bucket_name, s3_path, content_type=None, compression=None, index=False, s3=None,
+                  part_size=STREAM_PART_SIZE):
+    """
+    Uploads a generator of byte chunks (e.g. Writer.stream()) without ever
+    holding the whole object: chunks are compressed on the fly and sent as
+    multipart upload parts of `part_size` bytes, so memory stays at about
+    one part whatever the row count. Objects smaller than one part go up in
+    a single PUT. A failed upload is aborted so no parts are left behind.
+    With index=True the object is added to its prefix's index, with the
+    SHA-256 of the uncompressed stream. Returns the bytes sent.
+    """
+    s3 = s3 or get_s3_client()
+    extra_args = {}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    if compression:
+        extra_args["ContentEncoding"] = compression
+    digest = hashlib.sha256()
+
+    def hashed():
+        for chunk in chunks:
+            digest.update(chunk)
+            yield chunk
+
+    stored = compress_stream(hashed(), compression) if compression else hashed()
+    buffer = bytearray()
+    parts = []
+    upload_id = None
+    size = 0
+
+    def send_part():
+        with metrics.span("s3_put"):
+            response = s3.upload_part(Bucket=bucket_name, Key=s3_path, UploadId=upload_id,
+                                      PartNumber=len(parts) + 1, Body=bytes(buffer))
+        parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+
+    try:
+        for chunk in stored:
+            buffer += chunk
+            if len(buffer) >= part_size:
+                if upload_id is None:
+                    upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=s3_path, **extra_args)["UploadId"]
+                send_part()
+                size += len(buffer)
+                buffer.clear()
+        if upload_id is None:
+            with metrics.span("s3_put"):
+                s3.put_object(Bucket=bucket_name, Key=s3_path, Body=bytes(buffer), **extra_args)
+        else:
+            if buffer:
+                send_part()
+            s3.complete_multipart_upload(Bucket=bucket_name, Key=s3_path, UploadId=upload_id,
+                                         MultipartUpload={"Parts": parts})
+        size += len(buffer)
+    except BaseException:
+        if upload_id is not None:
+            s3.abort_multipart_upload(Bucket=bucket_name, Key=s3_path, UploadId=upload_id)
+        raise
+    metrics.count("uploads")
+    metrics.count("upload_bytes", size)
+    print(f"☁️ Streamed {size} bytes to s3://{bucket_name}/{s3_path}" + (f" in {len(parts)} parts" if parts else ""))
+    if index:
+        record_uploads(s3, bucket_name, [object_entry(s3_path, None, size, compression, sha256=digest.hexdigest())])
+    return size
+
+def upload_to_s3(filename, bucket_name, s3_path):
+    """Uploads a local file using the shared S3 client."""
+    s3 = get_s3_client()
+    s3.upload_file(Filename=filename, Bucket=bucket_name, Key=s3_path, Config=get_transfer_config())
+    print(f"☁️ Uploaded {filename} to s3://{bucket_name}/{s3_path}")
+
+def read_object(bucket_name, key):
+    """Returns an object's bytes, decompressed according to its Content-Encoding."""
+    response = get_s3_client().get_object(Bucket=bucket_name, Key=key)
+    return decompress(response["Body"].read(), response.get("ContentEncoding"))
+
+def download_latest_file(bucket_name, prefix, local_path, extension=None):
+    """
+    Downloads the most recent output under an S3 prefix (optionally only
+    `extension` files), found through the prefix's index rather than its
+    filenames. A `local_path` that is a directory keeps the object's name.
+    Returns the index entry of the downloaded object.
+    """
+    entry = IndexResolver(get_s3_client(), bucket_name).latest(prefix, extension)
+    if not entry:
+        raise FileNotFoundError(f"No {extension or 'dated'} outputs under s3://{bucket_name}/{prefix}/")
+    if os.path.isdir(local_path):
+        local_path = os.path.join(local_path, entry["key"].rsplit("/", 1)[-1])
+
     try:
-        print(f"⬇️ Downloading s3://{bucket_name}/{key} to {local_path}")
-        s3.download_file(bucket_name, key, local_path)
+        print(f"⬇️ Downloading s3://{bucket_name}/{entry['key']} to {local_path}")
+        data = read_object(bucket_name, entry["key"])
+        with open(local_path, "wb") as file:
+            file.write(data)
         print(f"✅ File downloaded: {local_path}")
     except Exception as e:
         print(f"❌ Failed to download file from S3: {e}")
         raise
+    return entry
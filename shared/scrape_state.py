@@ -0,0 +1,100 @@
+import copy
+import json
+import os
+import time
+
+DEFAULT_STATE_PATH = os.path.join(".cache", "scrape_state.json")
+DEFAULT_TRACK_HOURS = 48
+
+class ScrapeState:
+    """
+    Per-subreddit high-water marks (newest fullname and created_utc seen) plus
+    the last known score of recently emitted posts, stored as one JSON file.
+    Incremental runs page new() only down to the mark and report score deltas
+    for tracked posts. Posts older than `track_hours` stop being tracked.
+    Ranked runs also keep each subreddit's typical score here (`scales`).
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH, track_hours=DEFAULT_TRACK_HOURS):
+        self.path = path
+        self.track_seconds = track_hours * 60 * 60
+        self.marks = {}
+        self.tracked = {}
+        self.scales = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        self.marks = data.get("marks", {})
+        self.tracked = data.get("tracked", {})
+        self.scales = data.get("scales", {})
+
+    def save(self):
+        """Writes the state atomically, dropping posts that aged out of tracking."""
+        cutoff = time.time() - self.track_seconds
+        self.tracked = {name: post for name, post in self.tracked.items() if post["created_utc"] >= cutoff}
+        dirpath = os.path.dirname(self.path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"marks": self.marks, "tracked": self.tracked, "scales": self.scales}, file)
+        os.replace(tmp_path, self.path)
+
+    def get_mark(self, subreddit):
+        """Returns {"fullname", "created_utc"} of the newest post seen in a subreddit, or None."""
+        return self.marks.get(subreddit.lower())
+
+    def set_mark(self, subreddit, fullname, created_utc):
+        mark = self.get_mark(subreddit)
+        if mark is None or created_utc >= mark["created_utc"]:
+            self.marks[subreddit.lower()] = {"fullname": fullname, "created_utc": created_utc}
+
+    def track(self, fullname, subreddit, score, created_utc):
+        self.tracked[fullname] = {"subreddit": subreddit, "score": score, "created_utc": created_utc}
+
+    def tracked_in(self, subreddits):
+        """Returns the fullnames of tracked posts from the given subreddits."""
+        wanted = {sub.lower() for sub in subreddits}
+        return [name for name, post in self.tracked.items() if post["subreddit"].lower() in wanted]
+
+    def scratch(self):
+        """
+        A copy to scrape one category into, so a category that fails or times
+        out halfway leaves this state untouched. merge() folds it back in.
+        """
+        scratch = copy.copy(self)
+        scratch.marks = dict(self.marks)
+        scratch.tracked = {name: dict(post) for name, post in self.tracked.items()}
+        return scratch
+
+    def merge(self, scratch, subreddits):
+        """Takes the marks and tracked posts of `subreddits` from a scratch copy."""
+        wanted = {sub.lower() for sub in subreddits}
+        self.marks.update({sub: mark for sub, mark in scratch.marks.items() if sub in wanted})
+        self.tracked.update({name: post for name, post in scratch.tracked.items()
+                             if post["subreddit"].lower() in wanted})
+
+    def sync_from_s3(self, s3, bucket_name, key):
+        """Replaces the local state with the copy in S3, if there is one."""
+        tmp_path = f"{self.path}.download"
+        dirpath = os.path.dirname(self.path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        try:
+            s3.download_file(bucket_name, key, tmp_path)
+        except Exception as e:
+            print(f"⚠️ Scrape state: keeping local copy, could not download s3://{bucket_name}/{key}: {e}")
+            return
+        os.replace(tmp_path, self.path)
+        self.load()
+        print(f"⬇️ Scrape state: restored s3://{bucket_name}/{key}")
+
+    def sync_to_s3(self, s3, bucket_name, key):
+        self.save()
+        s3.upload_file(self.path, bucket_name, key)
+        print(f"☁️ Scrape state: saved to s3://{bucket_name}/{key}")
@@ -0,0 +1,34 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid",
+    "ref", "ref_src", "ref_url", "cmpid", "smid", "ocid", "_ga", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+def normalize_url(url):
+    """
+    Normalizes an article URL so the same story links compare equal:
+    lowercases scheme/host, drops "www.", default ports, fragments, trailing
+    slashes and tracking parameters such as utm_source, and sorts the query.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
@@ -0,0 +1,203 @@
+import csv
+import io
+import itertools
+import json
+
+from shared.post import all_posts, to_csv, to_json, to_record_batch
+
+# Column types of the partitioned dataset, shared by every columnar writer (all of them Post fields)
+DATASET_SCHEMA = [
+    ("id", "string"),
+    ("title", "string"),
+    ("url", "string"),
+    ("permalink", "string"),
+    ("score", "int64"),
+    ("subreddit", "string"),
+    ("status", "string"),
+    ("score_delta", "int64"),
+    ("scraped_at", "timestamp"),
+]
+DATASET_FIELDS = [name for name, _ in DATASET_SCHEMA]
+
+# Rows serialized per chunk by the streaming writers
+STREAM_BATCH = 1000
+
+WRITERS = {}
+
+def register_writer(cls):
+    """Class decorator adding a writer to the registry under its `format` name."""
+    WRITERS[cls.format] = cls
+    return cls
+
+def batches(rows, size=STREAM_BATCH):
+    """Splits any iterable of rows into lists of at most `size`, consuming it lazily."""
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+def get_writer(fmt):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format: {fmt} (expected one of {', '.join(WRITERS)})")
+    return WRITERS[fmt]()
+
+class Writer:
+    """
+    Base class of the output writers. serialize() renders rows to bytes in
+    memory, so outputs can be uploaded without touching disk. stream()
+    renders the same bytes as a generator of chunks from any iterable of
+    rows, holding one batch of rows at a time, for outputs too big to build
+    in memory (see shared.s3_utils.upload_stream); write() saves it to a
+    local file the same way. serialize() hands lists of Posts to the
+    converters in shared/post.py, which write the same bytes faster.
+    """
+
+    format = None
+    extension = None
+    content_type = "application/octet-stream"
+    # Text formats shrink well with gzip/zstd; columnar ones are compressed internally
+    compressible = False
+    # Columnar writers take typed DATASET_SCHEMA rows and can write the partitioned dataset
+    columnar = False
+
+    def serialize(self, rows, fields):
+        raise NotImplementedError
+
+    def stream(self, rows, fields):
+        # Formats without a streaming encoding still need every row up front
+        yield self.serialize(list(rows), fields)
+
+    def write(self, rows, fields, path):
+        with open(path, "wb") as file:
+            for chunk in self.stream(rows, fields):
+                file.write(chunk)
+
+@register_writer
+class CsvWriter(Writer):
+    format = "csv"
+    extension = "csv"
+    content_type = "text/csv; charset=utf-8"
+    compressible = True
+
+    def serialize(self, rows, fields):
+        if all_posts(rows, fields):
+            return to_csv(rows, fields)
+        buffer = io.StringIO(newline="")
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def stream(self, rows, fields):
+        buffer = io.StringIO(newline="")
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for batch in batches(rows):
+            writer.writerows(batch)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+@register_writer
+class JsonWriter(Writer):
+    format = "json"
+    extension = "json"
+    content_type = "application/json"
+    compressible = True
+
+    def serialize(self, rows, fields):
+        if all_posts(rows, fields):
+            return to_json(rows, fields)
+        return json.dumps([{field: row.get(field) for field in fields} for row in rows],
+                          ensure_ascii=False, indent=2).encode("utf-8")
+
+    def stream(self, rows, fields):
+        """The same indented array as serialize(), one batch of elements at a time."""
+        first = True
+        for batch in batches(rows):
+            # Dumping a batch as its own array and dropping the brackets keeps serialize()'s layout
+            items = json.dumps([{field: row.get(field) for field in fields} for row in batch],
+                               ensure_ascii=False, indent=2)[2:-2]
+            yield (("[\n" if first else ",\n") + items).encode("utf-8")
+            first = False
+        yield b"[]" if first else b"\n]"
+
+@register_writer
+class NdjsonWriter(Writer):
+    """One JSON object per line; streams naturally and can be read back line by line. fields=None keeps every key."""
+
+    format = "ndjson"
+    extension = "jsonl"
+    content_type = "application/x-ndjson"
+    compressible = True
+
+    def serialize(self, rows, fields):
+        return b"".join(self.stream(rows, fields))
+
+    def stream(self, rows, fields):
+        for batch in batches(rows):
+            lines = [json.dumps(row if fields is None else {field: row.get(field) for field in fields},
+                                ensure_ascii=False, default=str) for row in batch]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def arrow_schema():
+    """Builds the pyarrow schema for DATASET_SCHEMA."""
+    import pyarrow as pa  # optional: only needed for the columnar formats
+
+    types = {"string": pa.string(), "int64": pa.int64(), "timestamp": pa.timestamp("us", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in DATASET_SCHEMA])
+
+def to_arrow_table(rows):
+    """Converts Posts or post records to a pyarrow Table with the dataset schema; missing columns become nulls."""
+    import pyarrow as pa
+
+    schema = arrow_schema()
+    if all_posts(rows, schema.names):
+        return pa.Table.from_batches([to_record_batch(rows, schema)])
+    columns = {name: [row.get(name) for row in rows] for name in schema.names}
+    return pa.Table.from_pydict(columns, schema=schema)
+
+@register_writer
+class ParquetWriter(Writer):
+    format = "parquet"
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+    columnar = True
+
+    def serialize(self, rows, fields):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = pa.BufferOutputStream()
+        pq.write_table(to_arrow_table(rows), sink, compression="zstd")
+        return sink.getvalue().to_pybytes()
+
+@register_writer
+class ArrowWriter(Writer):
+    """Arrow IPC (Feather v2) files, for readers that memory-map instead of decoding."""
+
+    format = "arrow"
+    extension = "arrow"
+    content_type = "application/vnd.apache.arrow.file"
+    columnar = True
+
+    def serialize(self, rows, fields):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        sink = pa.BufferOutputStream()
+        feather.write_feather(to_arrow_table(rows), sink, compression="zstd")
+        return sink.getvalue().to_pybytes()
+
+# Formats the partitioned dataset can be written in (--dataset-format)
+DATASET_FORMATS = [fmt for fmt, cls in WRITERS.items() if cls.columnar]
+
+def get_dataset_writer(fmt):
+    if fmt not in DATASET_FORMATS:
+        raise ValueError(f"Unknown dataset format: {fmt} (expected one of {', '.join(DATASET_FORMATS)})")
+    return WRITERS[fmt]()
+
+def partition_key(dataset_prefix, category_name, date, filename):
+    """Hive-style key, e.g. reddit_news_dataset/parquet/category=music_news/date=2025-07-16/part-....parquet"""
+    return f"{dataset_prefix}/category={category_name}/date={date}/{filename}"